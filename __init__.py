@@ -1,11 +1,17 @@
 # PochiPochi_SkinWeight/__init__.py
 
-from .ui.main_window import PochiPochiSkinWeightWindow
-
 _window_instance = None
 
+def __getattr__(name):
+    # UI(Qt/Maya)はlaunch時まで読み込まない（core単体でmayapy/テストから使えるように）
+    if name == "PochiPochiSkinWeightWindow":
+        from .ui.main_window import PochiPochiSkinWeightWindow
+        return PochiPochiSkinWeightWindow
+    raise AttributeError(name)
+
 def launch():
     global _window_instance
+    from .ui.main_window import PochiPochiSkinWeightWindow
     try:
         if _window_instance is not None:
             _window_instance.close()
@@ -0,0 +1,14 @@
+# batch_cli.py - Pochi-Pochi_SkinWeight
+# コマンドラインからの一括処理
+#   mayapy PochiPochi_SkinWeight/batch_cli.py manifest.json --workers 4 --report result.json
+import os
+import sys
+
+# パッケージの親フォルダをsys.pathに追加
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_PATH not in sys.path:
+    sys.path.insert(0, BASE_PATH)
+
+if __name__ == "__main__":
+    from PochiPochi_SkinWeight.core.batch import main
+    sys.exit(main())
@@ -1 +1,23 @@
 # hooks.py - Pochi-Pochi_SkinWeight
+# シーン保存などのタイミングで呼ぶコールバックの登録
+
+from maya.api import OpenMaya as om2
+
+
+def add_before_save_callback(func):
+    """シーン保存直前に func() を呼ぶ。戻り値は remove_callback() に渡すID"""
+    def _callback(*args):
+        try:
+            func()
+        except Exception as e:
+            print(f"保存前処理でエラー: {e}")
+    return om2.MSceneMessage.addCallback(om2.MSceneMessage.kBeforeSave, _callback)
+
+
+def remove_callback(callback_id):
+    if callback_id is None:
+        return
+    try:
+        om2.MMessage.removeCallback(callback_id)
+    except Exception:
+        pass
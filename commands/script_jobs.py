@@ -1 +1,119 @@
 # script_jobs.py - Pochi-Pochi_SkinWeight
+# シーン変化の監視（キャッシュ破棄用のscriptJob / APIコールバック）
+
+from maya import cmds
+from maya.api import OpenMaya as om2
+
+from ..core import scene_cache
+from ..core.adjacency import invalidate_mesh_graph
+from ..core.skin_data import invalidate_symmetry_cache
+
+# シーン全体が入れ替わる/ヒストリが変わりうるイベント
+_INVALIDATE_EVENTS = ["SceneOpened", "NewSceneOpened", "NameChanged", "Undo", "Redo"]
+
+_jobs = []
+_callbacks = []
+_mesh_callbacks = []  # scene_cache.watch_mesh で登録したメッシュごとの監視
+# 面構成・座標の変化を表すメッシュのプラグ（これ以外のdirtyは無視）
+_TOPOLOGY_PLUGS = {"inMesh", "cachedInMesh", "pnts", "vrts"}
+
+
+def _watch_mesh(mesh):
+    """
+    メッシュの面構成・座標が変わったら、そのメッシュの座標・面構成依存のキャッシュを破棄
+    デフォーム済みのメッシュは元形状(Orig)を監視（ウェイトの書き込みやポーズ変更では破棄しない）
+    """
+    sel = om2.MSelectionList()
+    sel.add(mesh)
+    path = sel.getDagPath(0)
+    if path.apiType() != om2.MFn.kMesh:
+        path.extendToShape()
+    node = path.node()
+    try:
+        orig = cmds.deformableShape(path.fullPathName(), originalGeometry=True) or []
+    except RuntimeError:
+        orig = []
+    if orig and orig[0]:
+        sel = om2.MSelectionList()
+        sel.add(orig[0].split(".")[0])
+        node = sel.getDependNode(0)
+    _mesh_callbacks.append(om2.MNodeMessage.addNodeDirtyPlugCallback(node, _on_mesh_dirty, mesh))
+
+
+def _on_mesh_dirty(node, plug, mesh):
+    # "pnts[3].pntx" → "pnts"
+    name = plug.partialName(useLongNames=True).split("[")[0].split(".")[0]
+    if name not in _TOPOLOGY_PLUGS:
+        return
+    invalidate_mesh_graph(mesh)
+    invalidate_symmetry_cache(mesh)
+
+
+def _remove_mesh_watches():
+    for cb in _mesh_callbacks:
+        try:
+            om2.MMessage.removeCallback(cb)
+        except Exception:
+            pass
+    del _mesh_callbacks[:]
+    scene_cache.clear_mesh_watches()
+
+
+def _on_connection(src_plug, dst_plug, made, *args):
+    # skinClusterやメッシュの入出力がつながり変わった＝ヒストリ変化
+    for plug in (src_plug, dst_plug):
+        node = plug.node()
+        if node.hasFn(om2.MFn.kGeometryFilt) or node.hasFn(om2.MFn.kMesh):
+            scene_cache.invalidate()
+            if node.hasFn(om2.MFn.kMesh):
+                # ヒストリ（ポリゴン編集ノード）の接続変化＝トポロジが変わりうる
+                invalidate_mesh_graph()
+                invalidate_symmetry_cache()
+            return
+
+
+def _on_node_removed(node, *args):
+    if node.hasFn(om2.MFn.kGeometryFilt) or node.hasFn(om2.MFn.kMesh) or node.hasFn(om2.MFn.kJoint):
+        scene_cache.invalidate()
+    if node.hasFn(om2.MFn.kMesh):
+        invalidate_mesh_graph()
+        invalidate_symmetry_cache()
+        _remove_mesh_watches()
+
+
+def _on_scene_changed(*args):
+    scene_cache.invalidate()
+    invalidate_mesh_graph()
+    invalidate_symmetry_cache()
+    # シーンが入れ替わると同名でも別ノードなので監視を張り直す
+    _remove_mesh_watches()
+
+
+def install_cache_invalidation():
+    """キャッシュ破棄の監視を登録し、scene_cacheを有効化（多重登録しない）"""
+    if _jobs or _callbacks:
+        return
+    for event in _INVALIDATE_EVENTS:
+        _jobs.append(cmds.scriptJob(event=[event, _on_scene_changed], protected=True))
+    _callbacks.append(om2.MDGMessage.addConnectionCallback(_on_connection))
+    _callbacks.append(om2.MDGMessage.addNodeRemovedCallback(_on_node_removed, "dependNode"))
+    scene_cache.set_mesh_watcher(_watch_mesh)
+    scene_cache.set_enabled(True)
+
+
+def remove_cache_invalidation():
+    scene_cache.set_enabled(False)
+    scene_cache.set_mesh_watcher(None)
+    _remove_mesh_watches()
+    for job in _jobs:
+        try:
+            cmds.scriptJob(kill=job, force=True)
+        except Exception:
+            pass
+    for cb in _callbacks:
+        try:
+            om2.MMessage.removeCallback(cb)
+        except Exception:
+            pass
+    del _jobs[:]
+    del _callbacks[:]
@@ -0,0 +1,84 @@
+# PochiPochi_SkinWeight/commands/weight_command.py
+# skinClusterへウェイト行列を一括で書き込むUndo対応コマンド（Maya Python API 2.0 プラグイン）
+#   cmds.loadPlugin(<このファイル>) で登録し、push_payload() → cmds.pochiSetSkinWeights() で実行
+
+import sys
+import types
+
+from maya.api import OpenMaya as om2
+from maya.api import OpenMayaAnim as oma2
+
+COMMAND_NAME = "pochiSetSkinWeights"
+
+# プラグインとしての読み込みとパッケージからのimportで別モジュールになるため、
+# 書き込み待ちデータは共通の名前でsys.modulesに置いたキューで受け渡す
+_SHARED = sys.modules.setdefault("_pochipochi_weight_queue", types.ModuleType("_pochipochi_weight_queue"))
+if not hasattr(_SHARED, "pending"):
+    _SHARED.pending = []
+
+
+def maya_useNewAPI():
+    pass
+
+
+def push_payload(skin, mesh, vertices, matrix):
+    """次の pochiSetSkinWeights 実行で書き込む内容を積む（matrix: 頂点数 × influence数）"""
+    _SHARED.pending.append({
+        "skin": skin,
+        "mesh": mesh,
+        "vertices": [int(v) for v in vertices],
+        "weights": [float(w) for w in matrix.ravel()],
+        "influence_count": int(matrix.shape[1]),
+    })
+
+
+class SetSkinWeightsCommand(om2.MPxCommand):
+    def __init__(self):
+        super().__init__()
+        self.payload = None
+        self.old_weights = None
+
+    @staticmethod
+    def creator():
+        return SetSkinWeightsCommand()
+
+    def isUndoable(self):
+        return True
+
+    def _targets(self):
+        sel = om2.MSelectionList()
+        sel.add(self.payload["skin"])
+        sel.add(self.payload["mesh"])
+        fn = oma2.MFnSkinCluster(sel.getDependNode(0))
+        comp_fn = om2.MFnSingleIndexedComponent()
+        comps = comp_fn.create(om2.MFn.kMeshVertComponent)
+        comp_fn.addElements(self.payload["vertices"])
+        infs = om2.MIntArray(list(range(self.payload["influence_count"])))
+        path = sel.getDagPath(1)
+        if path.apiType() != om2.MFn.kMesh:
+            path.extendToShape()
+        return fn, path, comps, infs
+
+    def doIt(self, args):
+        if not _SHARED.pending:
+            raise RuntimeError("pochiSetSkinWeights: 書き込みデータがありません")
+        self.payload = _SHARED.pending.pop(0)
+        self.redoIt()
+
+    def redoIt(self):
+        fn, dag, comps, infs = self._targets()
+        self.old_weights = fn.setWeights(
+            dag, comps, infs, om2.MDoubleArray(self.payload["weights"]),
+            normalize=False, returnOldWeights=True)
+
+    def undoIt(self):
+        fn, dag, comps, infs = self._targets()
+        fn.setWeights(dag, comps, infs, self.old_weights, normalize=False)
+
+
+def initializePlugin(plugin):
+    om2.MFnPlugin(plugin, "PochiPochi", "1.0").registerCommand(COMMAND_NAME, SetSkinWeightsCommand.creator)
+
+
+def uninitializePlugin(plugin):
+    om2.MFnPlugin(plugin).deregisterCommand(COMMAND_NAME)
@@ -0,0 +1,170 @@
+# PochiPochi_SkinWeight/core/adjacency.py
+# メッシュの頂点隣接グラフ（CSR形式）と、それを使ったウェイトのスムース
+#   トポロジ（面ごとの頂点数＋頂点番号列）は一括取得。監視中は頂点数/面数/面頂点数が変わるか監視で破棄されるまで再利用し、
+#   監視外は毎回面構成を読み直してハッシュが同じならグラフを再利用
+
+import hashlib
+
+import numpy as np
+
+from . import scene_cache
+from .skin_backend import get_backend
+from .normalize import lock_mask, normalize_rows
+from .weight_storage import WEIGHT_DTYPE
+
+
+def topology_hash(counts, connects):
+    """面構成のハッシュ（トポロジ変更検出用。頂点の移動では変わらない）"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(counts, dtype=np.int64).tobytes())
+    h.update(np.ascontiguousarray(connects, dtype=np.int64).tobytes())
+    return h.hexdigest() + f":{len(counts)}"
+
+
+def polygon_edges(counts, connects):
+    """面ごとの頂点数・頂点番号列 → 辺の両端 (辺数 × 2)。面の頂点を順に結び、最後は先頭へ戻る"""
+    counts = np.asarray(counts, dtype=np.int64)
+    connects = np.asarray(connects, dtype=np.int64)
+    face_size = np.repeat(counts, counts)
+    face_start = np.repeat(np.cumsum(counts) - counts, counts)
+    local = np.arange(len(connects)) - face_start
+    return np.stack([connects, connects[face_start + (local + 1) % face_size]], axis=1)
+
+
+class VertexGraph:
+    """
+    頂点隣接グラフ（CSR: 頂点 v の隣接は cols[row_ptr[v]:row_ptr[v+1]]、昇順・重複なし）
+    構築・参照ともnumpyで一括処理
+    """
+    def __init__(self, vertex_count, counts, connects):
+        self.vertex_count = int(vertex_count)
+        edges = polygon_edges(counts, connects)
+        pairs = np.concatenate([edges, edges[:, ::-1]])
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+        keys = np.unique(pairs[:, 0] * self.vertex_count + pairs[:, 1])
+        src, dst = np.divmod(keys, self.vertex_count)
+        self.row_ptr = np.searchsorted(src, np.arange(self.vertex_count + 1)).astype(np.int64)
+        self.cols = dst.astype(np.int64)
+
+    def degree(self, vertices=None):
+        deg = np.diff(self.row_ptr)
+        return deg if vertices is None else deg[np.asarray(vertices, dtype=np.int64)]
+
+    def neighbors(self, vertices):
+        """頂点群 → (各頂点の隣接数, 隣接頂点番号を頂点順に連結した配列)"""
+        vertices = np.asarray(vertices, dtype=np.int64).ravel()
+        starts = self.row_ptr[vertices]
+        counts = self.row_ptr[vertices + 1] - starts
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        return counts, self.cols[np.arange(int(counts.sum())) + offsets]
+
+    def ring(self, vertices):
+        """頂点群＋その隣接頂点（昇順・重複なし）"""
+        _, nbrs = self.neighbors(vertices)
+        return np.union1d(np.asarray(vertices, dtype=np.int64), nbrs)
+
+
+# mesh → {"key": (頂点数, 面数, 面頂点数), "hash": 面構成のハッシュ, "watched": 監視登録済みか}
+_topology_cache = {}
+# mesh → {"key":..., "hash":..., "graph": VertexGraph}
+_graph_cache = {}
+
+
+def _topology_key(mesh, backend):
+    """キャッシュの判定に使う安価なキー（面構成を読まずに取れる件数だけ）"""
+    return tuple(int(n) for n in backend.topology_counts(mesh))
+
+
+def _is_trusted(mesh, key):
+    """
+    面構成を読まずにキャッシュを使ってよいか
+    監視中かつ件数が同じときだけ（監視外では件数の変わらない辺の張り替えなどを検出できない）
+    """
+    cached = _topology_cache.get(mesh)
+    return bool(cached) and cached["key"] == key and cached["watched"] and scene_cache.is_enabled()
+
+
+def _read_topology(mesh, key, backend):
+    """面構成を一括取得してハッシュを記録 → (counts, connects, hash)"""
+    # 読む前に監視を登録（読んだ後の変更を取りこぼさない）
+    watched = scene_cache.watch_mesh(mesh)
+    counts, connects = backend.polygons(mesh)
+    digest = topology_hash(counts, connects)
+    _topology_cache[mesh] = {"key": key, "hash": digest, "watched": watched}
+    return counts, connects, digest
+
+
+def get_topology_hash(mesh, backend=None):
+    """
+    メッシュの面構成のハッシュ
+    監視中は件数が変わらない限り面構成を読み直さない（それ以外の変更は監視が invalidate_mesh_graph で破棄）
+    """
+    backend = backend or get_backend()
+    key = _topology_key(mesh, backend)
+    if _is_trusted(mesh, key):
+        return _topology_cache[mesh]["hash"]
+    return _read_topology(mesh, key, backend)[2]
+
+
+def get_mesh_graph(mesh, backend=None):
+    """
+    メッシュの頂点隣接グラフ（トポロジは一括取得）
+    監視中で件数が変わっていなければ面構成を読まずにキャッシュを再利用
+    監視外は面構成を読み直し、ハッシュが同じならグラフの構築だけ省く
+    """
+    backend = backend or get_backend()
+    key = _topology_key(mesh, backend)
+    cached = _graph_cache.get(mesh)
+    if cached and _is_trusted(mesh, key) and cached["hash"] == _topology_cache[mesh]["hash"]:
+        return cached["graph"]
+    counts, connects, digest = _read_topology(mesh, key, backend)
+    if cached and cached["key"] == key and cached["hash"] == digest:
+        return cached["graph"]
+    graph = VertexGraph(key[0], counts, connects)
+    _graph_cache[mesh] = {"key": key, "hash": digest, "graph": graph}
+    return graph
+
+
+def invalidate_mesh_graph(mesh=None):
+    """キャッシュ破棄（mesh=Noneなら全て）"""
+    if mesh is None:
+        _graph_cache.clear()
+        _topology_cache.clear()
+    else:
+        _graph_cache.pop(mesh, None)
+        _topology_cache.pop(mesh, None)
+
+
+# ==== スムース ====
+def smooth_matrix(weights, graph, vertices=None, strength=0.5, iterations=1, locked=None, region=None):
+    """
+    各頂点のウェイトを 隣接頂点の平均 へ strength の割合で近づけ、ロック列を固定して正規化（iterations 回）
+    vertices: 対象頂点（None=全頂点）。対象外の頂点は変えない
+    region: weights の各行に対応する頂点番号（昇順、None=全頂点）。対象頂点とその隣接を含むこと
+    weights は書き換えず新しい行列を返す
+    """
+    new = np.array(weights, dtype=WEIGHT_DTYPE)
+    mask = lock_mask(locked, new.shape[1])
+    if vertices is None:
+        vertices = np.arange(graph.vertex_count, dtype=np.int64)
+    else:
+        vertices = np.unique(np.asarray(vertices, dtype=np.int64))
+    counts, nbrs = graph.neighbors(vertices)
+    rows = vertices if region is None else np.searchsorted(region, vertices)
+    if region is not None:
+        nbrs = np.searchsorted(region, nbrs)
+    # 隣接の無い頂点は対象外（隣接の連結配列には寄与しないのでそのまま除ける）
+    has = counts > 0
+    rows, counts = rows[has], counts[has]
+    if not rows.size:
+        return new
+    starts = np.cumsum(counts) - counts
+    scale = (1.0 / counts).astype(WEIGHT_DTYPE)[:, None]
+    strength = np.float32(np.clip(strength, 0.0, 1.0))
+    for _ in range(max(int(iterations), 0)):
+        current = new[rows]
+        average = np.add.reduceat(new[nbrs], starts, axis=0) * scale
+        blended = current + strength * (average - current)
+        blended[:, mask] = current[:, mask]
+        new[rows] = normalize_rows(blended, mask)
+    return new
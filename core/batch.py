@@ -0,0 +1,226 @@
+# PochiPochi_SkinWeight/core/batch.py
+# UIを使わない一括処理（mayapy / バッチ用）
+#
+# マニフェスト(JSON):
+#   {
+#     "ops": [{"op": "prune", "threshold": 0.01, "max_influences": 4}, "normalize"],  # 既定の処理（省略可）
+#     "jobs": [
+#       {"scene": "D:/assets/chara_a.mb", "meshes": ["body", "head"], "save": true},
+#       {"scene": "D:/assets/chara_b.mb", "mesh": "body",
+#        "ops": [{"op": "export", "path": "D:/out/{scene}_{mesh}.ppsw"}]},
+#       {"mesh": "body", "ops": [{"op": "import", "path": "D:/out/a_body.ppsw", "vertex_range": [0, 5000]}]}
+#     ]
+#   }
+# 1シーン = 1ジョブ。ジョブはmayapyワーカーのプロセスプールに分配し、処理ごとの時間と失敗を記録する
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from maya import cmds
+
+from .skin_backend import get_backend, require_skin
+from .skin_data import make_or_get_skin_data_node, safe_name
+from .mirror_ops import mirror_weights
+from .symmetry import SYMMETRY_TOLERANCE
+from .weight_ops import normalize_weights, prune_weights
+from . import weight_io
+
+# op名 → fn(mesh, backend, **params) -> 結果dict
+OPERATIONS = {}
+
+
+def operation(name):
+    def _register(fn):
+        OPERATIONS[name] = fn
+        return fn
+    return _register
+
+
+@operation("create_skin_data")
+def op_create_skin_data(mesh, backend):
+    return {"node": make_or_get_skin_data_node(require_skin(mesh, backend))}
+
+
+@operation("export")
+def op_export(mesh, backend, path, storage=None):
+    return weight_io.export_weights(mesh, path, backend, storage=storage)
+
+
+@operation("import")
+def op_import(mesh, backend, path, vertex_range=None):
+    return weight_io.import_weights(mesh, path, backend, vertex_range=vertex_range)
+
+
+@operation("mirror")
+def op_mirror(mesh, backend, axis="x", direction="pos2neg", tolerance=SYMMETRY_TOLERANCE):
+    if direction not in ("pos2neg", "neg2pos"):
+        raise RuntimeError(f"directionは pos2neg / neg2pos のどちらかです: {direction}")
+    return mirror_weights(mesh, axis, positive_to_negative=(direction == "pos2neg"),
+                          tolerance=tolerance, backend=backend)
+
+
+@operation("prune")
+def op_prune(mesh, backend, threshold=0.01, max_influences=None):
+    return prune_weights(mesh, threshold, max_influences, backend)
+
+
+@operation("normalize")
+def op_normalize(mesh, backend):
+    return normalize_weights(mesh, backend)
+
+
+# ==== マニフェスト ====
+def _normalize_op(op):
+    spec = {"op": op} if isinstance(op, str) else dict(op)
+    if spec.get("op") not in OPERATIONS:
+        raise RuntimeError(f"未対応の処理です: {spec.get('op')}")
+    return spec
+
+
+def parse_manifest(data):
+    """マニフェストdict → ジョブのリスト（"mesh"/文字列opなどの省略形を展開して検証）"""
+    default_ops = data.get("ops", [])
+    jobs = []
+    for i, entry in enumerate(data.get("jobs", [])):
+        meshes = entry.get("meshes") or ([entry["mesh"]] if entry.get("mesh") else [])
+        if not meshes:
+            raise RuntimeError(f"jobs[{i}]: メッシュが指定されていません")
+        ops = [_normalize_op(op) for op in entry.get("ops", default_ops)]
+        if not ops:
+            raise RuntimeError(f"jobs[{i}]: 処理が指定されていません")
+        jobs.append({"scene": entry.get("scene"), "meshes": list(meshes), "ops": ops,
+                     "save": bool(entry.get("save", False))})
+    return jobs
+
+
+def load_manifest(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_manifest(json.load(f))
+
+
+# ==== 実行 ====
+def _expand_params(params, mesh, scene):
+    """パス中の {mesh} / {scene} を置換"""
+    scene_name = os.path.splitext(os.path.basename(scene))[0] if scene else ""
+    return {k: v.format(mesh=safe_name(mesh), scene=scene_name) if isinstance(v, str) else v
+            for k, v in params.items()}
+
+
+def run_operation(mesh, spec, backend=None, scene=None):
+    """1メッシュに1処理 → {"mesh", "op", "status", "seconds", "result" / "error"}"""
+    backend = backend or get_backend()
+    params = _expand_params({k: v for k, v in spec.items() if k != "op"}, mesh, scene)
+    step = {"mesh": mesh, "op": spec["op"], "status": "ok", "seconds": 0.0}
+    start = time.perf_counter()
+    try:
+        step["result"] = OPERATIONS[spec["op"]](mesh, backend, **params)
+    except Exception as e:
+        step["status"] = "failed"
+        step["error"] = f"{type(e).__name__}: {e}"
+    step["seconds"] = time.perf_counter() - start
+    return step
+
+
+def run_job(job, backend=None):
+    """
+    1ジョブ（シーンを開く → メッシュごとに処理を順に実行 → 保存）
+    あるメッシュで処理が失敗したらそのメッシュの残りは飛ばし、シーンは保存しない
+    """
+    result = {"scene": job.get("scene"), "status": "ok", "seconds": 0.0, "steps": [], "error": None}
+    start = time.perf_counter()
+    try:
+        if job.get("scene"):
+            cmds.file(job["scene"], open=True, force=True)
+        for mesh in job["meshes"]:
+            for spec in job["ops"]:
+                step = run_operation(mesh, spec, backend, job.get("scene"))
+                result["steps"].append(step)
+                if step["status"] != "ok":
+                    result["status"] = "failed"
+                    break
+        if job.get("save") and result["status"] == "ok":
+            cmds.file(save=True, force=True)
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def initialize_standalone():
+    """mayapyのワーカーでMayaを初期化（初期化済み/GUI内なら何もしない）"""
+    if hasattr(cmds, "file"):
+        return
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+
+
+def _run_pool(jobs, workers, mayapy=None):
+    ctx = multiprocessing.get_context("spawn")
+    if mayapy:
+        # ワーカーもmayapyで起動する
+        ctx.set_executable(mayapy)
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=initialize_standalone) as pool:
+        futures = {pool.submit(run_job, job): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                # ワーカープロセスごと落ちた場合など
+                results[i] = {"scene": jobs[i].get("scene"), "status": "failed", "seconds": 0.0,
+                              "steps": [], "error": f"{type(e).__name__}: {e}"}
+    return results
+
+
+def run_batch(jobs, workers=1, backend=None, mayapy=None):
+    """
+    全ジョブを実行 → {"jobs": [ジョブ結果...], "seconds": 合計時間, "failed": 失敗ジョブ数}
+    workers<=1 または backend 指定時はこのプロセス内で順に実行（MemorySkinBackendでのテスト用）
+    """
+    start = time.perf_counter()
+    if backend is not None or workers <= 1 or len(jobs) <= 1:
+        if backend is None:
+            initialize_standalone()
+        results = [run_job(job, backend) for job in jobs]
+    else:
+        results = _run_pool(jobs, min(workers, len(jobs)), mayapy)
+    return {"jobs": results, "seconds": time.perf_counter() - start,
+            "failed": sum(1 for r in results if r["status"] != "ok")}
+
+
+def format_report(report):
+    lines = []
+    for r in report["jobs"]:
+        lines.append(f"[{r['status']}] {r['scene'] or '(current scene)'} ({r['seconds']:.2f}s)")
+        for step in r["steps"]:
+            detail = step.get("error") or step.get("result")
+            lines.append(f"    {step['mesh']} {step['op']}: {step['status']} ({step['seconds']:.3f}s) {detail}")
+        if r["error"]:
+            lines.append(f"    error: {r['error']}")
+    lines.append(f"{len(report['jobs'])} jobs, {report['failed']} failed, {report['seconds']:.2f}s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pochi-Pochi SkinWeight バッチ処理（mayapyで実行）")
+    parser.add_argument("manifest", help="マニフェストJSON")
+    parser.add_argument("-w", "--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="並列ワーカー数（1で逐次）")
+    parser.add_argument("--mayapy", default=None, help="ワーカーに使うmayapyのパス")
+    parser.add_argument("--report", default=None, help="結果をJSONで書き出すパス")
+    args = parser.parse_args(argv)
+
+    report = run_batch(load_manifest(args.manifest), workers=args.workers, mayapy=args.mayapy)
+    print(format_report(report))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+    return 1 if report["failed"] else 0
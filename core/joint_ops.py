@@ -1,15 +1,23 @@
 # PochiPochi_SkinWeight/core/joint_ops.py
 
+import numpy as np
 from maya import cmds
-from ..core.weight_ops import find_related_skin_cluster
+from ..core.scene_cache import find_related_skin_cluster
+from ..core import scene_cache
+from ..core.skin_backend import get_backend
+from ..core.profiling import counting_cmds, profiled
 
+cmds = counting_cmds(cmds)
+
+@profiled()
 def get_skin_influences(mesh):
     """meshについたskinClusterのinfluenceジョイントリスト"""
     skin = find_related_skin_cluster(mesh)
     if not skin:
         return []
-    return cmds.skinCluster(skin, query=True, inf=True)
+    return list(scene_cache.get_skin_influences(skin))
 
+@profiled()
 def get_vertex_influences(vertex, min_weight=0.0001):
     """頂点名→(joint, weight)ペアのリスト"""
     mesh = vertex.split('.')[0]
@@ -21,4 +29,32 @@ def get_vertex_influences(vertex, min_weight=0.0001):
     result = []
     for j, v in zip(joints, values):
         result.append((j, v))
-    return result
\ No newline at end of file
+    return result
+
+def influence_stats(weights, influences, min_weight=0.0001):
+    """
+    頂点群のウェイト行列 → 選択内に存在するインフルエンスごとの集計（列方向に一括計算）
+    {"influences": [...], "count": 持つ頂点数, "min"/"max"/"mean": 持つ頂点での値}
+    """
+    weights = np.asarray(weights, dtype=np.float32)
+    present = weights > min_weight
+    count = present.sum(axis=0)
+    cols = np.flatnonzero(count)
+    masked = np.where(present[:, cols], weights[:, cols], np.nan)
+    return {
+        "influences": [influences[c] for c in cols],
+        "count": count[cols],
+        "min": np.nanmin(masked, axis=0) if cols.size else np.zeros(0, dtype=np.float32),
+        "max": np.nanmax(masked, axis=0) if cols.size else np.zeros(0, dtype=np.float32),
+        "mean": np.nanmean(masked, axis=0) if cols.size else np.zeros(0, dtype=np.float32),
+    }
+
+@profiled()
+def get_selection_influence_stats(mesh, vertex_indices, min_weight=0.0001, backend=None):
+    """選択頂点(番号配列)のインフルエンス集計。ウェイトは一括読み込み1回"""
+    skin = find_related_skin_cluster(mesh)
+    if not skin:
+        return None
+    backend = backend or get_backend()
+    infs, weights = backend.read_weights(skin, mesh, vertex_indices)
+    return influence_stats(weights, infs, min_weight)
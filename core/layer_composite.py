@@ -0,0 +1,72 @@
+# PochiPochi_SkinWeight/core/layer_composite.py
+
+import numpy as np
+
+from .weight_storage import WEIGHT_DTYPE
+from .normalize import normalize_rows
+
+
+def composite_layers(layers, vertex_count, influence_count, rows=None):
+    """
+    有効レイヤを index 順に opacity で重ねて頂点ごとに正規化した最終ウェイト行列を返す
+    レイヤはウェイトを持つ頂点(行に非ゼロあり)だけ下の結果を opacity 分置き換える
+    rows を指定するとその頂点分だけ (len(rows) × influence_count) を計算
+    疎レイヤは非ゼロのある行だけを処理する
+    """
+    n = vertex_count if rows is None else len(rows)
+    out = np.zeros((n, influence_count), dtype=WEIGHT_DTYPE)
+    for ly in layers:
+        opacity = float(ly.get("opacity", 1.0))
+        if opacity <= 0.0:
+            continue
+        pos, block = ly["weights"].masked_rows(rows)
+        if pos.size:
+            out[pos] += min(opacity, 1.0) * (block - out[pos])
+    return normalize_rows(out)
+
+
+class LayerCompositor:
+    """
+    SkinLayerManager の有効レイヤを合成した最終ウェイト行列をキャッシュ
+    マネージャからの変更通知で汚れた頂点だけ再計算する
+    """
+    def __init__(self, manager):
+        self.manager = manager
+        self.result = None
+        self.last_updated = None  # 直近evaluateで再計算した頂点（Noneなら全頂点）
+        self._dirty_all = True
+        self._dirty = []
+        manager.add_listener(self.mark_dirty)
+
+    def detach(self):
+        self.manager.remove_listener(self.mark_dirty)
+
+    def mark_dirty(self, vertices=None):
+        if vertices is None:
+            self._dirty_all = True
+            self._dirty = []
+        elif not self._dirty_all:
+            self._dirty.append(np.asarray(vertices, dtype=np.int64).ravel())
+
+    def is_dirty(self):
+        return self._dirty_all or bool(self._dirty)
+
+    def evaluate(self):
+        """最終ウェイト行列 (vertex_count × influence_count) を返す（返り値は書き換えないこと）"""
+        mgr = self.manager
+        shape = (mgr.vertex_count, len(mgr.influences))
+        if self.result is None or self.result.shape != shape:
+            self._dirty_all = True
+        layers = mgr.get_enabled_layers()
+        if self._dirty_all:
+            self.result = composite_layers(layers, shape[0], shape[1])
+            self.last_updated = None
+        elif self._dirty:
+            rows = np.unique(np.concatenate(self._dirty))
+            self.result[rows] = composite_layers(layers, shape[0], shape[1], rows=rows)
+            self.last_updated = rows
+        else:
+            self.last_updated = np.zeros(0, dtype=np.int64)
+        self._dirty_all = False
+        self._dirty = []
+        return self.result
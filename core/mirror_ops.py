@@ -1 +1,85 @@
-# mirror_ops.py - Pochi-Pochi_SkinWeight
+# PochiPochi_SkinWeight/core/mirror_ops.py
+# 対称頂点マップ＋左右インフルエンス対応表によるウェイトミラー（行列演算のみで反転）
+
+import re
+
+import numpy as np
+
+from .skin_backend import get_backend, require_skin
+from .skin_data import get_symmetry_map
+from .symmetry import AXES, SYMMETRY_TOLERANCE
+
+# 左右の命名規則（上から順に最初に当てはまったものを使う）
+MIRROR_NAME_RULES = [
+    (re.compile(r"^L_"), "R_"), (re.compile(r"^R_"), "L_"),
+    (re.compile(r"^l_"), "r_"), (re.compile(r"^r_"), "l_"),
+    (re.compile(r"_L$"), "_R"), (re.compile(r"_R$"), "_L"),
+    (re.compile(r"_l$"), "_r"), (re.compile(r"_r$"), "_l"),
+    # 単語の区切りだけ（"cleft_jaw" / "bright" などの途中一致は置換しない。camelCaseの "upperLeftArm" は可）
+    (re.compile(r"Left(?![a-z])"), "Right"), (re.compile(r"Right(?![a-z])"), "Left"),
+    (re.compile(r"(?<![A-Za-z])left(?![a-z])"), "right"), (re.compile(r"(?<![A-Za-z])right(?![a-z])"), "left"),
+]
+
+
+def mirror_influence_name(name, rules=MIRROR_NAME_RULES):
+    """ジョイント名 → 反対側の名前（規則に当てはまらなければそのまま）。パス/ネームスペースは保持"""
+    head, sep, short = name.rpartition("|")
+    ns, colon, base = short.rpartition(":")
+    for pattern, repl in rules:
+        if pattern.search(base):
+            return f"{head}{sep}{ns}{colon}{pattern.sub(repl, base, count=1)}"
+    return name
+
+
+def build_influence_map(influences, rules=MIRROR_NAME_RULES):
+    """
+    インフルエンス列 → 反対側の列番号 の対応配列と、相手が見つからなかった名前のリスト
+    名前→列番号は辞書で引く
+    """
+    lookup = {name: i for i, name in enumerate(influences)}
+    short_lookup = {name.split("|")[-1]: i for i, name in enumerate(influences)}
+    inf_map = np.arange(len(influences), dtype=np.int64)
+    missing = []
+    for i, name in enumerate(influences):
+        other = mirror_influence_name(name, rules)
+        if other == name:
+            continue
+        j = lookup.get(other, short_lookup.get(other.split("|")[-1]))
+        if j is None:
+            missing.append(name)
+        else:
+            inf_map[i] = j
+    return inf_map, missing
+
+
+def mirror_matrix(weights, points, vertex_map, influence_map, axis="x", positive_to_negative=True,
+                  tolerance=SYMMETRY_TOLERANCE):
+    """
+    ウェイト行列をミラー → (書き込み先頂点番号, 新しい行ブロック)
+    書き込み先 = 反対側(軸上を除く)で対称頂点がある頂点。列は influence_map で入れ替え
+    """
+    coord = np.asarray(points)[:, AXES[axis]]
+    side = coord < -tolerance if positive_to_negative else coord > tolerance
+    targets = np.flatnonzero(side & (vertex_map >= 0))
+    sources = vertex_map[targets]
+    return targets, weights[sources][:, influence_map]
+
+
+def mirror_weights(mesh, axis="x", positive_to_negative=True, tolerance=SYMMETRY_TOLERANCE, backend=None):
+    """
+    メッシュ全体のウェイトをミラー（一括読み込み → 行列演算 → 一括書き込み）
+    戻り値: {"mirrored": 頂点数, "unmatched": 対称頂点なしの頂点数, "missing_influences": [...]}
+    """
+    backend = backend or get_backend()
+    skin = require_skin(mesh, backend)
+    # 座標は側の判定にも使うので1回だけ読んで対称マップと共有
+    points = backend.points(mesh)
+    sym = get_symmetry_map(mesh, axis, tolerance, skin=skin, backend=backend, points=points)
+    infs, weights = backend.read_weights(skin, mesh)
+    inf_map, missing = build_influence_map(infs)
+    targets, rows = mirror_matrix(weights, points, sym["map"], inf_map,
+                                  axis, positive_to_negative, tolerance)
+    if targets.size:
+        backend.write_weights(skin, mesh, targets, rows)
+    return {"mirrored": int(targets.size), "unmatched": int(sym["unmatched"].size),
+            "missing_influences": missing}
@@ -0,0 +1,145 @@
+# PochiPochi_SkinWeight/core/normalize.py
+# ウェイト行列（頂点数 × インフルエンス数）の一括正規化とインフルエンスのロック
+#   locked: インフルエンスごとのbool配列 / ロック列番号のリスト / None。ロック列の値は変えない
+#   すべて頂点方向にまとめて計算するので、コストは頂点数に比例
+
+import numpy as np
+
+from .weight_storage import WEIGHT_DTYPE
+
+# これ以下の差は0とみなす
+EPSILON = 1e-6
+
+
+def lock_mask(locked, influence_count):
+    """locked → 長さ influence_count のbool配列"""
+    mask = np.zeros(influence_count, dtype=bool)
+    if locked is None:
+        return mask
+    locked = np.asarray(locked)
+    if locked.dtype == bool:
+        if locked.shape != (influence_count,):
+            raise ValueError(f"lock mask shape {locked.shape} does not match ({influence_count},)")
+        return locked.copy()
+    mask[locked.astype(np.int64)] = True
+    return mask
+
+
+def normalize_rows(matrix, locked=None):
+    """
+    行(頂点)ごとに合計1へ正規化（matrixを直接書き換えて返す）
+    ロック列は固定し、1 - ロック列合計 をアンロック列で元の比率のまま分け合う
+    アンロック列の合計が0の行はそのまま
+    """
+    mask = lock_mask(locked, matrix.shape[1])
+    if not mask.any():
+        sums = matrix.sum(axis=1, keepdims=True)
+        np.divide(matrix, sums, out=matrix, where=sums > 0)
+        return matrix
+    free = ~mask
+    target = np.clip(1.0 - matrix[:, mask].sum(axis=1), 0.0, None)
+    free_sum = matrix[:, free].sum(axis=1)
+    ok = np.flatnonzero(free_sum > 0)
+    scale = (target[ok] / free_sum[ok]).astype(matrix.dtype)
+    matrix[np.ix_(ok, np.flatnonzero(free))] *= scale[:, None]
+    return matrix
+
+
+def set_columns(weights, cols, values, locked=None, force=False, return_skipped=False):
+    """
+    cols列を values にし、行の合計が1になるよう残りを他のアンロック列へ元の比率で配分した新しい行列を返す
+    values: スカラー / 頂点ごと(n,) / (n, len(cols))
+    - 編集列の合計は 1 - ロック列合計 まで（超える分は編集列の比率のまま縮める）
+    - 配分先の合計が0の行は、行全体が0（未設定の行）なら値だけ入れ、それ以外は元のまま
+      force=True ならその行にも値だけ入れる（合計は1にならない。レイヤ合成時に正規化される前提）
+    return_skipped=True なら (新しい行列, 値を入れられず元のままにした行番号) を返す
+    """
+    weights = np.asarray(weights, dtype=WEIGHT_DTYPE)
+    n, inf_count = weights.shape
+    cols = np.atleast_1d(np.asarray(cols, dtype=np.int64)).ravel()
+    mask = lock_mask(locked, inf_count)
+    if mask[cols].any():
+        raise RuntimeError("ロックされたインフルエンスは編集できません")
+    vals = np.asarray(values, dtype=WEIGHT_DTYPE)
+    if vals.ndim == 1 and vals.shape[0] == n and len(cols) != n:
+        vals = vals[:, None]
+    vals = np.clip(np.broadcast_to(vals, (n, len(cols))), 0.0, 1.0).astype(WEIGHT_DTYPE)
+
+    budget = np.clip(1.0 - weights[:, mask].sum(axis=1), 0.0, 1.0)
+    edited = vals.sum(axis=1)
+    over = np.flatnonzero(edited > budget)
+    vals[over] *= (budget[over] / edited[over])[:, None]
+    remainder = budget - vals.sum(axis=1)
+
+    others = ~mask
+    others[cols] = False
+    other_cols = np.flatnonzero(others)
+    other_sum = weights[:, other_cols].sum(axis=1)
+    spread = other_sum > 0
+    apply = spread | (remainder <= EPSILON) | (weights.sum(axis=1) == 0)
+    if force:
+        apply[:] = True
+
+    new = weights.copy()
+    rows = np.flatnonzero(spread)
+    scale = (remainder[rows] / other_sum[rows]).astype(WEIGHT_DTYPE)
+    new[np.ix_(rows, other_cols)] *= scale[:, None]
+    rows = np.flatnonzero(apply)
+    new[np.ix_(rows, cols)] = vals[rows]
+    if not return_skipped:
+        return new
+    differs = np.any(np.abs(vals - weights[:, cols]) > EPSILON, axis=1)
+    return new, np.flatnonzero(~apply & differs)
+
+
+def add_columns(weights, cols, deltas, locked=None, force=False, return_skipped=False):
+    """cols列に deltas を加算して set_columns と同じ規則で正規化"""
+    weights = np.asarray(weights, dtype=WEIGHT_DTYPE)
+    cols = np.atleast_1d(np.asarray(cols, dtype=np.int64)).ravel()
+    deltas = np.asarray(deltas, dtype=WEIGHT_DTYPE)
+    if deltas.ndim == 1 and deltas.shape[0] == weights.shape[0] and len(cols) != weights.shape[0]:
+        deltas = deltas[:, None]
+    return set_columns(weights, cols, weights[:, cols] + deltas, locked, force, return_skipped)
+
+
+def prune_matrix(weights, threshold=0.0, max_influences=None, locked=None):
+    """
+    頂点ごとに threshold 未満のウェイトを0にし、大きい順に max_influences 個だけ残して正規化した新しい行列を返す
+    ロック列は消さずに残し、残す数に含める（アンロック列に使える枠は max_influences - その頂点の非ゼロのロック列数）
+    上位の選択は argpartition による行ごとの部分ソート（全体ソートはしない）
+    枠が残っていれば、アンロック列が全部しきい値未満でも最大のものは残す
+    非ゼロのロック列だけで max_influences を超える頂点があれば RuntimeError
+    """
+    weights = np.asarray(weights, dtype=WEIGHT_DTYPE)
+    n, inf_count = weights.shape
+    mask = lock_mask(locked, inf_count)
+    free = (weights > 0) & ~mask
+    keep = free & (weights >= threshold)
+    if max_influences is None:
+        slots = np.full(n, inf_count, dtype=np.int64)
+    else:
+        slots = max_influences - np.count_nonzero(weights[:, mask], axis=1)
+        if (slots < 0).any():
+            raise RuntimeError(f"ロックされたインフルエンスだけで最大インフルエンス数({max_influences})を"
+                               f"超える頂点があります: {int(np.count_nonzero(slots < 0))}頂点")
+    score = np.where(free, weights, -np.inf)
+    k = int(min(slots.max(initial=0), inf_count))
+    if k < inf_count:
+        # アンロック列だけで順位を付け、頂点ごとの枠数まで残す
+        in_top = np.zeros_like(keep)
+        if k:
+            top = np.argpartition(-score, k - 1, axis=1)[:, :k]
+            order = np.argsort(-np.take_along_axis(score, top, axis=1), axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            np.put_along_axis(in_top, top, np.arange(k) < slots[:, None], axis=1)
+        keep &= in_top
+    rows = np.flatnonzero(free.any(axis=1) & ~keep.any(axis=1) & (slots > 0))
+    keep[rows, np.argmax(score[rows], axis=1)] = True
+    keep |= mask
+    new = np.where(keep, weights, 0.0).astype(WEIGHT_DTYPE)
+    return normalize_rows(new, mask)
+
+
+def influence_counts(weights):
+    """頂点ごとのウェイトを持つインフルエンス数"""
+    return np.count_nonzero(np.asarray(weights), axis=1)
@@ -0,0 +1,203 @@
+# PochiPochi_SkinWeight/core/profiling.py
+# 任意で有効にする計測（処理ごとの実行時間とMaya呼び出し回数）
+#   enable() 中だけ @profiled の付いた処理を計測する
+#   core各モジュールは cmds = counting_cmds(cmds) としておき、計測中の処理内の cmds 呼び出しを数える
+#   環境変数 POCHIPOCHI_PROFILE=1 で読み込み時から有効
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+# 処理ごとに保持する直近の計測数
+HISTORY_SIZE = 256
+# ヒストグラムの区切り(ms)。最後の区間は「以上」
+BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()  # スレッドごとの実行中の処理スタック
+_records = {}               # 処理名 → {"durations": deque, "count", "total", "calls": Counter}
+_last = None
+_listeners = []
+
+
+class CountingCmds:
+    """maya.cmds の代わりに置き、計測中はコマンドごとの呼び出しを数える"""
+    def __init__(self, cmds):
+        self._cmds = cmds
+
+    def __getattr__(self, name):
+        attr = getattr(self._cmds, name)
+        if not callable(attr):
+            return attr
+
+        def _call(*args, **kwargs):
+            count_call("cmds." + name)
+            return attr(*args, **kwargs)
+        return _call
+
+
+def counting_cmds(cmds):
+    """モジュールの cmds を包む（Maya外で cmds が None ならそのまま）"""
+    return CountingCmds(cmds) if cmds is not None else None
+
+
+def enable(enabled=True):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    global _last
+    with _lock:
+        _records.clear()
+        _last = None
+
+
+def add_listener(fn):
+    """メインスレッドの最外側の処理が終わるたびに fn(record) を呼ぶ"""
+    if fn not in _listeners:
+        _listeners.append(fn)
+
+
+def remove_listener(fn):
+    if fn in _listeners:
+        _listeners.remove(fn)
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def count_call(key, n=1):
+    """実行中の処理すべて（入れ子の外側も含む）にMaya呼び出しを加算"""
+    if not _enabled:
+        return
+    for frame in _stack():
+        frame["calls"][key] += n
+
+
+def profiled(name=None):
+    """
+    計測対象にするデコレータ（無効時は素通り）
+    名前の既定は "モジュール名.関数名"（メソッドは "モジュール名.クラス名.メソッド名"）
+    """
+    def _decorate(fn):
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def _wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            stack = _stack()
+            frame = {"name": label, "calls": Counter()}
+            stack.append(frame)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                stack.pop()
+                _finish(frame, seconds, outermost=not stack)
+        return _wrapper
+    return _decorate
+
+
+def _finish(frame, seconds, outermost):
+    global _last
+    record = {"name": frame["name"], "seconds": seconds, "calls": dict(frame["calls"]),
+              "total_calls": sum(frame["calls"].values())}
+    with _lock:
+        entry = _records.get(frame["name"])
+        if entry is None:
+            entry = _records[frame["name"]] = {"durations": deque(maxlen=HISTORY_SIZE), "count": 0,
+                                               "total": 0.0, "calls": Counter()}
+        entry["durations"].append(seconds)
+        entry["count"] += 1
+        entry["total"] += seconds
+        entry["calls"].update(frame["calls"])
+        if outermost:
+            _last = record
+    if outermost and threading.current_thread() is threading.main_thread():
+        for fn in list(_listeners):
+            fn(record)
+
+
+def last_operation():
+    """直近に終わった最外側の処理 {"name", "seconds", "calls", "total_calls"}（無ければNone）"""
+    return _last
+
+
+def histogram(durations):
+    """秒の配列 → BUCKETS_MS 区切りの件数リスト（len(BUCKETS_MS)+1 個）"""
+    ms = np.asarray(durations, dtype=np.float64) * 1000.0
+    return np.bincount(np.searchsorted(BUCKETS_MS, ms, side="right"),
+                       minlength=len(BUCKETS_MS) + 1).tolist()
+
+
+def stats():
+    """処理名 → 集計 {"count", "total", "mean", "p50", "p95", "max", "histogram", "calls"}（直近HISTORY_SIZE件で分位）"""
+    out = {}
+    with _lock:
+        for name, entry in _records.items():
+            d = np.asarray(entry["durations"], dtype=np.float64)
+            out[name] = {
+                "count": entry["count"],
+                "total": entry["total"],
+                "mean": entry["total"] / entry["count"],
+                "p50": float(np.percentile(d, 50)),
+                "p95": float(np.percentile(d, 95)),
+                "max": float(d.max()),
+                "histogram": histogram(d),
+                "calls": dict(entry["calls"]),
+            }
+    return out
+
+
+def format_last(record=None):
+    """ウィンドウ表示用の1行"""
+    record = record or _last
+    if not record:
+        return ""
+    top = sorted(record["calls"].items(), key=lambda kv: -kv[1])[:3]
+    detail = ", ".join(f"{k}×{v}" for k, v in top)
+    return (f"{record['name']}: {record['seconds'] * 1000:.1f}ms / Maya呼び出し {record['total_calls']}"
+            + (f" ({detail})" if detail else ""))
+
+
+def format_report():
+    labels = [f"<{b}ms" for b in BUCKETS_MS] + [f">={BUCKETS_MS[-1]}ms"]
+    lines = [f"{'operation':<44}{'count':>7}{'mean(ms)':>10}{'p50':>9}{'p95':>9}{'max':>9}  calls"]
+    for name, s in sorted(stats().items(), key=lambda kv: -kv[1]["total"]):
+        calls = ", ".join(f"{k}={v}" for k, v in sorted(s["calls"].items())) or "-"
+        lines.append(f"{name:<44}{s['count']:>7}{s['mean'] * 1000:>10.2f}{s['p50'] * 1000:>9.2f}"
+                     f"{s['p95'] * 1000:>9.2f}{s['max'] * 1000:>9.2f}  {calls}")
+        hist = "  ".join(f"{label}:{n}" for label, n in zip(labels, s["histogram"]) if n)
+        lines.append(f"{'':<44}{hist}")
+    return "\n".join(lines)
+
+
+def dump_report(path):
+    """セッションの集計をファイルへ（拡張子 .json ならJSON、それ以外は表形式テキスト）"""
+    with open(path, "w", encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            json.dump({"buckets_ms": list(BUCKETS_MS), "operations": stats(), "last": _last}, f, indent=2)
+        else:
+            f.write(format_report() + "\n")
+    return path
+
+
+if os.environ.get("POCHIPOCHI_PROFILE") == "1":
+    _enabled = True
@@ -0,0 +1,86 @@
+# PochiPochi_SkinWeight/core/scene_cache.py
+# mesh → skinCluster → influenceリスト の参照キャッシュ
+# commands/script_jobs.install_cache_invalidation() でヒストリ/接続/ノード削除の変化時に破棄される
+# （監視が入っていない間はキャッシュせず毎回問い合わせる）
+
+try:
+    from maya import cmds
+except ImportError:
+    # mayapy外（テスト/ベンチ）では監視なし扱い
+    cmds = None
+
+from .profiling import counting_cmds
+
+cmds = counting_cmds(cmds)
+
+_enabled = False
+_skin_by_mesh = {}
+_influences_by_skin = {}
+# メッシュの変更（頂点移動など）の監視を登録する関数 fn(mesh)。commands/script_jobs が設定
+_mesh_watcher = None
+_watched_meshes = set()
+
+
+def set_enabled(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+    _watched_meshes.clear()
+    invalidate()
+
+
+def is_enabled():
+    return _enabled
+
+
+def set_mesh_watcher(fn):
+    global _mesh_watcher
+    _mesh_watcher = fn
+    _watched_meshes.clear()
+
+
+def clear_mesh_watches():
+    """監視登録の記録を破棄（監視側でコールバックを外したとき）"""
+    _watched_meshes.clear()
+
+
+def watch_mesh(mesh):
+    """
+    監視中ならメッシュの変更監視を登録（登録済みなら何もしない）
+    Trueなら以後のメッシュの変更は監視側がキャッシュ破棄で知らせるので、座標を読まずにキャッシュを信用してよい
+    """
+    if not _enabled or _mesh_watcher is None:
+        return False
+    if mesh not in _watched_meshes:
+        try:
+            _mesh_watcher(mesh)
+        except Exception:
+            return False
+        _watched_meshes.add(mesh)
+    return True
+
+
+def invalidate(*args):
+    """キャッシュを全て破棄（コールバックから呼ばれるので引数は無視）"""
+    _skin_by_mesh.clear()
+    _influences_by_skin.clear()
+
+
+def find_related_skin_cluster(mesh):
+    """メッシュノード名からskinCluster名を返す"""
+    if _enabled and mesh in _skin_by_mesh:
+        return _skin_by_mesh[mesh]
+    skins = cmds.ls(cmds.listHistory(mesh), type='skinCluster')
+    skin = skins[0] if skins else None
+    if _enabled:
+        _skin_by_mesh[mesh] = skin
+    return skin
+
+
+def get_skin_influences(skin):
+    """skinClusterのinfluenceジョイントリスト（呼び出し側で書き換えないこと）"""
+    if _enabled and skin in _influences_by_skin:
+        return _influences_by_skin[skin]
+    infs = cmds.skinCluster(skin, query=True, influence=True) or []
+    if _enabled:
+        _influences_by_skin[skin] = infs
+    return infs
@@ -1 +1,127 @@
-# selection_ops.py - Pochi-Pochi_SkinWeight
+# PochiPochi_SkinWeight/core/selection_ops.py
+# 頂点選択の編集（拡大/縮小/外周リング/ウェイトで選択/ミラー選択）
+#   選択は頂点番号のint配列で扱い、隣接グラフ(adjacency)・ウェイト行列・対称マップの一括演算で求める
+#   シーンへの反映は連続範囲 "mesh.vtx[a:b]" にまとめた1回の cmds.select
+
+from maya import cmds
+import numpy as np
+
+from .skin_backend import get_backend, require_skin
+from .adjacency import get_mesh_graph
+from .skin_data import get_symmetry_map
+from .symmetry import SYMMETRY_TOLERANCE
+from .utils import split_vertex_components
+from .profiling import counting_cmds, profiled
+
+cmds = counting_cmds(cmds)
+
+
+# ==== 頂点番号配列の演算 ====
+def grow_vertices(graph, vertices, steps=1):
+    """隣接頂点を steps 回追加（昇順・重複なし）"""
+    result = np.unique(np.asarray(vertices, dtype=np.int64))
+    for _ in range(steps):
+        result = graph.ring(result)
+    return result
+
+
+def shrink_vertices(graph, vertices, steps=1):
+    """隣接が選択外の頂点（選択の縁）を steps 回取り除く"""
+    result = np.unique(np.asarray(vertices, dtype=np.int64))
+    for _ in range(steps):
+        if not result.size:
+            break
+        inside = np.zeros(graph.vertex_count, dtype=bool)
+        inside[result] = True
+        counts, nbrs = graph.neighbors(result)
+        outside = np.bincount(np.repeat(np.arange(result.size), counts), weights=~inside[nbrs],
+                              minlength=result.size)
+        result = result[outside == 0]
+    return result
+
+
+def ring_vertices(graph, vertices, steps=1):
+    """選択の外側 steps 段ぶんの帯（拡大した分だけ。元の選択は含まない）"""
+    vertices = np.unique(np.asarray(vertices, dtype=np.int64))
+    return np.setdiff1d(grow_vertices(graph, vertices, steps), vertices, assume_unique=True)
+
+
+def influenced_vertices(weights, column, threshold=0.01):
+    """ウェイト行列の column 列が threshold を超える頂点"""
+    return np.flatnonzero(np.asarray(weights)[:, column] > threshold)
+
+
+def mirror_vertices(mirror_map, vertices):
+    """対称マップで反対側の頂点へ（対応の無い頂点は除く）"""
+    mirrored = np.asarray(mirror_map)[np.asarray(vertices, dtype=np.int64)]
+    return np.unique(mirrored[mirrored >= 0])
+
+
+def vertex_ranges(mesh, vertices):
+    """頂点番号配列 → 連続範囲ごとの "mesh.vtx[a:b]" リスト"""
+    vertices = np.unique(np.asarray(vertices, dtype=np.int64))
+    if not vertices.size:
+        return []
+    breaks = np.flatnonzero(np.diff(vertices) != 1) + 1
+    starts = vertices[np.concatenate([[0], breaks])]
+    stops = vertices[np.concatenate([breaks - 1, [vertices.size - 1]])]
+    return [f"{mesh}.vtx[{a}]" if a == b else f"{mesh}.vtx[{a}:{b}]"
+            for a, b in zip(starts.tolist(), stops.tolist())]
+
+
+# ==== シーンの選択 ====
+def selected_vertices():
+    """現在の選択 → (mesh, 頂点番号配列)。flattenせず範囲表記のまま解釈"""
+    mesh, idx = split_vertex_components(cmds.ls(selection=True))
+    if mesh is None or not idx.size:
+        raise RuntimeError("頂点が選択されていません")
+    return mesh, np.unique(idx)
+
+
+def apply_selection(mesh, vertices, add=False):
+    """頂点番号配列を1回の cmds.select で選択（add=Trueなら追加）"""
+    ranges = vertex_ranges(mesh, vertices)
+    if ranges:
+        cmds.select(ranges, add=add, replace=not add)
+    elif not add:
+        cmds.select(clear=True)
+    return vertices
+
+
+@profiled()
+def grow_selection(steps=1, backend=None):
+    mesh, idx = selected_vertices()
+    return apply_selection(mesh, grow_vertices(get_mesh_graph(mesh, backend), idx, steps))
+
+
+@profiled()
+def shrink_selection(steps=1, backend=None):
+    mesh, idx = selected_vertices()
+    return apply_selection(mesh, shrink_vertices(get_mesh_graph(mesh, backend), idx, steps))
+
+
+@profiled()
+def ring_selection(steps=1, backend=None):
+    mesh, idx = selected_vertices()
+    return apply_selection(mesh, ring_vertices(get_mesh_graph(mesh, backend), idx, steps))
+
+
+@profiled()
+def select_influenced(mesh, joint, threshold=0.01, backend=None):
+    """joint のウェイトが threshold を超える頂点を選択（ウェイトは一括読み込み1回）"""
+    backend = backend or get_backend()
+    skin = require_skin(mesh, backend)
+    infs, weights = backend.read_weights(skin, mesh)
+    short = joint.split("|")[-1]
+    cols = [i for i, name in enumerate(infs) if name == joint or name.split("|")[-1] == short]
+    if not cols:
+        raise RuntimeError(f"インフルエンスではありません: {joint}")
+    return apply_selection(mesh, influenced_vertices(weights, cols[0], threshold))
+
+
+@profiled()
+def mirror_selection(axis="x", tolerance=SYMMETRY_TOLERANCE, add=False, backend=None):
+    """選択頂点の対称側を選択（add=Trueなら元の選択に追加）"""
+    mesh, idx = selected_vertices()
+    sym = get_symmetry_map(mesh, axis, tolerance, backend=backend)
+    return apply_selection(mesh, mirror_vertices(sym["map"], idx), add=add)
@@ -0,0 +1,252 @@
+# PochiPochi_SkinWeight/core/skin_backend.py
+
+import os
+
+import numpy as np
+
+from .weight_storage import WEIGHT_DTYPE
+from .profiling import count_call, counting_cmds
+
+try:
+    from maya import cmds
+    from maya.api import OpenMaya as om2
+    from maya.api import OpenMayaAnim as oma2
+except ImportError:
+    # mayapy外（テスト/ベンチ）ではMemorySkinBackendのみ使用可
+    cmds = om2 = oma2 = None
+
+cmds = counting_cmds(cmds)
+
+
+class MayaSkinBackend:
+    """
+    skinClusterのウェイトをOpenMaya 2.0で一括読み書きするバックエンド
+    ウェイトは (vertex_count × influence_count) のfloat32行列でやり取り
+    """
+    def _skin_fn(self, skin):
+        sel = om2.MSelectionList()
+        sel.add(skin)
+        return oma2.MFnSkinCluster(sel.getDependNode(0))
+
+    def _mesh_path(self, mesh):
+        sel = om2.MSelectionList()
+        sel.add(mesh)
+        path = sel.getDagPath(0)
+        if path.apiType() != om2.MFn.kMesh:
+            path.extendToShape()
+        return path
+
+    def _vertex_components(self, mesh, vertices=None):
+        comp_fn = om2.MFnSingleIndexedComponent()
+        comps = comp_fn.create(om2.MFn.kMeshVertComponent)
+        if vertices is None:
+            comp_fn.setCompleteData(self.vertex_count(mesh))
+        else:
+            comp_fn.addElements([int(v) for v in vertices])
+        return comps
+
+    def vertex_count(self, mesh):
+        count_call("om2.MFnMesh.numVertices")
+        return om2.MFnMesh(self._mesh_path(mesh)).numVertices
+
+    def find_skin(self, mesh):
+        """メッシュのskinCluster名（無ければNone）"""
+        from .scene_cache import find_related_skin_cluster
+        return find_related_skin_cluster(mesh)
+
+    def points(self, mesh):
+        """ワールド座標の頂点位置 (vertex_count × 3)。xformの1回呼び出しで一括取得"""
+        flat = cmds.xform(f"{mesh}.vtx[*]", query=True, worldSpace=True, translation=True) or []
+        return np.array(flat, dtype=np.float64).reshape(-1, 3)
+
+    def topology_counts(self, mesh):
+        """(頂点数, 面数, 面頂点数)。面構成を読まずに取れるのでキャッシュのキーに使う"""
+        count_call("om2.MFnMesh.numPolygons")
+        fn = om2.MFnMesh(self._mesh_path(mesh))
+        return fn.numVertices, fn.numPolygons, fn.numFaceVertices
+
+    def polygons(self, mesh):
+        """(面ごとの頂点数, 頂点番号の連結配列) をMFnMesh.getVertices 1回で取得"""
+        count_call("om2.MFnMesh.getVertices")
+        counts, connects = om2.MFnMesh(self._mesh_path(mesh)).getVertices()
+        return np.array(counts, dtype=np.int64), np.array(connects, dtype=np.int64)
+
+    def influences(self, skin):
+        count_call("om2.MFnSkinCluster.influenceObjects")
+        paths = self._skin_fn(skin).influenceObjects()
+        return [paths[i].partialPathName() for i in range(len(paths))]
+
+    def locked_influences(self, skin):
+        """
+        インフルエンスごとのロック状態(bool配列)。ジョイントの lockInfluenceWeights を参照
+        influenceObjects() のノードからAPIでプラグを直接読む（cmdsの問い合わせはしない）
+        """
+        count_call("om2.MFnDependencyNode.findPlug")
+        paths = self._skin_fn(skin).influenceObjects()
+        locked = np.zeros(len(paths), dtype=bool)
+        fn = om2.MFnDependencyNode()
+        for i in range(len(paths)):
+            fn.setObject(paths[i].node())
+            if fn.hasAttribute("liw"):
+                locked[i] = fn.findPlug("liw", False).asBool()
+        return locked
+
+    def read_weights(self, skin, mesh, vertices=None):
+        """(influence名リスト, ウェイト行列) をMFnSkinCluster.getWeights 1回で取得"""
+        fn = self._skin_fn(skin)
+        comps = self._vertex_components(mesh, vertices)
+        count_call("om2.MFnSkinCluster.getWeights")
+        weights, inf_count = fn.getWeights(self._mesh_path(mesh), comps)
+        matrix = np.array(weights, dtype=WEIGHT_DTYPE).reshape(-1, inf_count)
+        return self.influences(skin), matrix
+
+    def write_weights(self, skin, mesh, vertices, matrix):
+        """
+        頂点群の全influenceウェイトを1回のUndo可能コマンドで書き込み
+        （プラグインが使えなければsetAttrを1つのUndoチャンクにまとめて実行）
+        """
+        matrix = np.asarray(matrix, dtype=np.float64)
+        vertices = np.asarray(vertices, dtype=np.int64).ravel()
+        if _load_weight_command():
+            from ..commands import weight_command
+            weight_command.push_payload(skin, mesh, vertices, matrix)
+            getattr(cmds, weight_command.COMMAND_NAME)()
+            return
+        runs = _logical_runs(self.logical_indices(skin))
+        cmds.undoInfo(openChunk=True, chunkName="PochiPochiSetWeights")
+        try:
+            for v, row in zip(vertices.tolist(), matrix.tolist()):
+                for col, stop, logical in runs:
+                    size = stop - col
+                    cmds.setAttr(f"{skin}.weightList[{v}].weights[{logical}:{logical + size - 1}]",
+                                 *row[col:stop], size=size)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+
+    def logical_indices(self, skin):
+        """influenceObjects() 順の各インフルエンスの論理番号（weights[] / matrix[] の添字。削除で歯抜けになりうる）"""
+        fn = self._skin_fn(skin)
+        count_call("om2.MFnSkinCluster.indexForInfluenceObject")
+        paths = fn.influenceObjects()
+        return [fn.indexForInfluenceObject(paths[i]) for i in range(len(paths))]
+
+
+def _logical_runs(logical):
+    """
+    列ごとの論理番号 → 論理番号が連続する列のまとまり [(開始列, 終了列(含まない), 開始論理番号)]
+    （setAttr を範囲指定でまとめて呼ぶため）
+    """
+    runs = []
+    for col, idx in enumerate(logical):
+        if runs and runs[-1][1] == col and runs[-1][2] + (col - runs[-1][0]) == idx:
+            runs[-1][1] = col + 1
+        else:
+            runs.append([col, col + 1, idx])
+    return [tuple(r) for r in runs]
+
+
+_WEIGHT_COMMAND_PLUGIN = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "commands", "weight_command.py")
+
+
+def _load_weight_command():
+    """一括書き込みコマンドのプラグインを必要時に読み込む（成功でTrue）"""
+    if cmds is None:
+        return False
+    try:
+        if not cmds.pluginInfo(_WEIGHT_COMMAND_PLUGIN, query=True, loaded=True):
+            cmds.loadPlugin(_WEIGHT_COMMAND_PLUGIN, quiet=True)
+        return True
+    except Exception as e:
+        print(f"weight_commandプラグイン読み込み失敗: {e}")
+        return False
+
+
+class MemorySkinBackend:
+    """
+    Maya無しでテスト/ベンチマークするためのインメモリskinCluster
+    skins: {skin名: {"mesh":..., "influences":[...], "weights": ndarray}}
+    """
+    def __init__(self):
+        self.skins = {}
+        self.meshes = {}  # mesh名 → {"vertex_count":..., "points": ndarray}
+
+    def add_skin(self, skin, mesh, influences, weights, points=None, locked=None, polygons=None):
+        weights = np.array(weights, dtype=WEIGHT_DTYPE)
+        self.skins[skin] = {"mesh": mesh, "influences": list(influences), "weights": weights,
+                            "locked": np.zeros(len(influences), dtype=bool)}
+        if locked is not None:
+            self.set_locked(skin, locked)
+        self.add_mesh(mesh, points if points is not None else np.zeros((weights.shape[0], 3)), polygons)
+
+    def add_mesh(self, mesh, points, polygons=None):
+        """polygons: (面ごとの頂点数, 頂点番号の連結配列)"""
+        points = np.array(points, dtype=np.float64).reshape(-1, 3)
+        self.meshes[mesh] = {"vertex_count": len(points), "points": points, "polygons": polygons}
+
+    def vertex_count(self, mesh):
+        return self.meshes[mesh]["vertex_count"]
+
+    def find_skin(self, mesh):
+        for skin, info in self.skins.items():
+            if info["mesh"] == mesh:
+                return skin
+        return None
+
+    def points(self, mesh):
+        return self.meshes[mesh]["points"].copy()
+
+    def topology_counts(self, mesh):
+        polygons = self.meshes[mesh]["polygons"]
+        counts, connects = polygons if polygons is not None else ((), ())
+        return self.vertex_count(mesh), len(counts), len(connects)
+
+    def polygons(self, mesh):
+        """面情報なしで登録したメッシュは面0枚（点群）として扱う"""
+        polygons = self.meshes[mesh]["polygons"]
+        counts, connects = polygons if polygons is not None else ((), ())
+        return np.array(counts, dtype=np.int64), np.array(connects, dtype=np.int64)
+
+    def influences(self, skin):
+        return list(self.skins[skin]["influences"])
+
+    def set_locked(self, skin, locked):
+        """ロックするインフルエンス（名前のリスト）"""
+        infs = self.skins[skin]["influences"]
+        self.skins[skin]["locked"] = np.array([name in locked for name in infs], dtype=bool)
+
+    def locked_influences(self, skin):
+        return self.skins[skin]["locked"].copy()
+
+    def read_weights(self, skin, mesh, vertices=None):
+        weights = self.skins[skin]["weights"]
+        matrix = weights.copy() if vertices is None else weights[np.asarray(vertices, dtype=np.int64)]
+        return self.influences(skin), matrix
+
+    def write_weights(self, skin, mesh, vertices, matrix):
+        self.skins[skin]["weights"][np.asarray(vertices, dtype=np.int64)] = matrix
+
+
+_backend = None
+
+
+def get_backend():
+    """現在のバックエンド（未設定ならMaya）"""
+    global _backend
+    if _backend is None:
+        _backend = MayaSkinBackend()
+    return _backend
+
+
+def require_skin(mesh, backend=None):
+    """メッシュのskinCluster名（無ければRuntimeError）"""
+    skin = (backend or get_backend()).find_skin(mesh)
+    if not skin:
+        raise RuntimeError(f"skinClusterが見つかりません: {mesh}")
+    return skin
+
+
+def set_backend(backend):
+    """バックエンド差し替え（Noneで既定のMayaに戻す）"""
+    global _backend
+    _backend = backend
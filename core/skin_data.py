@@ -1,25 +1,30 @@
-import json
 import re
 from maya import cmds
 from ..core.skin_layer import SkinLayerManager  # 必要に合わせて正しいimportパスに
+from ..core.skin_backend import get_backend
+from ..core.scene_cache import find_related_skin_cluster
+from ..core import scene_cache
+from ..core.adjacency import get_topology_hash
+from ..core import weight_codec
+from ..core import symmetry
+from ..core.profiling import counting_cmds, profiled
+
+cmds = counting_cmds(cmds)
+
+# Trueでウェイトをfloat16に量子化して保存（シーンサイズ優先）
+QUANTIZE_FLOAT16 = False
 
 def safe_name(name):
     return re.sub(r'\W', '_', name)
 
-def find_related_skin_cluster(mesh):
-    skins = cmds.ls(cmds.listHistory(mesh), type='skinCluster')
-    return skins[0] if skins else None
-
-def get_all_weights_for_skin(skin, mesh):
-    vtx_count = cmds.polyEvaluate(mesh, vertex=True)
-    infs = cmds.skinCluster(skin, query=True, influence=True)
-    data = []
-    for i in range(vtx_count):
-        vtx = f'{mesh}.vtx[{i}]'
-        weights = cmds.skinPercent(skin, vtx, query=True, value=True)
-        data.append(weights)
-    return {"influences": infs, "weights": data}
+@profiled()
+def get_all_weights_for_skin(skin, mesh, backend=None):
+    """skinClusterの全頂点ウェイトを一括取得 → {"influences": [...], "weights": float32行列}"""
+    backend = backend or get_backend()
+    infs, weights = backend.read_weights(skin, mesh)
+    return {"influences": infs, "weights": weights}
 
+@profiled()
 def make_or_get_skin_data_node(skin):
     node_name = f"skinData_{safe_name(skin)}"
     exists = cmds.ls(node_name)
@@ -39,21 +44,21 @@ def make_or_get_skin_data_node(skin):
         cmds.addAttr(node, ln="baseWeights", dt="string")
         cmds.addAttr(node, ln="layerData", dt="string")
         cmds.addAttr(node, ln="addInfluence", dt="string")
+        _ensure_layer_attrs(node)
         mesh = cmds.listConnections(skin, type="mesh")
         mesh = mesh[0] if mesh else ""
         baseweight_dict = get_all_weights_for_skin(skin, mesh)
-        cmds.setAttr(f"{node}.baseWeights", json.dumps(baseweight_dict), type="string")
+        cmds.setAttr(f"{node}.baseWeights", weight_codec.dumps_skin_weights(
+            baseweight_dict["influences"], baseweight_dict["weights"], float16=QUANTIZE_FLOAT16
+        ), type="string")
         # ---- BaseレイヤデータをlayerDataに初期化 ----
         influences = baseweight_dict["influences"]
         vertex_count = len(baseweight_dict["weights"])
         mgr = SkinLayerManager(influences, vertex_count)
         layer = mgr.add_layer("Base")
-        # baseWeightから反映
-        for jidx, joint in enumerate(influences):
-            for vtx_i, weight_list in enumerate(baseweight_dict["weights"]):
-                layer["influences"][str(jidx)][vtx_i] = weight_list[jidx]
-        data = mgr.export_json()
-        cmds.setAttr(f"{node}.layerData", json.dumps(data), type="string")
+        # baseWeightから反映（行列で一括）
+        mgr.set_layer_weights(layer["id"], baseweight_dict["weights"])
+        write_layer_data(node, mgr)
 
     # skinCluster.message → skinData.skinCluster接続(1:N可)
     conns = cmds.listConnections(f"{node}.skinCluster", s=True, d=False) or []
@@ -68,4 +73,186 @@ def make_or_get_skin_data_node(skin):
 def find_skin_data_node(skin):
     node_name = f"skinData_{safe_name(skin)}"
     found = cmds.ls(node_name)
-    return found[0] if found else None
\ No newline at end of file
+    return found[0] if found else None
+
+@profiled()
+def read_base_weights(node):
+    """baseWeights → {"influences": [...], "weights": float32行列}（旧JSONも可）"""
+    text = cmds.getAttr(f"{node}.baseWeights")
+    return weight_codec.loads_skin_weights(text) if text else None
+
+@profiled()
+def read_layer_data(node):
+    """
+    レイヤ情報 → SkinLayerManager
+    layerHeader＋layerEntries（レイヤ単位）を優先し、無ければ旧layerData（一括文字列/旧JSON）から読む
+    """
+    header_text = _get_string_attr(node, "layerHeader")
+    if header_text:
+        header = weight_codec.loads_layer_header(header_text)
+        texts = _read_layer_entries(node)
+        layers = []
+        for entry in header["layers"]:
+            ly = dict(entry)
+            text = texts.get(entry["id"])
+            if text:
+                ly["weights"] = weight_codec.loads_layer_weights(text)
+            else:
+                print(f"レイヤ {entry.get('name')} のウェイトが見つかりません（空で読み込み）")
+            layers.append(ly)
+        mgr = SkinLayerManager(header["influences"], header["vertex_count"])
+        mgr.import_json({"influences": header["influences"], "vertex_count": header["vertex_count"],
+                         "layers": layers})
+        mgr.mark_clean()
+        return mgr
+    text = _get_string_attr(node, "layerData")
+    if not text:
+        return None
+    # 旧形式：次の保存で全レイヤをレイヤ単位の形式に移すため未保存のままにしておく
+    data = weight_codec.loads_layer_data(text)
+    mgr = SkinLayerManager(data.get("influences", []), data.get("vertex_count", 0))
+    mgr.import_json(data)
+    return mgr
+
+@profiled()
+def write_layer_data(node, manager):
+    """未保存の変更分だけ書き込み、layerRevisionを1つ進めて新しいリビジョンを返す"""
+    return write_encoded_layers(node, encode_layer_data(manager.export_dirty()))
+
+@profiled()
+def encode_layer_data(snapshot):
+    """
+    export_dirty()の結果 → {"header": 文字列 or None, "layers": {レイヤID: 文字列}}
+    cmdsを使わないのでワーカースレッドからも呼べる
+    """
+    header = snapshot["header"]
+    return {
+        "header": weight_codec.dumps_layer_header(header) if header is not None else None,
+        "layer_ids": [ly["id"] for ly in header["layers"]] if header is not None else None,
+        "layers": {lid: weight_codec.dumps_layer_weights(w, float16=QUANTIZE_FLOAT16)
+                   for lid, w in snapshot["layers"].items()},
+    }
+
+@profiled()
+def write_encoded_layers(node, encoded):
+    """
+    エンコード済みの変更分を書き込み、新しいリビジョンを返す（メインスレッド専用）
+    変更のあったレイヤのエントリだけsetAttrし、ヘッダ更新時は消えたレイヤのエントリを削除
+    """
+    _ensure_layer_attrs(node)
+    slots = _layer_entry_slots(node)
+    next_slot = max(slots.values()) + 1 if slots else 0
+    for lid, text in encoded["layers"].items():
+        slot = slots.get(lid)
+        if slot is None:
+            slot, next_slot = next_slot, next_slot + 1
+            slots[lid] = slot
+            cmds.setAttr(f"{node}.layerEntries[{slot}].layerEntryId", lid, type="string")
+        cmds.setAttr(f"{node}.layerEntries[{slot}].layerEntryWeights", text, type="string")
+    if encoded["header"] is not None:
+        alive = set(encoded["layer_ids"])
+        for lid, slot in slots.items():
+            if lid not in alive:
+                cmds.removeMultiInstance(f"{node}.layerEntries[{slot}]", b=True)
+        cmds.setAttr(f"{node}.layerHeader", encoded["header"], type="string")
+        # 旧一括形式は移行が済んだら空にする
+        if _get_string_attr(node, "layerData"):
+            cmds.setAttr(f"{node}.layerData", "", type="string")
+    return bump_layer_revision(node)
+
+def _get_string_attr(node, attr):
+    if not cmds.attributeQuery(attr, node=node, exists=True):
+        return None
+    return cmds.getAttr(f"{node}.{attr}")
+
+def _ensure_layer_attrs(node):
+    """レイヤ単位保存用の属性を必要時に追加（旧ノード対応）"""
+    if not cmds.attributeQuery("layerHeader", node=node, exists=True):
+        cmds.addAttr(node, ln="layerHeader", dt="string")
+    if not cmds.attributeQuery("layerEntries", node=node, exists=True):
+        cmds.addAttr(node, ln="layerEntries", at="compound", numberOfChildren=2, multi=True)
+        cmds.addAttr(node, ln="layerEntryId", dt="string", parent="layerEntries")
+        cmds.addAttr(node, ln="layerEntryWeights", dt="string", parent="layerEntries")
+
+def _layer_entry_slots(node):
+    """レイヤID → layerEntries の要素番号"""
+    if not cmds.attributeQuery("layerEntries", node=node, exists=True):
+        return {}
+    slots = {}
+    for i in cmds.getAttr(f"{node}.layerEntries", multiIndices=True) or []:
+        lid = cmds.getAttr(f"{node}.layerEntries[{i}].layerEntryId")
+        if lid:
+            slots[lid] = i
+    return slots
+
+def _read_layer_entries(node):
+    """レイヤID → ウェイト文字列"""
+    return {lid: cmds.getAttr(f"{node}.layerEntries[{slot}].layerEntryWeights")
+            for lid, slot in _layer_entry_slots(node).items()}
+
+def get_layer_revision(node):
+    """layerDataの更新カウンタ（属性のない旧ノードは0）"""
+    if not cmds.attributeQuery("layerRevision", node=node, exists=True):
+        return 0
+    return cmds.getAttr(f"{node}.layerRevision")
+
+def bump_layer_revision(node):
+    if not cmds.attributeQuery("layerRevision", node=node, exists=True):
+        cmds.addAttr(node, ln="layerRevision", at="long", dv=0)
+    rev = cmds.getAttr(f"{node}.layerRevision") + 1
+    cmds.setAttr(f"{node}.layerRevision", rev)
+    return rev
+
+# mesh → {"key": (頂点数, 面数, 面頂点数, axis, tolerance), "watched": 監視登録済みか, "sym": 対称マップ}
+#   同一セッション内ではノードの再デコードも省略
+_symmetry_cache = {}
+
+def invalidate_symmetry_cache(mesh=None, *args):
+    """キャッシュ破棄（mesh=Noneなら全て。コールバックから呼ばれるので残りの引数は無視）"""
+    if mesh is None:
+        _symmetry_cache.clear()
+    else:
+        _symmetry_cache.pop(mesh, None)
+
+@profiled()
+def get_symmetry_map(mesh, axis="x", tolerance=symmetry.SYMMETRY_TOLERANCE, skin=None, backend=None, points=None):
+    """
+    メッシュの対称頂点マップを取得
+    - 監視中(scene_cache有効)は件数のキーが同じなら座標を読まずに再利用（頂点移動などは監視側が破棄）
+    - それ以外は座標＋面構成のハッシュを比べ、skinDataノードに保存済みで一致すれば再利用してO(N)の対応付けを省略
+    points: 呼び出し側で読み込み済みの座標（渡せばここでは読み直さない）
+    """
+    backend = backend or get_backend()
+    key = tuple(int(n) for n in backend.topology_counts(mesh)) + (axis, tolerance)
+    cached = _symmetry_cache.get(mesh)
+    if cached and cached["key"] == key and cached["watched"] and scene_cache.is_enabled():
+        return cached["sym"]
+    # 座標を読む前に監視を登録（読んだ後の変更を取りこぼさない）
+    watched = scene_cache.watch_mesh(mesh)
+    if points is None:
+        points = backend.points(mesh)
+    topology = get_topology_hash(mesh, backend)
+    digest = symmetry.geometry_hash(points, axis, tolerance, topology)
+    if cached and cached["sym"]["hash"] == digest:
+        cached.update(key=key, watched=watched)
+        return cached["sym"]
+    skin = skin or find_related_skin_cluster(mesh)
+    node = find_skin_data_node(skin) if skin else None
+    sym = read_symmetry_map(node) if node else None
+    if not sym or sym["hash"] != digest:
+        sym = symmetry.compute_symmetry_map(points, axis, tolerance, topology)
+        if node:
+            write_symmetry_map(node, sym)
+    _symmetry_cache[mesh] = {"key": key, "watched": watched, "sym": sym}
+    return sym
+
+def read_symmetry_map(node):
+    if not cmds.attributeQuery("symmetryMap", node=node, exists=True):
+        return None
+    text = cmds.getAttr(f"{node}.symmetryMap")
+    return symmetry.loads_symmetry_map(text) if text else None
+
+def write_symmetry_map(node, sym):
+    if not cmds.attributeQuery("symmetryMap", node=node, exists=True):
+        cmds.addAttr(node, ln="symmetryMap", dt="string")
+    cmds.setAttr(f"{node}.symmetryMap", symmetry.dumps_symmetry_map(sym), type="string")
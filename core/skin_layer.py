@@ -2,91 +2,298 @@
 
 import uuid
 import copy
-import json
+
+import numpy as np
+
+from .weight_storage import DenseWeights, SparseWeights, make_weights
+from .profiling import profiled
+from .normalize import set_columns, add_columns
+from .adjacency import smooth_matrix
+from .layer_composite import composite_layers
 
 class SkinLayerManager:
     """
     Undo/Redoつきのレイヤ式スキンデータモデル
-    レイヤ編集履歴はすべて構造まるごと保存方式
+    各レイヤのウェイトは (vertex_count × influence_count) のfloat32行列(DenseWeights)、
+    またはほぼ空の補正レイヤ向けに非ゼロ要素のみ(SparseWeights)で保持
+    レイヤ編集履歴は差分(変更したレイヤ/インフルエンス/頂点範囲のみ)で保存
+    max_history_bytes を指定すると履歴の合計サイズを超えた分を古い順に破棄
     """
-    def __init__(self, influences, vertex_count):
+    def __init__(self, influences, vertex_count, max_history_bytes=None):
         self.influences = list(influences)  # [{ "path":..., ... }]
         self.vertex_count = vertex_count
         self.layers = []
-        self.undo_stack = []
+        self.undo_stack = []  # [{"label":..., "ops":[...], "nbytes":...}]
         self.redo_stack = []
-        self.push_undo()  # 初期状態積む
+        self.max_history_bytes = max_history_bytes
+        self.history_bytes = 0
+        self._listeners = []  # fn(vertices) 変更された頂点(Noneなら全頂点)を通知
+        # 未保存の変更（ヘッダ=レイヤ一覧/名前/表示/不透明度/順番、レイヤID=ウェイト）
+        self._dirty_header = True
+        self._dirty_layers = set()
+        self.locked_influences = set()  # 正規化時に値を変えないインフルエンス番号
+
+    # ==== 変更通知 ====
+    def add_listener(self, fn):
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def remove_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _notify(self, vertices):
+        for fn in list(self._listeners):
+            fn(vertices)
+
+    def _notify_ops(self, ops):
+        if not self._listeners:
+            return
+        for op in ops:
+            kind = op[0]
+            if kind == "weights":
+                self._notify(op[2])
+            elif kind == "meta":
+                if op[2] in ("enabled", "opacity"):
+                    ly = self.get_layer(op[1])
+                    if ly:
+                        self._notify(ly["weights"].nonzero_rows())
+            elif kind in ("insert", "remove"):
+                self._notify(op[2]["weights"].nonzero_rows())
+            else:
+                self._notify(None)
+
+    # ==== 保存用の変更追跡 ====
+    def _mark_ops_dirty(self, ops):
+        for op in ops:
+            kind = op[0]
+            if kind in ("weights", "storage"):
+                self._dirty_layers.add(op[1])
+            elif kind in ("insert", "remove"):
+                self._dirty_header = True
+                self._dirty_layers.add(op[2]["id"])
+            else:
+                self._dirty_header = True
+
+    def mark_layers_dirty(self, layer_ids=None, header=True):
+        """未保存扱いにする（layer_ids=Noneなら全レイヤ）"""
+        ids = [ly["id"] for ly in self.layers] if layer_ids is None else layer_ids
+        self._dirty_layers.update(ids)
+        self._dirty_header = self._dirty_header or header
+
+    def mark_clean(self):
+        self._dirty_header = False
+        self._dirty_layers.clear()
+
+    def is_dirty(self):
+        return self._dirty_header or bool(self._dirty_layers)
+
+    @profiled()
+    def export_dirty(self):
+        """
+        前回の保存以降に変わった分だけ出力して未保存フラグを下ろす
+        {"header": export_dataからweightsを除いたもの or None, "layers": {レイヤID: ウェイトのコピー}}
+        削除済みレイヤは layers に含めない（ヘッダに無いIDは保存側で消す）
+        """
+        header = None
+        if self._dirty_header:
+            header = {
+                "influences": copy.deepcopy(self.influences),
+                "vertex_count": self.vertex_count,
+                "layers": [{k: v for k, v in ly.items() if k != "weights"} for ly in self.layers],
+            }
+        layers = {}
+        for ly in self.layers:
+            if ly["id"] in self._dirty_layers:
+                layers[ly["id"]] = ly["weights"].copy()
+        self.mark_clean()
+        return {"header": header, "layers": layers}
 
     # ==== レイヤ基本 ====
-    def add_layer(self, name="New Layer"):
+    def add_layer(self, name="New Layer", sparse=True):
+        """レイヤ追加（sparse=Trueなら空の疎レイヤなので生成コストはほぼゼロ）"""
+        storage = SparseWeights if sparse else DenseWeights
         layer = {
             "id": str(uuid.uuid4()),
             "name": name,
             "enabled": True,
             "opacity": 1.0,
             "index": len(self.layers),
-            "influences": {str(i): [0.0]*self.vertex_count for i in range(len(self.influences))}
+            "weights": storage(self.vertex_count, len(self.influences))
         }
         self.layers.append(layer)
         self._reindex_layers()
-        self.push_undo()
+        self._record("add_layer", [("insert", layer["index"], layer)])
         return layer
 
     def delete_layer(self, layer_id):
         idx = self._find_layer_index(layer_id)
         if idx is not None:
-            del self.layers[idx]
+            layer = self.layers.pop(idx)
             self._reindex_layers()
-            self.push_undo()
+            self._record("delete_layer", [("remove", idx, layer)])
 
     def set_layer_enabled(self, layer_id, enabled):
-        ly = self.get_layer(layer_id)
-        if ly:
-            ly["enabled"] = bool(enabled)
-            self.push_undo()
+        self._set_meta(layer_id, "enabled", bool(enabled))
 
     def set_layer_opacity(self, layer_id, opacity):
-        ly = self.get_layer(layer_id)
-        if ly:
-            ly["opacity"] = float(opacity)
-            self.push_undo()
+        self._set_meta(layer_id, "opacity", float(opacity))
 
     def rename_layer(self, layer_id, name):
+        self._set_meta(layer_id, "name", str(name))
+
+    def _set_meta(self, layer_id, key, value):
         ly = self.get_layer(layer_id)
         if ly:
-            ly["name"] = str(name)
-            self.push_undo()
+            before = ly.get(key)
+            ly[key] = value
+            self._record(key, [("meta", layer_id, key, before, value)])
+
+    # ==== 履歴管理（差分方式） ====
+    # op:
+    #   ("weights", layer_id, verts, infs, before, after)  ウェイト部分行列
+    #   ("storage", layer_id, before, after)               ウェイト保持オブジェクト差し替え
+    #   ("meta", layer_id, key, before, after)             name/enabled/opacity
+    #   ("insert", index, layer) / ("remove", index, layer)
+    #   ("order", before_ids, after_ids)
+    def _record(self, label, ops):
+        self._mark_ops_dirty(ops)
+        self._notify_ops(ops)
+        nbytes = sum(self._op_nbytes(op) for op in ops)
+        self.undo_stack.append({"label": label, "ops": ops, "nbytes": nbytes})
+        self.history_bytes += nbytes
+        self.history_bytes -= sum(e["nbytes"] for e in self.redo_stack)
+        self.redo_stack.clear()
+        self._evict_history()
+
+    @staticmethod
+    def _op_nbytes(op):
+        size = 64
+        for item in op[1:]:
+            if isinstance(item, np.ndarray):
+                size += item.nbytes
+            elif hasattr(item, "nbytes"):
+                size += item.nbytes
+            elif isinstance(item, dict) and "weights" in item:
+                size += item["weights"].nbytes
+        return size
+
+    def _evict_history(self):
+        if self.max_history_bytes is None:
+            return
+        # 直前の1手は予算超過でも残す
+        while len(self.undo_stack) > 1 and self.history_bytes > self.max_history_bytes:
+            entry = self.undo_stack.pop(0)
+            self.history_bytes -= entry["nbytes"]
 
-    # ==== 履歴管理 ====
-    def push_undo(self):
-        state = self.export_json()
-        self.undo_stack.append(state)
+    def clear_history(self):
+        self.undo_stack.clear()
         self.redo_stack.clear()
+        self.history_bytes = 0
 
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    @profiled()
     def undo(self):
-        if len(self.undo_stack) > 1:
-            current = self.undo_stack.pop()
-            self.redo_stack.append(current)
-            prev = self.undo_stack[-1]
-            self.import_json(prev)
+        if self.undo_stack:
+            entry = self.undo_stack.pop()
+            for op in reversed(entry["ops"]):
+                self._apply_op(op, forward=False)
+            self._mark_ops_dirty(entry["ops"])
+            self._notify_ops(entry["ops"])
+            self.redo_stack.append(entry)
 
+    @profiled()
     def redo(self):
         if self.redo_stack:
-            state = self.redo_stack.pop()
-            self.import_json(state)
-            self.undo_stack.append(copy.deepcopy(state))
+            entry = self.redo_stack.pop()
+            for op in entry["ops"]:
+                self._apply_op(op, forward=True)
+            self._mark_ops_dirty(entry["ops"])
+            self._notify_ops(entry["ops"])
+            self.undo_stack.append(entry)
+
+    def _apply_op(self, op, forward):
+        kind = op[0]
+        if kind == "weights":
+            _, layer_id, verts, infs, before, after = op
+            self.get_layer(layer_id)["weights"].set(verts, infs, after if forward else before)
+        elif kind == "storage":
+            _, layer_id, before, after = op
+            self.get_layer(layer_id)["weights"] = after if forward else before
+        elif kind == "meta":
+            _, layer_id, key, before, after = op
+            self.get_layer(layer_id)[key] = after if forward else before
+        elif kind in ("insert", "remove"):
+            _, idx, layer = op
+            if (kind == "insert") == forward:
+                self.layers.insert(idx, layer)
+            else:
+                del self.layers[self._find_layer_index(layer["id"])]
+        elif kind == "order":
+            _, before_ids, after_ids = op
+            ids = after_ids if forward else before_ids
+            by_id = {ly["id"]: ly for ly in self.layers}
+            self.layers = [by_id[i] for i in ids]
+        self._reindex_layers()
 
     # ==== JSON入出力 ====
+    @profiled()
     def export_json(self):
-        return copy.deepcopy({
-            "influences": self.influences,
+        """JSON化可能なdictで出力（ウェイトは旧形式互換の influences 列リスト）"""
+        layers = []
+        for ly in self.layers:
+            entry = {k: v for k, v in ly.items() if k != "weights"}
+            entry["influences"] = ly["weights"].to_columns()
+            layers.append(entry)
+        return {
+            "influences": copy.deepcopy(self.influences),
             "vertex_count": self.vertex_count,
-            "layers": self.layers
-        })
+            "layers": layers
+        }
+
+    @profiled()
+    def export_data(self):
+        """export_jsonと同じ構造で、ウェイトを保持形式(DenseWeights/SparseWeights)のコピーで出力（weight_codec用）"""
+        layers = []
+        for ly in self.layers:
+            entry = {k: v for k, v in ly.items() if k != "weights"}
+            entry["weights"] = ly["weights"].copy()
+            layers.append(entry)
+        return {
+            "influences": copy.deepcopy(self.influences),
+            "vertex_count": self.vertex_count,
+            "layers": layers
+        }
+
+    @profiled()
     def import_json(self, data):
+        """export_json / export_data どちらの形式も可（weightsがndarrayならコピーせず保持）"""
         self.influences = copy.deepcopy(data["influences"])
         self.vertex_count = data["vertex_count"]
-        self.layers = copy.deepcopy(data["layers"])
+        self.layers = [self._layer_from_json(ly) for ly in data["layers"]]
+        self.clear_history()
+        self.mark_layers_dirty()
+        self._notify(None)
+
+    def _layer_from_json(self, data):
+        layer = {k: copy.deepcopy(v) for k, v in data.items() if k not in ("influences", "weights")}
+        inf_count = len(self.influences)
+        if "weights" in data:
+            weights = data["weights"]
+            if isinstance(weights, (DenseWeights, SparseWeights)):
+                layer["weights"] = weights.copy()
+            else:
+                layer["weights"] = make_weights(np.asarray(weights).reshape(self.vertex_count, inf_count))
+        else:
+            # 旧形式: {str(joint_idx): [float]*vertex_count}
+            dense = DenseWeights.from_columns(data.get("influences", {}), self.vertex_count, inf_count)
+            layer["weights"] = make_weights(dense.data)
+        return layer
 
     # ==== Layer情報 ====
     def _reindex_layers(self):
@@ -116,43 +323,151 @@ class SkinLayerManager:
     def get_enabled_layers(self):
         return [ly for ly in self.list_layers() if ly.get("enabled", True)]
 
+    def influence_names(self):
+        return [inf["path"] if isinstance(inf, dict) else str(inf) for inf in self.influences]
+
+    def influence_index(self, name):
+        """ジョイント名 → インフルエンス番号（見つからなければNone）"""
+        names = self.influence_names()
+        if name in names:
+            return names.index(name)
+        # フルパス/短縮名どちらでも引けるように
+        short = name.split("|")[-1]
+        for i, n in enumerate(names):
+            if n.split("|")[-1] == short:
+                return i
+        return None
+
     # ==== レイヤ編集 ====
     def set_weight(self, layer_id, joint_index, vertex_index, value):
-        ly = self.get_layer(layer_id)
-        if ly:
-            ly["influences"][str(joint_index)][vertex_index] = float(value)
-            self.push_undo()
+        self.set_weights(layer_id, [vertex_index], [joint_index], value)
 
     def add_weight(self, layer_id, joint_index, vertex_index, delta):
+        self.add_weights(layer_id, [vertex_index], [joint_index], delta)
+
+    @profiled()
+    def set_weights(self, layer_id, vertex_indices, influence_indices, values, normalize=False):
+        """
+        頂点配列 × インフルエンス(複数可)へ一括で絶対値セット
+        values: スカラー / 頂点ごと(n,) / (n, k)。0〜1にクランプし履歴は1手
+        normalize=True なら残りをロックされていない他インフルエンスへ元の比率で配分
+        （このレイヤで空の行は下のレイヤの合成結果を元にする。配分先が無い行も値は入れる。合計1への正規化はレイヤ合成時）
+        """
+        ly = self.get_layer(layer_id)
+        if not ly:
+            return
+        verts, infs = self._batch_indices(vertex_indices, influence_indices)
+        block = self._broadcast_values(values, len(verts), len(infs))
+        if normalize:
+            rows = set_columns(self._seeded_rows(ly, verts), infs, block, self.locked_mask(), force=True)
+            self._write_block(ly, "set_weights", verts, self._all_influences(), rows)
+        else:
+            self._write_block(ly, "set_weights", verts, infs, np.clip(block, 0.0, 1.0))
+
+    @profiled()
+    def add_weights(self, layer_id, vertex_indices, influence_indices, deltas, normalize=False):
+        """頂点配列 × インフルエンスへ一括で相対加算（0〜1クランプ、履歴は1手。normalizeはset_weightsと同じ）"""
+        ly = self.get_layer(layer_id)
+        if not ly:
+            return
+        verts, infs = self._batch_indices(vertex_indices, influence_indices)
+        block = self._broadcast_values(deltas, len(verts), len(infs))
+        if normalize:
+            rows = add_columns(self._seeded_rows(ly, verts), infs, block, self.locked_mask(), force=True)
+            self._write_block(ly, "add_weights", verts, self._all_influences(), rows)
+            return
+        current = ly["weights"].get(verts, infs)
+        self._write_block(ly, "add_weights", verts, infs, np.clip(current + block, 0.0, 1.0))
+
+    @profiled()
+    def smooth_weights(self, layer_id, graph, vertex_indices=None, strength=0.5, iterations=1):
+        """隣接グラフ(VertexGraph)でレイヤのウェイトをスムース（vertex_indices=Noneなら全頂点、ロック列は固定、履歴は1手）"""
+        ly = self.get_layer(layer_id)
+        if not ly:
+            return
+        if vertex_indices is None:
+            verts, region = np.arange(self.vertex_count, dtype=np.int64), None
+            block = ly["weights"].to_dense()
+        else:
+            verts = np.unique(np.asarray(vertex_indices, dtype=np.int64))
+            region = graph.ring(verts)
+            block = ly["weights"].get(region, None)
+        new = smooth_matrix(block, graph, verts, strength, iterations, self.locked_mask(), region)
+        rows = verts if region is None else np.searchsorted(region, verts)
+        self._write_block(ly, "smooth_weights", verts, self._all_influences(), new[rows])
+
+    # ==== インフルエンスのロック ====
+    def set_influence_locked(self, influence_index, locked=True):
+        if locked:
+            self.locked_influences.add(int(influence_index))
+        else:
+            self.locked_influences.discard(int(influence_index))
+
+    def locked_mask(self):
+        mask = np.zeros(len(self.influences), dtype=bool)
+        mask[list(self.locked_influences)] = True
+        return mask
+
+    def _all_influences(self):
+        return np.arange(len(self.influences), dtype=np.int64)
+
+    @staticmethod
+    def _batch_indices(vertex_indices, influence_indices):
+        verts = np.atleast_1d(np.asarray(vertex_indices, dtype=np.int64)).ravel()
+        infs = np.atleast_1d(np.asarray(influence_indices, dtype=np.int64)).ravel()
+        return verts, infs
+
+    @staticmethod
+    def _broadcast_values(values, n, k):
+        arr = np.asarray(values, dtype=np.float32)
+        if arr.ndim == 1 and arr.shape[0] == n:
+            arr = arr[:, None]
+        try:
+            return np.broadcast_to(arr, (n, k))
+        except ValueError:
+            raise ValueError(f"values shape {arr.shape} does not match ({n}, {k})")
+
+    def _seeded_rows(self, ly, verts):
+        """
+        レイヤの行（全インフルエンス分）。このレイヤに値の無い行は下の有効レイヤの合成結果で埋める
+        合成は行の置き換えなので、部分的な値だけ書くと他インフルエンスが0になるのを防ぐ
+        """
+        rows = ly["weights"].get(verts, None)
+        empty = ~rows.any(axis=1)
+        if empty.any():
+            below = [other for other in self.get_enabled_layers() if other["index"] < ly["index"]]
+            if below:
+                rows[empty] = composite_layers(below, self.vertex_count, len(self.influences), rows=verts[empty])
+        return rows
+
+    def _write_block(self, ly, label, verts, infs, values):
+        """部分行列を書き込み、変更前後の差分だけ履歴に積む"""
+        w = ly["weights"]
+        before = w.get(verts, infs)
+        w.set(verts, infs, values)
+        after = w.get(verts, infs)
+        self._record(label, [("weights", ly["id"], verts, infs, before, after)])
+
+    def get_layer_weights(self, layer_id):
+        """レイヤのウェイト行列(vertex_count × influence_count)のコピーを返す"""
+        ly = self.get_layer(layer_id)
+        return ly["weights"].to_dense() if ly else None
+
+    @profiled()
+    def set_layer_weights(self, layer_id, matrix):
+        """レイヤのウェイト行列を丸ごと置き換え"""
         ly = self.get_layer(layer_id)
         if ly:
-            ly["influences"][str(joint_index)][vertex_index] += float(delta)
-            self.push_undo()
+            before = ly["weights"]
+            ly["weights"] = make_weights(np.array(matrix).reshape(self.vertex_count, len(self.influences)))
+            self._record("set_layer_weights", [("storage", layer_id, before, ly["weights"])])
 
     # ==== (option) Layer順移動 ====
     def move_layer(self, layer_id, to_index):
         idx = self._find_layer_index(layer_id)
         if idx is not None and 0 <= to_index < len(self.layers):
+            before_ids = [l["id"] for l in self.layers]
             ly = self.layers.pop(idx)
             self.layers.insert(to_index, ly)
             self._reindex_layers()
-            self.push_undo()
-
-if __name__ == "__main__":
-    # サンプルテスト
-    influences = [{"path": "JNT1", "index": 0}, {"path": "JNT2", "index": 1}]
-    mgr = SkinLayerManager(influences, 3)
-    l1 = mgr.add_layer("Base")
-    mgr.set_layer_opacity(l1["id"], 0.7)
-    l2 = mgr.add_layer("Temp")
-    mgr.set_layer_enabled(l2["id"], False)
-    mgr.rename_layer(l2["id"], "MASK")
-    print("\n--- export1 ---")
-    print(json.dumps(mgr.export_json(), indent=2))
-    mgr.set_weight(l1["id"], 0, 1, 0.55)
-    print("\n--- export2 ---")
-    print(json.dumps(mgr.export_json(), indent=2))
-    mgr.undo()
-    print("\n--- undo ---\n", json.dumps(mgr.export_json(), indent=2))
-    mgr.redo()
-    print("\n--- redo ---\n", json.dumps(mgr.export_json(), indent=2))
\ No newline at end of file
+            self._record("move_layer", [("order", before_ids, [l["id"] for l in self.layers])])
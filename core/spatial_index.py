@@ -0,0 +1,91 @@
+# PochiPochi_SkinWeight/core/spatial_index.py
+
+import hashlib
+
+import numpy as np
+
+
+# 27近傍セル（自セル含む）
+_OFFSETS = np.array([(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1)], dtype=np.int64)
+# セル座標 → 通し番号の計算が int64 に収まるグリッドのセル数上限（超えたらセル座標の組そのものを引く）
+_MAX_LINEAR_CELLS = 2 ** 62
+
+
+def _cell_rows(cells):
+    """セル座標 (n×3 int64) → 1行を1要素とするvoid配列（比較・ソート・searchsorted用）"""
+    cells = np.ascontiguousarray(cells, dtype=np.int64)
+    return cells.view(np.dtype((np.void, cells.dtype.itemsize * 3))).ravel()
+
+
+class PointGrid:
+    """
+    ハッシュグリッド（セル幅 = 許容距離）による最近傍頂点検索
+    構築・検索ともnumpyで一括処理。許容距離内に点がなければ -1
+    """
+    def __init__(self, points, cell_size):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.cell_size = float(cell_size)
+        cells = np.floor(self.points / self.cell_size).astype(np.int64)
+        # 近傍セル分の余白を取ったグリッド範囲でセル座標 → 通し番号
+        self._origin = cells.min(axis=0) - 1 if len(cells) else np.zeros(3, dtype=np.int64)
+        self._dims = (cells.max(axis=0) + 2 - self._origin) if len(cells) else np.ones(3, dtype=np.int64)
+        # 点が遠く離れていて通し番号が溢れる範囲なら、使われているセルだけに番号を振る
+        self._linear = float(np.prod(self._dims.astype(np.float64))) < _MAX_LINEAR_CELLS
+        self._cells = None if self._linear else np.unique(_cell_rows(cells))
+        keys = self._cell_keys(cells)
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cell_keys(self, cells):
+        """セル座標 → 整数キー（グリッドに点の無いセルは -1 になることがある）"""
+        if self._linear:
+            c = cells - self._origin
+            return (c[:, 0] * self._dims[1] + c[:, 1]) * self._dims[2] + c[:, 2]
+        rows = _cell_rows(cells)
+        pos = np.minimum(np.searchsorted(self._cells, rows), len(self._cells) - 1)
+        return np.where(self._cells[pos] == rows, pos, -1)
+
+    def query(self, targets, tolerance=None):
+        """
+        targets(n×3)それぞれの最近傍点 → (頂点番号配列, 距離配列)
+        tolerance はセル幅以下であること（省略時はセル幅）
+        """
+        tol = self.cell_size if tolerance is None else min(float(tolerance), self.cell_size)
+        targets = np.asarray(targets, dtype=np.float64).reshape(-1, 3)
+        best = np.full(len(targets), -1, dtype=np.int64)
+        best_d2 = np.full(len(targets), np.inf)
+        if not len(self.points) or not len(targets):
+            return best, np.sqrt(best_d2)
+        cells = np.floor(targets / self.cell_size).astype(np.int64)
+        lo_bound = self._origin
+        hi_bound = self._origin + self._dims - 1
+        for off in _OFFSETS:
+            nb = cells + off
+            inside = np.all((nb >= lo_bound) & (nb <= hi_bound), axis=1)
+            if not inside.any():
+                continue
+            rows = np.flatnonzero(inside)
+            keys = self._cell_keys(nb[rows])
+            lo = np.searchsorted(self._keys, keys, side="left")
+            hi = np.searchsorted(self._keys, keys, side="right")
+            span = hi - lo
+            for k in range(int(span.max()) if span.size else 0):
+                has = span > k
+                r = rows[has]
+                cand = self._order[lo[has] + k]
+                d2 = np.sum((self.points[cand] - targets[r]) ** 2, axis=1)
+                better = d2 < best_d2[r]
+                best[r[better]] = cand[better]
+                best_d2[r[better]] = d2[better]
+        miss = best_d2 > tol * tol
+        best[miss] = -1
+        return best, np.sqrt(best_d2)
+
+
+def points_hash(points):
+    """頂点座標のハッシュ（ジオメトリ変更検出用）"""
+    arr = np.ascontiguousarray(points, dtype=np.float64)
+    return hashlib.blake2b(arr.tobytes(), digest_size=16).hexdigest() + f":{len(arr)}"
@@ -0,0 +1,53 @@
+# PochiPochi_SkinWeight/core/symmetry.py
+
+import numpy as np
+
+from .spatial_index import PointGrid, points_hash
+from . import weight_codec
+
+AXES = {"x": 0, "y": 1, "z": 2}
+
+# 対称頂点検索の既定許容距離（座標の一致判定に使っていた 1e-4 と同じ）
+SYMMETRY_TOLERANCE = 1e-4
+
+
+def geometry_hash(points, axis="x", tolerance=SYMMETRY_TOLERANCE, topology=None):
+    """頂点数＋座標＋面構成(topology: adjacency.topology_hash)＋検索条件のハッシュ（変わったら対称マップを作り直す）"""
+    return f"{points_hash(points)}:{topology or '-'}:{axis}:{tolerance:g}"
+
+
+def compute_symmetry_map(points, axis="x", tolerance=SYMMETRY_TOLERANCE, topology=None):
+    """
+    全頂点 → 反対側の頂点番号 の対応表を一括計算
+    戻り値: {"axis", "tolerance", "hash", "map": int64配列(見つからなければ-1), "unmatched": 頂点番号配列}
+    軸上の頂点は自分自身に対応
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    grid = PointGrid(points, tolerance)
+    mirrored = points.copy()
+    mirrored[:, AXES[axis]] *= -1.0
+    mirror_map, _ = grid.query(mirrored, tolerance)
+    return {
+        "axis": axis,
+        "tolerance": tolerance,
+        "hash": geometry_hash(points, axis, tolerance, topology),
+        "map": mirror_map,
+        "unmatched": np.flatnonzero(mirror_map < 0),
+    }
+
+
+def dumps_symmetry_map(sym):
+    meta = {"kind": "symmetryMap", "axis": sym["axis"], "tolerance": sym["tolerance"], "hash": sym["hash"]}
+    return weight_codec.encode_payload(meta, {"map": sym["map"].astype(np.int32)})
+
+
+def loads_symmetry_map(text):
+    meta, arrays = weight_codec.decode_payload(text)
+    mirror_map = arrays["map"].astype(np.int64)
+    return {
+        "axis": meta["axis"],
+        "tolerance": meta["tolerance"],
+        "hash": meta["hash"],
+        "map": mirror_map,
+        "unmatched": np.flatnonzero(mirror_map < 0),
+    }
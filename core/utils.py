@@ -1 +1,30 @@
 # utils.py - Pochi-Pochi_SkinWeight
+
+import re
+
+import numpy as np
+
+_VTX_RE = re.compile(r"^(.*)\.vtx\[(\d+)(?::(\d+))?\]$")
+
+
+def split_vertex_components(components):
+    """
+    "mesh.vtx[3]" / "mesh.vtx[3:8]" 形式のリスト → (mesh名, 頂点番号int配列)
+    頂点以外のコンポーネントは無視。メッシュは先頭の頂点のものを採用
+    """
+    mesh = None
+    chunks = []
+    for comp in components or []:
+        m = _VTX_RE.match(comp)
+        if not m:
+            continue
+        name, start, end = m.group(1), int(m.group(2)), m.group(3)
+        if mesh is None:
+            mesh = name
+        elif name != mesh:
+            continue
+        stop = int(end) if end is not None else start
+        chunks.append(np.arange(start, stop + 1, dtype=np.int64))
+    if not chunks:
+        return mesh, np.zeros(0, dtype=np.int64)
+    return mesh, np.concatenate(chunks)
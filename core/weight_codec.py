@@ -0,0 +1,165 @@
+# PochiPochi_SkinWeight/core/weight_codec.py
+# skinDataノードの baseWeights / layerData 用のコンパクト文字列形式
+#
+#   "PPSW<version>:" + base64( zlib( header長(uint32 LE) + header(JSON) + 配列バイナリ… ) )
+#
+# header: {"meta": {...}, "arrays": {名前: {"dtype", "shape", "offset"}}}
+# ウェイト行列は非ゼロ要素のみ (行優先の通し番号の差分, 値) で保存し、値はfloat16量子化も可
+# 先頭が "{" の文字列は旧JSON形式として読み込む（保存時に新形式へ移行）
+
+import base64
+import json
+import struct
+import zlib
+
+import numpy as np
+
+from .weight_storage import WEIGHT_DTYPE, weights_from_keys
+
+FORMAT_VERSION = 1
+_PREFIX = "PPSW"
+
+
+def is_compact(text):
+    return bool(text) and text.startswith(_PREFIX)
+
+
+# ==== 汎用: meta + 配列 ⇔ 文字列 ====
+def encode_payload(meta, arrays, level=6):
+    table = {}
+    chunks = []
+    offset = 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        table[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        chunks.append(arr.tobytes())
+        offset += arr.nbytes
+    header = json.dumps({"meta": meta, "arrays": table}).encode("utf-8")
+    blob = struct.pack("<I", len(header)) + header + b"".join(chunks)
+    return f"{_PREFIX}{FORMAT_VERSION}:" + base64.b64encode(zlib.compress(blob, level)).decode("ascii")
+
+
+def decode_payload(text):
+    head, _, body = text.partition(":")
+    version = int(head[len(_PREFIX):])
+    if version > FORMAT_VERSION:
+        raise ValueError(f"unsupported skin weight format version: {version}")
+    blob = zlib.decompress(base64.b64decode(body))
+    (header_len,) = struct.unpack_from("<I", blob, 0)
+    header = json.loads(blob[4:4 + header_len].decode("utf-8"))
+    data_start = 4 + header_len
+    arrays = {}
+    for name, info in header["arrays"].items():
+        dtype = np.dtype(info["dtype"])
+        count = int(np.prod(info["shape"])) if info["shape"] else 1
+        start = data_start + info["offset"]
+        arrays[name] = np.frombuffer(blob, dtype=dtype, count=count, offset=start).reshape(info["shape"])
+    return header["meta"], arrays
+
+
+# ==== ウェイト行列（疎）====
+def encode_matrix(matrix, float16=False):
+    """
+    行列(ndarray / DenseWeights / SparseWeights) → (meta, {"index": 通し番号の差分, "values": 非ゼロ値})
+    """
+    kind = getattr(matrix, "kind", None)
+    if kind == "sparse":
+        shape, index, values = matrix.shape, matrix.keys, matrix.values
+    else:
+        matrix = np.asarray(matrix.data if kind == "dense" else matrix)
+        shape = matrix.shape
+        flat = matrix.ravel()
+        index = np.flatnonzero(flat)
+        values = flat[index]
+    values = values.astype(np.float16 if float16 else WEIGHT_DTYPE)
+    index_dtype = np.uint32 if shape[0] * shape[1] < 2 ** 32 else np.uint64
+    # 差分にしておくとzlibがよく効く
+    delta = np.diff(index, prepend=0).astype(index_dtype)
+    return {"shape": list(shape)}, {"index": delta, "values": values}
+
+
+def decode_matrix(meta, index, values):
+    shape = tuple(meta["shape"])
+    matrix = np.zeros(shape, dtype=WEIGHT_DTYPE)
+    flat_index = np.cumsum(index, dtype=np.int64)
+    matrix.reshape(-1)[flat_index] = values.astype(WEIGHT_DTYPE)
+    return matrix
+
+
+# ==== baseWeights ====
+def dumps_skin_weights(influences, weights, float16=False):
+    meta, arrays = encode_matrix(weights, float16=float16)
+    meta.update({"kind": "skinWeights", "influences": list(influences)})
+    return encode_payload(meta, arrays)
+
+
+def loads_skin_weights(text):
+    """baseWeights文字列 → {"influences": [...], "weights": float32行列}（旧JSON対応）"""
+    if not is_compact(text):
+        data = json.loads(text)
+        return {"influences": data["influences"],
+                "weights": np.array(data["weights"], dtype=WEIGHT_DTYPE).reshape(len(data["weights"]), -1)}
+    meta, arrays = decode_payload(text)
+    return {"influences": meta["influences"],
+            "weights": decode_matrix(meta, arrays["index"], arrays["values"])}
+
+
+# ==== layerData ====
+def dumps_layer_data(data, float16=False):
+    """SkinLayerManager.export_data() の結果 → 文字列"""
+    arrays = {}
+    layers = []
+    for i, ly in enumerate(data["layers"]):
+        matrix_meta, matrix_arrays = encode_matrix(ly["weights"], float16=float16)
+        entry = {k: v for k, v in ly.items() if k != "weights"}
+        entry["weights_shape"] = matrix_meta["shape"]
+        layers.append(entry)
+        arrays[f"layer{i}.index"] = matrix_arrays["index"]
+        arrays[f"layer{i}.values"] = matrix_arrays["values"]
+    meta = {"kind": "layerData", "influences": data["influences"],
+            "vertex_count": data["vertex_count"], "layers": layers}
+    return encode_payload(meta, arrays)
+
+
+def loads_layer_data(text):
+    """layerData文字列 → SkinLayerManager.import_json() に渡せるdict（旧JSON対応）"""
+    if not is_compact(text):
+        return json.loads(text)
+    meta, arrays = decode_payload(text)
+    layers = []
+    for i, entry in enumerate(meta["layers"]):
+        ly = {k: v for k, v in entry.items() if k != "weights_shape"}
+        # 非ゼロ率に応じて密/疎のまま復元（空に近いレイヤを密行列に展開しない）
+        rows, cols = entry["weights_shape"]
+        keys = np.cumsum(arrays[f"layer{i}.index"], dtype=np.int64)
+        ly["weights"] = weights_from_keys(rows, cols, keys, arrays[f"layer{i}.values"].astype(WEIGHT_DTYPE))
+        layers.append(ly)
+    return {"influences": meta["influences"], "vertex_count": meta["vertex_count"], "layers": layers}
+
+
+# ==== レイヤ単位の保存（ヘッダ＋レイヤごとのウェイト）====
+def dumps_layer_header(header):
+    """export_dirty()["header"] → 文字列（ウェイトを含まないので小さい）"""
+    meta = {"kind": "layerHeader", "influences": header["influences"],
+            "vertex_count": header["vertex_count"], "layers": header["layers"]}
+    return encode_payload(meta, {})
+
+
+def loads_layer_header(text):
+    meta, _ = decode_payload(text)
+    return {"influences": meta["influences"], "vertex_count": meta["vertex_count"], "layers": meta["layers"]}
+
+
+def dumps_layer_weights(weights, float16=False):
+    """1レイヤ分のウェイト(DenseWeights/SparseWeights/ndarray) → 文字列"""
+    meta, arrays = encode_matrix(weights, float16=float16)
+    meta["kind"] = "layerWeights"
+    return encode_payload(meta, arrays)
+
+
+def loads_layer_weights(text):
+    """1レイヤ分の文字列 → 非ゼロ率に応じたDenseWeights/SparseWeights"""
+    meta, arrays = decode_payload(text)
+    rows, cols = meta["shape"]
+    keys = np.cumsum(arrays["index"], dtype=np.int64)
+    return weights_from_keys(rows, cols, keys, arrays["values"].astype(WEIGHT_DTYPE))
@@ -0,0 +1,249 @@
+# PochiPochi_SkinWeight/core/weight_io.py
+# メッシュ/レイヤ単位のウェイトのファイル書き出し/読み込み（インフルエンスは名前で対応付け）
+#
+# バイナリ形式 (.ppsw, リトルエンディアン):
+#   magic    8 byte   b"PPSWBIN\0"
+#   version  uint32   FILE_VERSION
+#   hlen     uint32   header のバイト数
+#   header   JSON(UTF-8)
+#            {"vertex_count", "influence_count", "influences": [名前...], "storage": "dense" | "sparse",
+#             "nnz", "mesh", "arrays": {名前: {"dtype", "shape", "offset"}}}
+#   payload  各配列の先頭は DATA_ALIGN の倍数のファイル位置（offset はファイル先頭から）
+#            dense : "weights"  float32 (vertex_count × influence_count) 行優先
+#            sparse: CSR形式 "row_ptr" int64 (vertex_count+1) / "cols" uint32 (nnz) / "values" float32 (nnz)
+# 読み込みはファイルをmmapして必要な頂点範囲だけ参照する（テキストのパースなし）
+
+import json
+import mmap
+import struct
+
+import numpy as np
+
+from .skin_backend import get_backend, require_skin
+from .weight_storage import WEIGHT_DTYPE, SPARSE_DENSITY_LIMIT
+
+FILE_MAGIC = b"PPSWBIN\0"
+FILE_VERSION = 1
+DATA_ALIGN = 64
+
+
+def remap_influences(weights, source_names, target_names):
+    """
+    列を source_names 順 → target_names 順に並べ替えた行列
+    フルパス/短縮名どちらでも一致を取る。対応先の無い列はウェイトが全て0なら捨て、値があればエラー
+    """
+    lookup = {name: i for i, name in enumerate(target_names)}
+    short_lookup = {name.split("|")[-1]: i for i, name in enumerate(target_names)}
+    src_cols, dst_cols, missing = [], [], []
+    for i, name in enumerate(source_names):
+        j = lookup.get(name, short_lookup.get(name.split("|")[-1]))
+        if j is None:
+            if weights[:, i].any():
+                missing.append(name)
+        else:
+            src_cols.append(i)
+            dst_cols.append(j)
+    out = np.zeros((weights.shape[0], len(target_names)), dtype=WEIGHT_DTYPE)
+    if missing:
+        raise RuntimeError(f"インフルエンスが見つかりません: {', '.join(missing)}")
+    out[:, dst_cols] = weights[:, src_cols]
+    return out
+
+
+# ==== バイナリファイル ====
+def _csr_arrays(weights):
+    """行列(ndarray / DenseWeights / SparseWeights) → (row_ptr, cols, values)"""
+    kind = getattr(weights, "kind", None)
+    if kind == "sparse":
+        vertex_count, influence_count = weights.shape
+        rows, cols = np.divmod(weights.keys, influence_count)
+        values = weights.values
+    else:
+        matrix = np.asarray(weights.data if kind == "dense" else weights)
+        vertex_count = matrix.shape[0]
+        rows, cols = np.nonzero(matrix)
+        values = matrix[rows, cols]
+    row_ptr = np.searchsorted(rows, np.arange(vertex_count + 1)).astype(np.int64)
+    return row_ptr, cols.astype(np.uint32), values.astype(WEIGHT_DTYPE)
+
+
+def write_weight_file(path, influences, weights, mesh=None, storage=None):
+    """
+    ウェイト行列をバイナリ形式で書き出し
+    storage: "dense" / "sparse"（省略時は非ゼロ率で選択）
+    """
+    kind = getattr(weights, "kind", None)
+    if kind == "sparse":
+        vertex_count, influence_count = weights.shape
+        nnz = weights.nnz
+    else:
+        matrix = np.asarray(weights.data if kind == "dense" else weights, dtype=WEIGHT_DTYPE)
+        vertex_count, influence_count = matrix.shape
+        nnz = int(np.count_nonzero(matrix))
+    if len(influences) != influence_count:
+        raise ValueError(f"influence count mismatch: {len(influences)} != {influence_count}")
+    if storage is None:
+        storage = "sparse" if nnz < vertex_count * influence_count * SPARSE_DENSITY_LIMIT else "dense"
+    if storage == "sparse":
+        row_ptr, cols, values = _csr_arrays(weights)
+        arrays = {"row_ptr": row_ptr, "cols": cols, "values": values}
+    else:
+        dense = weights.to_dense() if kind == "sparse" else matrix
+        arrays = {"weights": np.ascontiguousarray(dense, dtype=WEIGHT_DTYPE)}
+
+    meta = {"vertex_count": int(vertex_count), "influence_count": int(influence_count),
+            "influences": list(influences), "storage": storage, "nnz": int(nnz), "mesh": mesh}
+    # offsetはヘッダ長に依存するので、桁が変わらなくなるまで組み直す
+    table = {}
+    while True:
+        header = json.dumps(dict(meta, arrays=table)).encode("utf-8")
+        offset = _align(len(FILE_MAGIC) + 8 + len(header))
+        new_table = {}
+        for name, arr in arrays.items():
+            new_table[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+            offset = _align(offset + arr.nbytes)
+        if new_table == table:
+            break
+        table = new_table
+
+    with open(path, "wb") as f:
+        f.write(FILE_MAGIC)
+        f.write(struct.pack("<II", FILE_VERSION, len(header)))
+        f.write(header)
+        for name, arr in arrays.items():
+            f.write(b"\0" * (table[name]["offset"] - f.tell()))
+            arr.tofile(f)
+    return {"path": path, "vertices": int(vertex_count), "influences": int(influence_count),
+            "storage": storage, "nnz": int(nnz)}
+
+
+def _align(n):
+    return (n + DATA_ALIGN - 1) // DATA_ALIGN * DATA_ALIGN
+
+
+class WeightFile:
+    """
+    バイナリウェイトファイルの読み込み（ファイル全体を1つのmmapで開き、各配列はそのビューなので開くだけならほぼコストなし）
+    close()（with文）で開いたmmapとファイルを閉じる
+    """
+    def __init__(self, path):
+        self.path = path
+        self.arrays = {}
+        self._file = open(path, "rb")
+        self._map = None
+        try:
+            magic = self._file.read(len(FILE_MAGIC))
+            if magic != FILE_MAGIC:
+                raise RuntimeError(f"ウェイトファイルではありません: {path}")
+            version, header_len = struct.unpack("<II", self._file.read(8))
+            if version > FILE_VERSION:
+                raise RuntimeError(f"未対応のウェイトファイルのバージョンです: {version}")
+            self.header = json.loads(self._file.read(header_len).decode("utf-8"))
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.close()
+            raise
+        self.influences = self.header["influences"]
+        self.vertex_count = self.header["vertex_count"]
+        self.storage = self.header["storage"]
+        self.arrays = {}
+        for name, info in self.header["arrays"].items():
+            shape = tuple(info["shape"])
+            if not int(np.prod(shape)):
+                self.arrays[name] = np.zeros(shape, dtype=np.dtype(info["dtype"]))
+                continue
+            self.arrays[name] = np.frombuffer(self._map, dtype=np.dtype(info["dtype"]), count=int(np.prod(shape)),
+                                              offset=info["offset"]).reshape(shape)
+
+    def _check_range(self, start, stop):
+        start = 0 if start is None else int(start)
+        stop = self.vertex_count if stop is None else int(stop)
+        if not 0 <= start <= stop <= self.vertex_count:
+            raise RuntimeError(f"頂点範囲が不正です: {start}-{stop} (頂点数 {self.vertex_count})")
+        return start, stop
+
+    def read_rows(self, start=None, stop=None):
+        """頂点範囲 [start, stop) のウェイト → float32行列 (stop-start × influence数)"""
+        start, stop = self._check_range(start, stop)
+        if self.storage == "dense":
+            return np.array(self.arrays["weights"][start:stop], dtype=WEIGHT_DTYPE)
+        row_ptr = np.asarray(self.arrays["row_ptr"][start:stop + 1])
+        lo, hi = int(row_ptr[0]), int(row_ptr[-1])
+        block = np.zeros((stop - start, len(self.influences)), dtype=WEIGHT_DTYPE)
+        rows = np.repeat(np.arange(stop - start), np.diff(row_ptr))
+        block[rows, self.arrays["cols"][lo:hi]] = self.arrays["values"][lo:hi]
+        return block
+
+    def close(self):
+        # 配列(mmapのビュー)を先に手放してから閉じる
+        self.arrays = {}
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_weight_file(path, vertex_range=None):
+    """ファイル → (influence名リスト, 頂点数, 指定範囲のfloat32行列)"""
+    start, stop = vertex_range or (None, None)
+    with WeightFile(path) as wf:
+        return list(wf.influences), wf.vertex_count, wf.read_rows(start, stop)
+
+
+# ==== メッシュ（skinCluster）====
+def export_weights(mesh, path, backend=None, storage=None):
+    """メッシュの全ウェイトをファイルへ（一括読み込み1回）"""
+    backend = backend or get_backend()
+    skin = require_skin(mesh, backend)
+    infs, weights = backend.read_weights(skin, mesh)
+    return write_weight_file(path, infs, weights, mesh=mesh, storage=storage)
+
+
+def import_weights(mesh, path, backend=None, vertex_range=None):
+    """
+    ファイルのウェイトをメッシュへ（インフルエンス名で列を対応付けて一括書き込み1回）
+    vertex_range=(start, stop) でその頂点範囲だけ読み込む。対応するインフルエンスが無い列にウェイトがあればエラー
+    """
+    backend = backend or get_backend()
+    skin = require_skin(mesh, backend)
+    infs, file_count, block = read_weight_file(path, vertex_range)
+    vertex_count = backend.vertex_count(mesh)
+    if file_count != vertex_count:
+        raise RuntimeError(f"頂点数が一致しません: ファイル {file_count} / メッシュ {vertex_count}")
+    matrix = remap_influences(block, infs, backend.influences(skin))
+    start = (vertex_range[0] or 0) if vertex_range else 0
+    vertices = np.arange(start, start + len(matrix))
+    if vertices.size:
+        backend.write_weights(skin, mesh, vertices, matrix)
+    return {"path": path, "vertices": int(vertices.size)}
+
+
+# ==== レイヤ（SkinLayerManager）====
+def export_layer(manager, layer_id, path, storage=None):
+    """レイヤのウェイトをファイルへ（疎レイヤはそのまま疎で書き出し）"""
+    ly = manager.get_layer(layer_id)
+    if not ly:
+        raise RuntimeError(f"レイヤが見つかりません: {layer_id}")
+    return write_weight_file(path, manager.influence_names(), ly["weights"], storage=storage)
+
+
+def import_layer(manager, layer_id, path, vertex_range=None):
+    """ファイルのウェイトをレイヤへ（名前で列を対応付け、履歴は1手）"""
+    if not manager.get_layer(layer_id):
+        raise RuntimeError(f"レイヤが見つかりません: {layer_id}")
+    infs, file_count, block = read_weight_file(path, vertex_range)
+    if file_count != manager.vertex_count:
+        raise RuntimeError(f"頂点数が一致しません: ファイル {file_count} / レイヤ {manager.vertex_count}")
+    matrix = remap_influences(block, infs, manager.influence_names())
+    start = (vertex_range[0] or 0) if vertex_range else 0
+    manager.set_weights(layer_id, np.arange(start, start + len(matrix)),
+                        np.arange(matrix.shape[1]), matrix)
+    return {"path": path, "vertices": int(len(matrix))}
@@ -1,37 +1,143 @@
+import numpy as np
 from maya import cmds
 
-def find_related_skin_cluster(mesh):
-    """メッシュノード名からskinCluster名を返す"""
-    skin_clusters = cmds.ls(cmds.listHistory(mesh), type='skinCluster')
-    if skin_clusters:
-        return skin_clusters[0]
-    return None
+from .skin_backend import get_backend, require_skin
+from .scene_cache import find_related_skin_cluster
+from .utils import split_vertex_components
+from .skin_data import get_symmetry_map
+from .symmetry import SYMMETRY_TOLERANCE
+from .mirror_ops import mirror_weights
+from .adjacency import get_mesh_graph, smooth_matrix
+from .normalize import set_columns, add_columns, normalize_rows, prune_matrix, influence_counts
+from .profiling import counting_cmds, profiled
 
-def set_weight(verts, joint, value):
-    """選択頂点群のjointのウェイトを絶対値にセット"""
-    if not verts:
-        raise RuntimeError("頂点が選択されていません")
-    mesh = verts[0].split('.')[0]
-    skin_cluster = find_related_skin_cluster(mesh)
-    if not skin_cluster:
-        raise RuntimeError("skinClusterが見つかりません")
-    value = max(0.0, min(value, 1.0))
-    for v in verts:
-        cmds.skinPercent(skin_cluster, v, transformValue=[(joint, value)])
+cmds = counting_cmds(cmds)
 
-def add_weight(verts, joint, delta):
+def _resolve_selection(verts):
+    """頂点リスト → (mesh, 頂点番号配列, skinCluster)"""
     if not verts:
         raise RuntimeError("頂点が選択されていません")
-    mesh = verts[0].split('.')[0]
+    mesh, idx = split_vertex_components(verts)
+    if not idx.size:
+        raise RuntimeError("頂点が選択されていません")
     skin_cluster = find_related_skin_cluster(mesh)
     if not skin_cluster:
         raise RuntimeError("skinClusterが見つかりません")
-    for v in verts:
-        val = cmds.skinPercent(skin_cluster, v, query=True, transform=joint)
-        new_val = max(0.0, min(val + delta, 1.0))
-        cmds.skinPercent(skin_cluster, v, transformValue=[(joint, new_val)])
+    return mesh, idx, skin_cluster
+
+def _influence_column(influences, joint):
+    short = joint.split("|")[-1]
+    for i, name in enumerate(influences):
+        if name == joint or name.split("|")[-1] == short:
+            return i
+    raise RuntimeError(f"インフルエンスではありません: {joint}")
+
+@profiled()
+def set_weight(verts, joint, value, backend=None):
+    """
+    選択頂点群のjointのウェイトを絶対値にセット（一括読み込み→一括書き込み）
+    残りはロックされていない他インフルエンスへ元の比率で配分
+    戻り値: {"changed": 書き込んだ頂点数, "skipped": 配分先が無く変更できなかった頂点数}
+    """
+    backend = backend or get_backend()
+    mesh, idx, skin_cluster = _resolve_selection(verts)
+    infs, weights = backend.read_weights(skin_cluster, mesh, idx)
+    col = _influence_column(infs, joint)
+    locked = backend.locked_influences(skin_cluster)
+    new, skipped = set_columns(weights, [col], value, locked, return_skipped=True)
+    return _write_edit(skin_cluster, mesh, idx, new, skipped, backend)
+
+@profiled()
+def add_weight(verts, joint, delta, backend=None):
+    """選択頂点群のjointのウェイトを相対増減（一括読み込み→一括書き込み。戻り値は set_weight と同じ）"""
+    backend = backend or get_backend()
+    mesh, idx, skin_cluster = _resolve_selection(verts)
+    infs, weights = backend.read_weights(skin_cluster, mesh, idx)
+    col = _influence_column(infs, joint)
+    locked = backend.locked_influences(skin_cluster)
+    new, skipped = add_columns(weights, [col], delta, locked, return_skipped=True)
+    return _write_edit(skin_cluster, mesh, idx, new, skipped, backend)
+
+def _write_edit(skin_cluster, mesh, idx, new, skipped, backend):
+    backend.write_weights(skin_cluster, mesh, idx, new)
+    return {"changed": int(idx.size - skipped.size), "skipped": int(skipped.size)}
+
+# ----- メッシュ全体の整理（バッチ処理用） -----
+def _write_changed_rows(skin, mesh, before, after, backend, vertices=None):
+    """値が変わった頂点だけ一括で書き込み、その頂点数を返す（vertices: 各行の頂点番号、None=全頂点）"""
+    changed = np.flatnonzero(np.any(np.abs(after - before) > 1e-6, axis=1))
+    if changed.size:
+        backend.write_weights(skin, mesh, changed if vertices is None else vertices[changed], after[changed])
+    return int(changed.size)
+
+@profiled()
+def normalize_weights(mesh, backend=None):
+    """全頂点のウェイト合計を1に揃える（ロック中のインフルエンスは固定、合計0の頂点はそのまま）"""
+    backend = backend or get_backend()
+    skin = require_skin(mesh, backend)
+    _, weights = backend.read_weights(skin, mesh)
+    new = normalize_rows(weights.copy(), backend.locked_influences(skin))
+    return {"changed": _write_changed_rows(skin, mesh, weights, new, backend)}
+
+@profiled()
+def prune_weights(mesh, threshold=0.01, max_influences=None, backend=None):
+    """
+    メッシュ全体のウェイトを整理（一括読み込み → 行列演算 → 変わった頂点だけ1回で書き込み）
+    threshold 未満を0にし、max_influences 指定時は頂点ごとに大きい順でその数まで残して正規化
+    戻り値: {"changed": 変わった頂点数, "vertices": 頂点数, "max_influences_before"/"after": 頂点あたり最大インフルエンス数}
+    """
+    backend = backend or get_backend()
+    skin = require_skin(mesh, backend)
+    _, weights = backend.read_weights(skin, mesh)
+    new = prune_matrix(weights, threshold, max_influences, backend.locked_influences(skin))
+    changed = _write_changed_rows(skin, mesh, weights, new, backend)
+    before, after = influence_counts(weights), influence_counts(new)
+    return {"changed": changed, "vertices": int(len(weights)),
+            "max_influences_before": int(before.max()) if before.size else 0,
+            "max_influences_after": int(after.max()) if after.size else 0}
+
+# ----- スムース -----
+@profiled()
+def smooth_weights(mesh, vertices=None, strength=0.5, iterations=1, backend=None):
+    """
+    隣接頂点の平均へ近づけるスムース（vertices=Noneならメッシュ全体）
+    対象頂点とその隣接だけを一括読み込みし、変わった頂点を1回で書き込み。ロック中のインフルエンスは固定
+    """
+    backend = backend or get_backend()
+    skin = require_skin(mesh, backend)
+    graph = get_mesh_graph(mesh, backend)
+    region = None if vertices is None else graph.ring(vertices)
+    _, weights = backend.read_weights(skin, mesh, region)
+    new = smooth_matrix(weights, graph, vertices, strength, iterations,
+                        backend.locked_influences(skin), region)
+    return {"changed": _write_changed_rows(skin, mesh, weights, new, backend, region)}
+
+# ----- レイヤ合成の書き戻し -----
+@profiled()
+def apply_layer_composite(mesh, compositor, vertices=None, backend=None):
+    """
+    LayerCompositor の合成結果を skinCluster へ書き戻す（再計算された頂点のうちレイヤが値を持つ頂点だけ）
+    vertices: 再計算が全頂点になったとき（初回など）に書き込む頂点（None=全頂点）
+    レイヤのインフルエンスは名前で skinCluster の列へ対応付ける
+    """
+    backend = backend or get_backend()
+    skin = require_skin(mesh, backend)
+    result = compositor.evaluate()
+    rows = compositor.last_updated
+    if rows is None:
+        rows = np.arange(len(result), dtype=np.int64) if vertices is None else np.unique(np.asarray(vertices, dtype=np.int64))
+    rows = rows[result[rows].any(axis=1)]
+    if not rows.size:
+        return {"changed": 0}
+    infs, weights = backend.read_weights(skin, mesh, rows)
+    new = np.zeros_like(weights)
+    for j, name in enumerate(compositor.manager.influence_names()):
+        if result[rows, j].any():
+            new[:, _influence_column(infs, name)] = result[rows, j]
+    return {"changed": _write_changed_rows(skin, mesh, weights, new, backend, rows)}
 
 # ----- コピー・ペースト機能 -----
+@profiled()
 def copy_weights():
     sel = cmds.ls(selection=True, flatten=True)
     if not sel:
@@ -50,68 +156,56 @@ def copy_weights():
         "weights": weights
     }
 
-def paste_weights(copied_dict):
+@profiled()
+def paste_weights(copied_dict, backend=None):
     if not copied_dict or "joints" not in copied_dict:
         raise RuntimeError("コピーされているウェイト情報がありません")
-    sel = cmds.ls(selection=True, flatten=True)
+    sel = cmds.ls(selection=True)
     if not sel:
         raise RuntimeError("上書き対象の頂点を選択してください")
-    mesh = copied_dict["mesh"]
-    skin = copied_dict["skin"]
-    joints = copied_dict["joints"]
-    weights = copied_dict["weights"]
-    for vtx in sel:
-        tv = list(zip(joints, weights))
-        cmds.skinPercent(skin, vtx, transformValue=tv)
+    backend = backend or get_backend()
+    mesh, idx, skin = _resolve_selection(sel)
+    infs = backend.influences(skin)
+    row = np.zeros(len(infs), dtype=np.float32)
+    for joint, w in zip(copied_dict["joints"], copied_dict["weights"]):
+        row[_influence_column(infs, joint)] = w
+    backend.write_weights(skin, mesh, idx, np.broadcast_to(row, (len(idx), len(infs))))
 
 # ----- ミラー・リフレクト機能 -----
-def paste_mirror_weights(copied_dict):
+@profiled()
+def paste_mirror_weights(copied_dict, tolerance=SYMMETRY_TOLERANCE, backend=None):
+    """選択頂点のX反転位置にある頂点へコピー済みウェイトを貼る（対称マップを引くだけ）"""
     if not copied_dict or "mesh" not in copied_dict:
         raise RuntimeError("コピー済みウェイト情報がありません")
+    backend = backend or get_backend()
     mesh = copied_dict["mesh"]
-    joints = copied_dict["joints"]
-    weights = copied_dict["weights"]
     # コピーされたときの「頂点座標」を利用
-    vtx_src = cmds.ls(selection=True, flatten=True)[0]
-    pos = cmds.pointPosition(vtx_src)
-    mesh = copied_dict["mesh"]
+    _, src_idx = split_vertex_components(cmds.ls(selection=True))
+    if not src_idx.size:
+        raise RuntimeError("頂点を選択してください")
     skin = find_related_skin_cluster(mesh)
-    mirror_pos = (-pos[0], pos[1], pos[2])
-    vtx_count = cmds.polyEvaluate(mesh, vertex=True)
-    tgt_idx = None
-    for i in range(vtx_count):
-        vtx_check = "%s.vtx[%d]" % (mesh, i)
-        pos_check = cmds.pointPosition(vtx_check)
-        if (abs(pos_check[0] - mirror_pos[0]) < 1e-4 and
-            abs(pos_check[1] - mirror_pos[1]) < 1e-4 and
-            abs(pos_check[2] - mirror_pos[2]) < 1e-4):
-            tgt_idx = i
-            break
-    if tgt_idx is not None:
-        tgt_vtx = "%s.vtx[%d]" % (mesh, tgt_idx)
-        tv = list(zip(joints, weights))
-        cmds.skinPercent(skin, tgt_vtx, transformValue=tv)
-    else:
+    sym = get_symmetry_map(mesh, "x", tolerance, skin=skin, backend=backend)
+    tgt_idx = sym["map"][src_idx[:1]]
+    if tgt_idx[0] < 0:
         raise RuntimeError("X反転位置の頂点が見つかりません")
+    infs = backend.influences(skin)
+    row = np.zeros((1, len(infs)), dtype=np.float32)
+    for joint, w in zip(copied_dict["joints"], copied_dict["weights"]):
+        row[0, _influence_column(infs, joint)] = w
+    backend.write_weights(skin, mesh, tgt_idx, row)
 
-def mirror_weights_x_pos2neg():
+def _selected_mesh():
     sel = cmds.ls(selection=True)
     if not sel:
         raise RuntimeError("ミラー対象メッシュを選択してください")
-    mesh = sel[0].split('.')[0]
-    skin = find_related_skin_cluster(mesh)
-    if not skin:
-        raise RuntimeError("skinClusterが見つかりません")
-    cmds.copySkinWeights(ss=skin, ds=skin, mirrorMode="YZ", surfaceAssociation="closestPoint", influenceAssociation="closestJoint")
+    return sel[0].split('.')[0]
 
-def mirror_weights_x_neg2pos():
-    sel = cmds.ls(selection=True)
-    if not sel:
-        raise RuntimeError("ミラー対象メッシュを選択してください")
-    mesh = sel[0].split('.')[0]
-    skin = find_related_skin_cluster(mesh)
-    if not skin:
-        raise RuntimeError("skinClusterが見つかりません")
-    cmds.copySkinWeights(ss=skin, ds=skin, mirrorMode="YZ", mirrorInverse=True,
-                         surfaceAssociation="closestPoint", influenceAssociation="closestJoint")
-    
\ No newline at end of file
+@profiled()
+def mirror_weights_x_pos2neg(backend=None):
+    """+X側のウェイトを-X側へミラー（対称マップ＋左右ジョイント名対応で一括）"""
+    return mirror_weights(_selected_mesh(), "x", positive_to_negative=True, backend=backend)
+
+@profiled()
+def mirror_weights_x_neg2pos(backend=None):
+    """-X側のウェイトを+X側へミラー"""
+    return mirror_weights(_selected_mesh(), "x", positive_to_negative=False, backend=backend)
@@ -0,0 +1,204 @@
+# PochiPochi_SkinWeight/core/weight_storage.py
+
+import numpy as np
+
+WEIGHT_DTYPE = np.float32
+
+
+def as_index_array(indices, size):
+    """頂点/インフルエンス番号 → int64配列 (Noneなら全範囲)"""
+    if indices is None:
+        return np.arange(size, dtype=np.int64)
+    arr = np.asarray(indices, dtype=np.int64).ravel()
+    if arr.size and (arr.min() < 0 or arr.max() >= size):
+        raise IndexError(f"index out of range (size={size})")
+    return arr
+
+
+class DenseWeights:
+    """
+    (vertex_count × influence_count) の連続float32行列でレイヤウェイトを保持
+    """
+    kind = "dense"
+
+    def __init__(self, vertex_count, influence_count, data=None):
+        self.vertex_count = int(vertex_count)
+        self.influence_count = int(influence_count)
+        if data is None:
+            self.data = np.zeros((self.vertex_count, self.influence_count), dtype=WEIGHT_DTYPE)
+        else:
+            data = np.ascontiguousarray(data, dtype=WEIGHT_DTYPE)
+            if data.shape != (self.vertex_count, self.influence_count):
+                raise ValueError(f"shape mismatch: {data.shape}")
+            self.data = data
+
+    @classmethod
+    def from_columns(cls, columns, vertex_count, influence_count):
+        """旧形式 {str(joint_idx): [float]*vertex_count} から生成"""
+        obj = cls(vertex_count, influence_count)
+        for key, values in columns.items():
+            obj.data[:, int(key)] = np.asarray(values, dtype=WEIGHT_DTYPE)
+        return obj
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def get(self, verts=None, infs=None):
+        v = as_index_array(verts, self.vertex_count)
+        i = as_index_array(infs, self.influence_count)
+        return self.data[np.ix_(v, i)]
+
+    def set(self, verts, infs, values):
+        v = as_index_array(verts, self.vertex_count)
+        i = as_index_array(infs, self.influence_count)
+        self.data[np.ix_(v, i)] = values
+
+    def rows(self, verts):
+        return self.data[as_index_array(verts, self.vertex_count)]
+
+    def nonzero_rows(self):
+        """1つでも非ゼロのウェイトを持つ頂点番号"""
+        return np.flatnonzero(self.data.any(axis=1))
+
+    def to_dense(self):
+        return self.data.copy()
+
+    def to_columns(self):
+        return {str(j): self.data[:, j].tolist() for j in range(self.influence_count)}
+
+    def copy(self):
+        return DenseWeights(self.vertex_count, self.influence_count, self.data.copy())
+
+    def masked_rows(self, verts=None):
+        """
+        ウェイトを持つ行だけ (位置, 行ブロック) で返す（合成用）
+        位置は verts 内の位置（verts=Noneなら頂点番号）
+        """
+        block = self.rows(verts)
+        mask = block.any(axis=1)
+        return np.flatnonzero(mask), block[mask]
+
+
+class SparseWeights:
+    """
+    非ゼロ要素だけを (行優先の通し番号 = vertex*influence_count + influence, 値) のソート済み配列で保持
+    ほとんど空の補正レイヤ用。読み書き・合成のコストは非ゼロ数に比例し、生成はほぼゼロコスト
+    """
+    kind = "sparse"
+
+    def __init__(self, vertex_count, influence_count, keys=None, values=None):
+        self.vertex_count = int(vertex_count)
+        self.influence_count = int(influence_count)
+        self.keys = np.zeros(0, dtype=np.int64) if keys is None else np.asarray(keys, dtype=np.int64)
+        self.values = np.zeros(0, dtype=WEIGHT_DTYPE) if values is None else np.asarray(values, dtype=WEIGHT_DTYPE)
+
+    @classmethod
+    def from_dense(cls, matrix):
+        matrix = np.asarray(matrix, dtype=WEIGHT_DTYPE)
+        flat = matrix.reshape(-1)
+        keys = np.flatnonzero(flat)
+        return cls(matrix.shape[0], matrix.shape[1], keys, flat[keys].copy())
+
+    @property
+    def shape(self):
+        return (self.vertex_count, self.influence_count)
+
+    @property
+    def nnz(self):
+        return self.keys.size
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + self.values.nbytes
+
+    def _block_keys(self, verts, infs):
+        v = as_index_array(verts, self.vertex_count)
+        i = as_index_array(infs, self.influence_count)
+        return (v[:, None] * self.influence_count + i[None, :]).reshape(-1), (v.size, i.size)
+
+    def _lookup(self, keys):
+        """keys の格納位置と存在マスク"""
+        pos = np.searchsorted(self.keys, keys)
+        if not self.keys.size:
+            return pos, np.zeros(keys.shape, dtype=bool)
+        posc = np.minimum(pos, self.keys.size - 1)
+        return posc, self.keys[posc] == keys
+
+    def get(self, verts=None, infs=None):
+        keys, shape = self._block_keys(verts, infs)
+        pos, hit = self._lookup(keys)
+        out = np.zeros(keys.size, dtype=WEIGHT_DTYPE)
+        out[hit] = self.values[pos[hit]]
+        return out.reshape(shape)
+
+    def set(self, verts, infs, values):
+        keys, shape = self._block_keys(verts, infs)
+        vals = np.broadcast_to(np.asarray(values, dtype=WEIGHT_DTYPE), shape).reshape(-1)
+        # 同じ要素への重複書き込みは後勝ち
+        keys, last = np.unique(keys[::-1], return_index=True)
+        vals = vals[::-1][last]
+        pos, hit = self._lookup(keys)
+        self.values[pos[hit]] = vals[hit]
+        new = ~hit & (vals != 0)
+        if new.any():
+            at = np.searchsorted(self.keys, keys[new])
+            self.keys = np.insert(self.keys, at, keys[new])
+            self.values = np.insert(self.values, at, vals[new])
+        if (vals[hit] == 0).any():
+            keep = self.values != 0
+            self.keys = self.keys[keep]
+            self.values = self.values[keep]
+
+    def rows(self, verts):
+        if verts is None:
+            return self.to_dense()
+        return self.get(verts, None)
+
+    def nonzero_rows(self):
+        return np.unique(self.keys // self.influence_count)
+
+    def masked_rows(self, verts=None):
+        nz = self.nonzero_rows()
+        if verts is None:
+            return nz, self.get(nz, None)
+        verts = as_index_array(verts, self.vertex_count)
+        pos = np.flatnonzero(np.isin(verts, nz))
+        return pos, self.get(verts[pos], None)
+
+    def to_dense(self):
+        out = np.zeros(self.shape, dtype=WEIGHT_DTYPE)
+        out.reshape(-1)[self.keys] = self.values
+        return out
+
+    def to_columns(self):
+        return DenseWeights(self.vertex_count, self.influence_count, self.to_dense()).to_columns()
+
+    def copy(self):
+        return SparseWeights(self.vertex_count, self.influence_count, self.keys.copy(), self.values.copy())
+
+
+# 非ゼロ率がこれ未満なら疎形式で保持（疎は1要素12byte、密は4byte）
+SPARSE_DENSITY_LIMIT = 0.25
+
+
+def make_weights(matrix):
+    """行列の非ゼロ率に応じて DenseWeights / SparseWeights を選んで生成"""
+    matrix = np.asarray(matrix, dtype=WEIGHT_DTYPE)
+    if matrix.size and np.count_nonzero(matrix) < matrix.size * SPARSE_DENSITY_LIMIT:
+        return SparseWeights.from_dense(matrix)
+    return DenseWeights(matrix.shape[0], matrix.shape[1], matrix)
+
+
+def weights_from_keys(vertex_count, influence_count, keys, values):
+    """(通し番号, 値) から生成（非ゼロ率に応じて密/疎を選択）"""
+    size = vertex_count * influence_count
+    if size and len(keys) < size * SPARSE_DENSITY_LIMIT:
+        return SparseWeights(vertex_count, influence_count, np.array(keys, dtype=np.int64), np.array(values))
+    dense = DenseWeights(vertex_count, influence_count)
+    dense.data.reshape(-1)[np.asarray(keys, dtype=np.int64)] = values
+    return dense
@@ -0,0 +1,2 @@
+# tests/benchmarks - Pochi-Pochi_SkinWeight
+# スタブmaya.cmds上でのコア処理ベンチマーク（python -m tests.benchmarks.run）
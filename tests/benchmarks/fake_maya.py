@@ -0,0 +1,172 @@
+# fake_maya.py - Pochi-Pochi_SkinWeight
+# maya.cmds のスタブ（呼び出し回数を数える）と合成メッシュ
+#   Maya無しでweight_ops/skin_data等のシーン依存処理をテスト/ベンチマークするためのもの
+
+import os
+import re
+import sys
+import types
+from collections import Counter
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PACKAGE = "PochiPochi_SkinWeight"
+
+INFLUENCES = ["root", "spine", "neck", "head", "L_arm", "R_arm", "L_leg", "R_leg"]
+
+_VTX_RE = re.compile(r"^(.*)\.vtx\[(\d+)\]$")
+
+
+def register_package():
+    """パッケージ直下の__init__.py(Qt/UI)を通さずにcoreを読めるようにする"""
+    if PACKAGE not in sys.modules:
+        pkg = types.ModuleType(PACKAGE)
+        pkg.__path__ = [ROOT]
+        sys.modules[PACKAGE] = pkg
+
+
+def install(cmds):
+    """sys.modules の maya / maya.cmds を差し替え、読み込み済みのcoreモジュールを破棄"""
+    register_package()
+    maya = types.ModuleType("maya")
+    maya.cmds = cmds
+    sys.modules["maya"] = maya
+    sys.modules["maya.cmds"] = cmds
+    for name in list(sys.modules):
+        if name.startswith(PACKAGE + ".core."):
+            del sys.modules[name]
+
+
+def make_mesh(vertex_count, influence_count=len(INFLUENCES), per_vertex=4, seed=0):
+    """
+    X軸対称な合成メッシュ → (頂点座標, ウェイト行列)
+    各頂点 per_vertex 個のインフルエンスに正規化済みウェイト
+    """
+    rng = np.random.default_rng(seed)
+    half = vertex_count // 2
+    side = rng.random((half, 3)) * [10.0, 20.0, 5.0] + [0.01, 0.0, 0.0]
+    points = np.concatenate([side, side * [-1.0, 1.0, 1.0], np.zeros((vertex_count - 2 * half, 3))])
+    weights = np.zeros((vertex_count, influence_count), dtype=np.float32)
+    cols = np.argsort(rng.random((vertex_count, influence_count)), axis=1)[:, :per_vertex]
+    rows = np.arange(vertex_count)[:, None]
+    weights[rows, cols] = rng.random((vertex_count, per_vertex)) + 0.05
+    weights /= weights.sum(axis=1, keepdims=True)
+    return points, weights
+
+
+def make_polygons(vertex_count, width=None):
+    """
+    頂点を width 個ずつの行に並べた四角形グリッドのトポロジ → (面ごとの頂点数, 頂点番号の連結配列)
+    最後の半端な行は面を作らない
+    """
+    width = width or max(2, int(np.sqrt(vertex_count)))
+    rows = vertex_count // width
+    if rows < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    corner = (np.arange(rows - 1)[:, None] * width + np.arange(width - 1)).ravel()
+    connects = np.stack([corner, corner + 1, corner + width + 1, corner + width], axis=1).ravel()
+    return np.full(len(corner), 4, dtype=np.int64), connects
+
+
+class CountingCmds:
+    """maya.cmds の代わり。コマンド呼び出しを数え、FakeSceneの内容で応答する"""
+    def __init__(self, scene):
+        self._scene = scene
+        self.calls = Counter()
+
+    def __getattr__(self, name):
+        impl = getattr(self._scene, "cmd_" + name, None)
+        if impl is None:
+            raise AttributeError(f"maya.cmds.{name} はスタブ未対応です")
+
+        def _call(*args, **kwargs):
+            self.calls[name] += 1
+            return impl(*args, **kwargs)
+        return _call
+
+    def reset_calls(self):
+        self.calls.clear()
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+
+class FakeScene:
+    """
+    MemorySkinBackend＋選択状態＋ノード属性だけを持つ簡易シーン
+    core処理には backend=scene.backend を渡す
+    """
+    def __init__(self):
+        register_package()
+        from PochiPochi_SkinWeight.core.skin_backend import MemorySkinBackend
+        self.backend = MemorySkinBackend()
+        self.selection = []
+        self.nodes = {}  # ノード名 → {属性名: 値}
+        self.cmds = CountingCmds(self)
+
+    def add_skinned_mesh(self, mesh, skin, influences, weights, points, polygons=None):
+        self.backend.add_skin(skin, mesh, influences, weights, points, polygons=polygons)
+        self.nodes.setdefault(mesh, {})
+        self.nodes.setdefault(skin, {})
+
+    def select(self, items):
+        self.selection = list(items)
+
+    # ==== cmds ====
+    def cmd_ls(self, *args, selection=False, type=None, **kwargs):
+        if selection:
+            return list(self.selection)
+        names = []
+        for arg in args:
+            names.extend(arg if isinstance(arg, (list, tuple)) else [arg])
+        if type == "skinCluster":
+            return [n for n in names if n in self.backend.skins]
+        return [n for n in names if n in self.nodes]
+
+    def cmd_listHistory(self, node, **kwargs):
+        skin = self.backend.find_skin(node)
+        return [node] + ([skin] if skin else [])
+
+    def cmd_select(self, items=None, clear=False, add=False, **kwargs):
+        if clear:
+            self.selection = []
+            return
+        items = list(items) if isinstance(items, (list, tuple)) else [items]
+        self.selection = self.selection + items if add else items
+
+    def cmd_skinCluster(self, skin, query=False, influence=False, **kwargs):
+        return self.backend.influences(skin)
+
+    def cmd_skinPercent(self, skin, vertex, query=False, transform=False, value=False, **kwargs):
+        m = _VTX_RE.match(vertex)
+        _, row = self.backend.read_weights(skin, m.group(1), [int(m.group(2))])
+        infs = self.backend.influences(skin)
+        cols = np.flatnonzero(row[0] > kwargs.get("ignoreBelow", 0.0))
+        if value:
+            return [float(row[0, c]) for c in cols]
+        return [infs[c] for c in cols]
+
+    def cmd_xform(self, target, query=False, worldSpace=False, translation=False, **kwargs):
+        return self.backend.points(target.split(".")[0]).ravel().tolist()
+
+    def cmd_objExists(self, node):
+        return node.split(".")[0] in self.nodes
+
+    def cmd_createNode(self, node_type, name=None, **kwargs):
+        self.nodes[name] = {}
+        return name
+
+    def cmd_attributeQuery(self, attr, node=None, exists=False, **kwargs):
+        return attr in self.nodes.get(node, {})
+
+    def cmd_addAttr(self, node, ln=None, dv=None, **kwargs):
+        self.nodes[node][ln] = dv
+
+    def cmd_getAttr(self, plug, **kwargs):
+        node, attr = plug.split(".", 1)
+        return self.nodes[node][attr]
+
+    def cmd_setAttr(self, plug, *values, **kwargs):
+        node, attr = plug.split(".", 1)
+        self.nodes[node][attr] = values[0] if len(values) == 1 else list(values)
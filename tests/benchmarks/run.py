@@ -0,0 +1,214 @@
+# run.py - Pochi-Pochi_SkinWeight
+# コア処理のベンチマーク（スタブmaya.cmds＋合成メッシュ）
+#   python -m tests.benchmarks.run                       1k〜1M頂点を計測してベースラインと比較
+#   python -m tests.benchmarks.run --sizes 1k,10k
+#   python -m tests.benchmarks.run --update-baseline     現在の結果をベースラインとして保存
+# 処理ごとに 時間 / ピークメモリ(tracemalloc) / cmds呼び出し回数 を記録する
+
+import argparse
+import gc
+import importlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from .fake_maya import PACKAGE, INFLUENCES, FakeScene, install, make_mesh, make_polygons
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# 時間は環境差が大きいので倍率＋最低差分で判定。cmds呼び出し回数は増えたら即NG
+TIME_TOLERANCE = 2.0
+TIME_SLACK = 0.005
+MEMORY_TOLERANCE = 1.25
+MEMORY_SLACK = 64 * 1024
+
+
+def _core(name):
+    return importlib.import_module(f"{PACKAGE}.core.{name}")
+
+
+def build_cases(scene, vertex_count):
+    """
+    1サイズ分のシーンを作り [(名前, 準備関数 or None, 計測する関数)] を返す
+    計測する関数は時間用/メモリ用に2回呼ばれ、その都度準備関数が先に呼ばれる（準備の時間は計測しない）
+    """
+    weight_ops = _core("weight_ops")
+    skin_data = _core("skin_data")
+    mirror_ops = _core("mirror_ops")
+    skin_layer = _core("skin_layer")
+    selection_ops = _core("selection_ops")
+    adjacency = _core("adjacency")
+    backend = scene.backend
+    mesh, skin = "body", "skinCluster1"
+    points, weights = make_mesh(vertex_count)
+    scene.add_skinned_mesh(mesh, skin, INFLUENCES, weights, points, make_polygons(vertex_count))
+    all_verts = [f"{mesh}.vtx[0:{vertex_count - 1}]"]
+    state = {}
+
+    def select_all():
+        scene.select(all_verts)
+
+    def select_one():
+        scene.select([f"{mesh}.vtx[0]"])
+
+    def warm_graph():
+        adjacency.get_mesh_graph(mesh, backend)
+
+    def select_tenth():
+        warm_graph()
+        scene.select([f"{mesh}.vtx[0:{vertex_count // 10}]"])
+
+    def reset_weights_warm():
+        reset_weights()
+        warm_graph()
+
+    def copy_then_select():
+        select_one()
+        state["copied"] = weight_ops.copy_weights()
+
+    def cold_symmetry():
+        copy_then_select()
+        skin_data._symmetry_cache.clear()
+
+    def reset_weights():
+        scene.backend.skins[skin]["weights"] = weights.copy()
+
+    def make_manager():
+        mgr = skin_layer.SkinLayerManager(INFLUENCES, vertex_count)
+        base = mgr.add_layer("Base")
+        mgr.set_layer_weights(base["id"], weights)
+        state["manager"], state["layer"] = mgr, base["id"]
+
+    def make_edited_manager():
+        make_manager()
+        state["manager"].set_weights(state["layer"], np.arange(vertex_count), [1], 0.3)
+
+    return [
+        ("get_all_weights_for_skin", None, lambda: skin_data.get_all_weights_for_skin(skin, mesh, backend)),
+        ("set_weight", select_all, lambda: weight_ops.set_weight(scene.selection, "spine", 0.5, backend)),
+        ("add_weight", select_all, lambda: weight_ops.add_weight(scene.selection, "spine", 0.1, backend)),
+        ("copy_weights", select_one, weight_ops.copy_weights),
+        ("paste_mirror_weights_cold", cold_symmetry,
+         lambda: weight_ops.paste_mirror_weights(state["copied"], backend=backend)),
+        ("paste_mirror_weights_warm", copy_then_select,
+         lambda: weight_ops.paste_mirror_weights(state["copied"], backend=backend)),
+        ("mirror_weights", None, lambda: mirror_ops.mirror_weights(mesh, backend=backend)),
+        ("prune_weights", reset_weights,
+         lambda: weight_ops.prune_weights(mesh, 0.01, 3, backend)),
+        ("mesh_graph_cold", adjacency.invalidate_mesh_graph, warm_graph),
+        ("smooth_weights", reset_weights_warm,
+         lambda: weight_ops.smooth_weights(mesh, None, 0.5, 2, backend)),
+        ("smooth_weights_selection", reset_weights_warm,
+         lambda: weight_ops.smooth_weights(mesh, np.arange(0, vertex_count, 10), 0.5, 2, backend)),
+        ("grow_selection", select_tenth, lambda: selection_ops.grow_selection(2, backend)),
+        ("layer_set_weights", make_manager,
+         lambda: state["manager"].set_weights(state["layer"], np.arange(vertex_count), [1], 0.3)),
+        ("layer_undo", make_edited_manager, lambda: state["manager"].undo()),
+        ("layer_export_json", make_manager, lambda: state["manager"].export_json()),
+        ("layer_encode", make_manager, lambda: skin_data.encode_layer_data(state["manager"].export_dirty())),
+    ]
+
+
+def measure(cmds, setup, fn):
+    """時間計測とメモリ計測は別々に実行（tracemallocの負荷を時間に含めない）"""
+    if setup:
+        setup()
+    gc.collect()
+    cmds.reset_calls()
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    calls = dict(cmds.calls)
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_bytes": peak, "calls": calls}
+
+
+def run_size(label):
+    """1サイズ分の全処理を計測 → {処理名: 結果}"""
+    scene = FakeScene()
+    install(scene.cmds)
+    results = {}
+    for name, setup, fn in build_cases(scene, SIZES[label]):
+        results[name] = measure(scene.cmds, setup, fn)
+    return results
+
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """ベースラインより悪化した項目のメッセージのリスト"""
+    problems = []
+    for size, ops in results.items():
+        for name, cur in ops.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            for cmd, count in cur["calls"].items():
+                if count > base["calls"].get(cmd, 0):
+                    problems.append(f"{size} {name}: cmds.{cmd} {base['calls'].get(cmd, 0)} -> {count} calls")
+            if cur["seconds"] > base["seconds"] * time_tolerance + TIME_SLACK:
+                problems.append(f"{size} {name}: {base['seconds']:.4f}s -> {cur['seconds']:.4f}s")
+            if cur["peak_bytes"] > base["peak_bytes"] * memory_tolerance + MEMORY_SLACK:
+                problems.append(f"{size} {name}: peak {base['peak_bytes']} -> {cur['peak_bytes']} bytes")
+    return problems
+
+
+def format_results(results):
+    lines = [f"{'size':>5}  {'operation':<28}{'time(ms)':>10}{'peak(MB)':>10}  cmds calls"]
+    for size, ops in results.items():
+        for name, r in ops.items():
+            calls = ", ".join(f"{k}={v}" for k, v in sorted(r["calls"].items())) or "-"
+            lines.append(f"{size:>5}  {name:<28}{r['seconds'] * 1000:>10.2f}{r['peak_bytes'] / 2 ** 20:>10.2f}  {calls}")
+    return "\n".join(lines)
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pochi-Pochi SkinWeight ベンチマーク")
+    parser.add_argument("--sizes", default=",".join(SIZES), help="計測する頂点数 (例: 1k,10k)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="結果をベースラインに保存")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    parser.add_argument("--output", default=None, help="結果表を書き出すパス")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for label in args.sizes.split(","):
+        results[label] = run_size(label)
+    text = format_results(results)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+        print(f"baseline updated: {args.baseline}")
+        return 0
+    problems = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    for p in problems:
+        print("REGRESSION", p)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+# conftest.py - Pochi-Pochi_SkinWeight
+# パッケージ直下の__init__.py(Qt/UI読み込み)を通さずにcoreを読み込むための設定
+import importlib
+import os
+import sys
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "PochiPochi_SkinWeight"
+
+if PACKAGE not in sys.modules:
+    pkg = types.ModuleType(PACKAGE)
+    pkg.__path__ = [ROOT]
+    sys.modules[PACKAGE] = pkg
+
+
+@pytest.fixture
+def import_core(monkeypatch):
+    """maya.cmds を読み込むcoreモジュールを、空のmayaモジュールを差し込んだ状態でimportする"""
+    maya = types.ModuleType("maya")
+    maya.cmds = types.ModuleType("maya.cmds")
+    monkeypatch.setitem(sys.modules, "maya", maya)
+    monkeypatch.setitem(sys.modules, "maya.cmds", maya.cmds)
+    for name in list(sys.modules):
+        if name.startswith(PACKAGE + ".core."):
+            monkeypatch.delitem(sys.modules, name)
+
+    def _import(name):
+        return importlib.import_module(f"{PACKAGE}.core.{name}")
+    return _import
+
+
+@pytest.fixture
+def fake_scene(import_core, monkeypatch):
+    """呼び出し回数を数えるスタブ maya.cmds ＋ MemorySkinBackend の簡易シーン"""
+    from benchmarks.fake_maya import FakeScene
+    scene = FakeScene()
+    monkeypatch.setitem(sys.modules, "maya.cmds", scene.cmds)
+    monkeypatch.setattr(sys.modules["maya"], "cmds", scene.cmds, raising=False)
+    return scene
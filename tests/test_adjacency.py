@@ -0,0 +1,93 @@
+# test_adjacency.py - Pochi-Pochi_SkinWeight
+import numpy as np
+
+from PochiPochi_SkinWeight.core import adjacency
+from PochiPochi_SkinWeight.core.skin_layer import SkinLayerManager
+
+
+def grid():
+    """3×3頂点の四角形4枚"""
+    counts = [4, 4, 4, 4]
+    connects = [0, 1, 4, 3, 1, 2, 5, 4, 3, 4, 7, 6, 4, 5, 8, 7]
+    return adjacency.VertexGraph(9, counts, connects)
+
+
+def test_vertex_graph_neighbors_from_polygons():
+    g = grid()
+    np.testing.assert_array_equal(g.degree(), [2, 3, 2, 3, 4, 3, 2, 3, 2])
+    counts, nbrs = g.neighbors([4, 0])
+    np.testing.assert_array_equal(counts, [4, 2])
+    np.testing.assert_array_equal(nbrs, [1, 3, 5, 7, 1, 3])
+    np.testing.assert_array_equal(g.ring([0]), [0, 1, 3])
+    assert adjacency.topology_hash([4], [0, 1, 2, 3]) != adjacency.topology_hash([4], [0, 1, 3, 2])
+
+
+def test_smooth_matrix_only_changes_targets_and_keeps_locks():
+    g = grid()
+    w = np.zeros((9, 3), dtype=np.float32)
+    w[:, 0] = 1.0
+    w[4] = [0.0, 0.8, 0.2]
+    new = adjacency.smooth_matrix(w, g, [1, 4], strength=1.0, iterations=1, locked=[2])
+    np.testing.assert_array_equal(np.delete(new, [1, 4], axis=0), np.delete(w, [1, 4], axis=0))
+    # 頂点4: 隣接(1,3,5,7)の平均は [1,0,0] → ロック列0.2を残して残りを配分
+    np.testing.assert_allclose(new[4], [0.8, 0.0, 0.2], rtol=1e-6)
+    np.testing.assert_allclose(new.sum(axis=1), 1.0, rtol=1e-6)
+
+    # 範囲だけ渡しても全体で計算した場合と同じ
+    region = g.ring([1, 4])
+    part = adjacency.smooth_matrix(w[region], g, [1, 4], 0.5, 3, None, region)
+    np.testing.assert_allclose(part, adjacency.smooth_matrix(w, g, [1, 4], 0.5, 3)[region], rtol=1e-6)
+
+
+def test_layer_smooth_is_one_history_step():
+    g = grid()
+    mgr = SkinLayerManager(["a", "b"], 9)
+    ly = mgr.add_layer("Base", sparse=False)
+    w = np.zeros((9, 2), dtype=np.float32)
+    w[:, 0] = 1.0
+    w[4] = [0.0, 1.0]
+    mgr.set_layer_weights(ly["id"], w)
+    mgr.smooth_weights(ly["id"], g, [4], strength=0.5)
+    np.testing.assert_allclose(mgr.get_layer_weights(ly["id"])[4], [0.5, 0.5], rtol=1e-6)
+    mgr.undo()
+    np.testing.assert_array_equal(mgr.get_layer_weights(ly["id"]), w)
+
+
+def test_mesh_graph_cache_rereads_topology_unless_monitored():
+    from PochiPochi_SkinWeight.core import scene_cache
+    from PochiPochi_SkinWeight.core.skin_backend import MemorySkinBackend
+    backend = MemorySkinBackend()
+    # 四角形を三角形2枚に分割（対角線 0-2）
+    backend.add_mesh("quad", np.zeros((4, 3)), ([3, 3], [0, 1, 2, 0, 2, 3]))
+    reads = []
+    polygons = backend.polygons
+    backend.polygons = lambda mesh: reads.append(mesh) or polygons(mesh)
+    adjacency.invalidate_mesh_graph()
+
+    # 監視なし: 毎回面構成を読み、同じならグラフを再利用
+    graph = adjacency.get_mesh_graph("quad", backend)
+    assert adjacency.get_mesh_graph("quad", backend) is graph
+    assert len(reads) == 2
+    # 対角線を 1-3 へ張り替え（頂点数/面数/面頂点数は同じ）
+    backend.add_mesh("quad", np.zeros((4, 3)), ([3, 3], [0, 1, 3, 1, 2, 3]))
+    digest = adjacency.get_topology_hash("quad", backend)
+    flipped = adjacency.get_mesh_graph("quad", backend)
+    assert flipped is not graph and digest != adjacency.topology_hash([3, 3], [0, 1, 2, 0, 2, 3])
+    np.testing.assert_array_equal(flipped.neighbors([1])[1], [0, 2, 3])
+
+    # 監視あり: 件数が同じなら面構成を読まない。監視側の破棄で読み直す
+    watched = []
+    scene_cache.set_mesh_watcher(watched.append)
+    scene_cache.set_enabled(True)
+    try:
+        del reads[:]
+        graph = adjacency.get_mesh_graph("quad", backend)
+        assert adjacency.get_mesh_graph("quad", backend) is graph
+        assert adjacency.get_topology_hash("quad", backend)
+        assert reads == ["quad"] and watched == ["quad"]
+        adjacency.invalidate_mesh_graph("quad")
+        adjacency.get_mesh_graph("quad", backend)
+        assert len(reads) == 2
+    finally:
+        scene_cache.set_enabled(False)
+        scene_cache.set_mesh_watcher(None)
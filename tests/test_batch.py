@@ -0,0 +1,55 @@
+# test_batch.py - Pochi-Pochi_SkinWeight
+import numpy as np
+import pytest
+
+from PochiPochi_SkinWeight.core.skin_backend import MemorySkinBackend
+
+
+@pytest.fixture
+def batch(import_core):
+    return import_core("batch")
+
+
+def make_backend():
+    backend = MemorySkinBackend()
+    rng = np.random.default_rng(3)
+    for name in ("body", "head"):
+        weights = rng.random((200, 4)) * 0.5
+        weights[:, 0] += 0.004 - weights[:, 0] * (rng.random(200) > 0.5)
+        backend.add_skin(f"skin_{name}", name, ["root", "spine", "L_arm", "R_arm"], weights)
+    return backend
+
+
+def test_manifest_expands_shorthand_and_rejects_unknown_ops(batch):
+    jobs = batch.parse_manifest({"ops": ["normalize"], "jobs": [{"mesh": "body"}]})
+    assert jobs == [{"scene": None, "meshes": ["body"], "ops": [{"op": "normalize"}], "save": False}]
+    with pytest.raises(RuntimeError):
+        batch.parse_manifest({"jobs": [{"mesh": "body", "ops": ["explode"]}]})
+
+
+def test_batch_prune_normalize_export_import_with_memory_backend(batch, tmp_path):
+    backend = make_backend()
+    path = str(tmp_path / "{mesh}.ppsw")
+    jobs = batch.parse_manifest({"jobs": [
+        {"meshes": ["body", "head"], "ops": [{"op": "prune", "threshold": 0.01}, "normalize",
+                                             {"op": "export", "path": path}]},
+        {"mesh": "missing", "ops": ["normalize"]},
+    ]})
+    report = batch.run_batch(jobs, backend=backend)
+    assert report["failed"] == 1
+    first, second = report["jobs"]
+    assert first["status"] == "ok" and len(first["steps"]) == 6
+    assert all(step["seconds"] >= 0 for step in first["steps"])
+    assert second["status"] == "failed" and "skinCluster" in second["steps"][0]["error"]
+
+    weights = backend.skins["skin_body"]["weights"]
+    np.testing.assert_allclose(weights.sum(axis=1), 1.0, rtol=1e-5)
+    assert not np.any((weights > 0) & (weights < 0.01))
+
+    # 書き出したファイルを列順の違うskinへ名前で読み込む
+    backend.add_skin("skin_copy", "copy", ["R_arm", "L_arm", "spine", "root"], np.zeros((200, 4)))
+    report = batch.run_batch(batch.parse_manifest(
+        {"jobs": [{"mesh": "copy", "ops": [{"op": "import", "path": str(tmp_path / "body.ppsw")}]}]}),
+        backend=backend)
+    assert report["failed"] == 0
+    np.testing.assert_allclose(backend.skins["skin_copy"]["weights"], weights[:, ::-1], rtol=1e-6)
@@ -0,0 +1,19 @@
+# test_joint_ops.py - Pochi-Pochi_SkinWeight
+import numpy as np
+
+
+def test_influence_stats_over_selection(import_core):
+    joint_ops = import_core("joint_ops")
+    weights = np.array([
+        [0.5, 0.5, 0.0],
+        [1.0, 0.0, 0.0],
+        [0.2, 0.0, 0.8],
+    ], dtype=np.float32)
+    stats = joint_ops.influence_stats(weights, ["A", "B", "C"])
+    assert stats["influences"] == ["A", "B", "C"]
+    np.testing.assert_array_equal(stats["count"], [3, 1, 1])
+    np.testing.assert_allclose(stats["min"], [0.2, 0.5, 0.8])
+    np.testing.assert_allclose(stats["max"], [1.0, 0.5, 0.8])
+    np.testing.assert_allclose(stats["mean"], [1.7 / 3, 0.5, 0.8], rtol=1e-6)
+    empty = joint_ops.influence_stats(np.zeros((2, 3)), ["A", "B", "C"])
+    assert empty["influences"] == []
@@ -0,0 +1,42 @@
+# test_layer_composite.py - Pochi-Pochi_SkinWeight
+import numpy as np
+
+from PochiPochi_SkinWeight.core.layer_composite import LayerCompositor
+from PochiPochi_SkinWeight.core.skin_layer import SkinLayerManager
+
+
+def make_stack():
+    mgr = SkinLayerManager(["A", "B"], 4)
+    base = mgr.add_layer("Base")
+    mgr.set_layer_weights(base["id"], [[1, 0], [1, 0], [0.5, 0.5], [0, 1]])
+    fix = mgr.add_layer("Fix")
+    mgr.set_weights(fix["id"], [1], [1], 1.0)
+    return mgr, base, fix
+
+
+def test_composite_blends_opacity_and_normalizes():
+    mgr, base, fix = make_stack()
+    comp = LayerCompositor(mgr)
+    mgr.set_layer_opacity(fix["id"], 0.25)
+    w = comp.evaluate()
+    np.testing.assert_allclose(w[0], [1, 0])
+    np.testing.assert_allclose(w[1], [0.75, 0.25])  # Fixレイヤはウェイトのある頂点だけ効く
+    np.testing.assert_allclose(w.sum(axis=1), 1.0, rtol=1e-6)
+
+
+def test_incremental_update_only_touches_dirty_vertices():
+    mgr, base, fix = make_stack()
+    comp = LayerCompositor(mgr)
+    comp.evaluate()
+    mgr.set_layer_opacity(fix["id"], 0.5)
+    w = comp.evaluate()
+    np.testing.assert_array_equal(comp.last_updated, [1])
+    np.testing.assert_allclose(w[1], [0.5, 0.5])
+    mgr.set_layer_enabled(fix["id"], False)
+    mgr.undo()
+    comp.evaluate()
+    np.testing.assert_array_equal(comp.last_updated, [1])
+    mgr.set_weights(base["id"], [3], [0], 1.0)
+    w = comp.evaluate()
+    np.testing.assert_array_equal(comp.last_updated, [3])
+    np.testing.assert_allclose(w[3], [0.5, 0.5])
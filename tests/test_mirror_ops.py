@@ -0,0 +1,44 @@
+# test_mirror_ops.py - Pochi-Pochi_SkinWeight
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def mirror_ops(import_core):
+    return import_core("mirror_ops")
+
+
+def test_influence_name_rules(mirror_ops):
+    assert mirror_ops.mirror_influence_name("L_arm") == "R_arm"
+    assert mirror_ops.mirror_influence_name("ns:hand_r") == "ns:hand_l"
+    assert mirror_ops.mirror_influence_name("|root|LeftLeg") == "|root|RightLeg"
+    assert mirror_ops.mirror_influence_name("spine") == "spine"
+    assert mirror_ops.mirror_influence_name("cleft_jaw") == "cleft_jaw"
+    assert mirror_ops.mirror_influence_name("bright_eye") == "bright_eye"
+    assert mirror_ops.mirror_influence_name("upperLeftArm") == "upperRightArm"
+    assert mirror_ops.mirror_influence_name("arm_left") == "arm_right"
+    inf_map, missing = mirror_ops.build_influence_map(["spine", "L_arm", "R_arm", "L_tail"])
+    np.testing.assert_array_equal(inf_map, [0, 2, 1, 3])
+    assert missing == ["L_tail"]
+
+
+def test_mirror_matrix_permutes_columns(mirror_ops):
+    points = np.array([[1, 0, 0], [-1, 0, 0], [0, 1, 0]], dtype=float)
+    weights = np.array([[0.2, 0.8, 0.0], [0.0, 0.0, 1.0], [1.0, 0.0, 0.0]], dtype=np.float32)
+    targets, rows = mirror_ops.mirror_matrix(
+        weights, points, np.array([1, 0, 2]), np.array([0, 2, 1]))
+    np.testing.assert_array_equal(targets, [1])
+    np.testing.assert_allclose(rows, [[0.2, 0.0, 0.8]])
+
+
+def test_mirror_weights_reads_points_once(fake_scene, import_core):
+    from benchmarks.fake_maya import INFLUENCES, make_mesh
+    mirror_ops = import_core("mirror_ops")
+    points, weights = make_mesh(200)
+    fake_scene.add_skinned_mesh("body", "skinCluster1", INFLUENCES, weights, points)
+    reads = []
+    backend_points = fake_scene.backend.points
+    fake_scene.backend.points = lambda mesh: reads.append(mesh) or backend_points(mesh)
+    report = mirror_ops.mirror_weights("body", backend=fake_scene.backend)
+    assert reads == ["body"]
+    assert report["mirrored"] > 0
@@ -0,0 +1,111 @@
+# test_normalize.py - Pochi-Pochi_SkinWeight
+import numpy as np
+import pytest
+
+from PochiPochi_SkinWeight.core import normalize
+from PochiPochi_SkinWeight.core.skin_layer import SkinLayerManager
+
+
+def sample():
+    return np.array([
+        [0.5, 0.3, 0.2, 0.0],
+        [0.0, 1.0, 0.0, 0.0],   # 編集列が全部持っている
+        [0.0, 0.0, 0.0, 0.0],   # 未設定の行
+        [0.1, 0.1, 0.4, 0.4],
+    ], dtype=np.float32)
+
+
+def test_set_columns_redistributes_proportionally():
+    new = normalize.set_columns(sample(), [1], 0.5)
+    np.testing.assert_allclose(new[0], [0.5 * 0.5 / 0.7, 0.5, 0.2 * 0.5 / 0.7, 0.0], rtol=1e-6)
+    np.testing.assert_allclose(new[1], [0.0, 1.0, 0.0, 0.0])  # 配分先が無いので元のまま
+    np.testing.assert_allclose(new[2], [0.0, 0.5, 0.0, 0.0])  # 未設定の行は値だけ
+    np.testing.assert_allclose(new[[0, 3]].sum(axis=1), 1.0, rtol=1e-6)
+
+
+def test_locked_influences_are_kept():
+    locked = np.array([False, False, True, False])
+    new = normalize.set_columns(sample(), [0], 0.9, locked)
+    np.testing.assert_array_equal(new[:, 2], sample()[:, 2])
+    # 0.9 は 1 - ロック分(0.2 / 0.4) までに抑えられる
+    np.testing.assert_allclose(new[0], [0.8, 0.0, 0.2, 0.0], atol=1e-6)
+    np.testing.assert_allclose(new[3], [0.6, 0.0, 0.4, 0.0], atol=1e-6)
+    with pytest.raises(RuntimeError):
+        normalize.set_columns(sample(), [2], 0.5, locked)
+
+
+def test_add_columns_and_normalize_rows_with_locks():
+    new = normalize.add_columns(sample(), [3], 0.2, locked=[0])
+    np.testing.assert_allclose(new[3], [0.1, 0.1 * 0.3 / 0.5, 0.4 * 0.3 / 0.5, 0.6], rtol=1e-5)
+    m = sample() * 2
+    normalize.normalize_rows(m, locked=[0])
+    np.testing.assert_allclose(m[0], [1.0, 0.0, 0.0, 0.0], atol=1e-6)
+    np.testing.assert_allclose(m[3], [0.2, 0.8 * 0.2 / 1.8, 0.8 * 0.8 / 1.8, 0.8 * 0.8 / 1.8], rtol=1e-5)
+
+
+def test_layer_manager_normalized_edit_is_one_history_step():
+    mgr = SkinLayerManager(["A", "B", "C"], 3)
+    ly = mgr.add_layer("Base", sparse=False)
+    mgr.set_layer_weights(ly["id"], np.array([[0.6, 0.4, 0.0], [0.2, 0.2, 0.6], [1, 0, 0]], dtype=np.float32))
+    mgr.set_influence_locked(2)
+    mgr.set_weights(ly["id"], [0, 1], [0], 0.5, normalize=True)
+    w = mgr.get_layer_weights(ly["id"])
+    np.testing.assert_allclose(w[0], [0.5, 0.5, 0.0], atol=1e-6)
+    np.testing.assert_allclose(w[1], [0.4, 0.0, 0.6], atol=1e-6)
+    mgr.undo()
+    np.testing.assert_allclose(mgr.get_layer_weights(ly["id"])[1], [0.2, 0.2, 0.6], atol=1e-6)
+
+
+def test_layer_set_same_joint_twice_on_empty_row():
+    mgr = SkinLayerManager(["A", "B", "C"], 2)
+    ly = mgr.add_layer("Fix", sparse=True)
+    mgr.set_weights(ly["id"], [0], [0], 0.3, normalize=True)
+    mgr.set_weights(ly["id"], [0], [0], 0.5, normalize=True)
+    np.testing.assert_allclose(mgr.get_layer_weights(ly["id"])[0], [0.5, 0.0, 0.0], atol=1e-6)
+    mgr.add_weights(ly["id"], [0], [0], 0.2, normalize=True)
+    np.testing.assert_allclose(mgr.get_layer_weights(ly["id"])[0], [0.7, 0.0, 0.0], atol=1e-6)
+
+
+def test_layer_edit_on_empty_row_starts_from_layers_below():
+    from PochiPochi_SkinWeight.core.layer_composite import composite_layers
+    mgr = SkinLayerManager(["A", "B", "C"], 2)
+    base = mgr.add_layer("Base", sparse=False)
+    mgr.set_layer_weights(base["id"], np.array([[0.5, 0.5, 0.0], [0, 0, 1]], dtype=np.float32))
+    fix = mgr.add_layer("Fix", sparse=True)
+    mgr.set_weights(fix["id"], [0], [0], 0.6, normalize=True)
+    out = composite_layers(mgr.get_enabled_layers(), 2, 3)
+    np.testing.assert_allclose(out[0], [0.6, 0.4, 0.0], atol=1e-6)
+    np.testing.assert_allclose(out[1], [0.0, 0.0, 1.0], atol=1e-6)
+    mgr.add_weights(fix["id"], [1], [0], 0.25, normalize=True)
+    np.testing.assert_allclose(mgr.get_layer_weights(fix["id"])[1], [0.25, 0.0, 0.75], atol=1e-6)
+
+
+def test_prune_matrix_threshold_and_max_influences():
+    w = np.array([
+        [0.4, 0.3, 0.2, 0.1],
+        [0.005, 0.005, 0.0, 0.0],  # 全部しきい値未満でも最大は残す
+        [0.0, 0.0, 0.0, 0.0],
+    ], dtype=np.float32)
+    new = normalize.prune_matrix(w, threshold=0.15, max_influences=2)
+    np.testing.assert_allclose(new[0], [0.4 / 0.7, 0.3 / 0.7, 0.0, 0.0], rtol=1e-6)
+    assert np.count_nonzero(new[1]) == 1 and new[1].sum() == pytest.approx(1.0)
+    np.testing.assert_array_equal(new[2], 0.0)
+    np.testing.assert_array_equal(normalize.influence_counts(new), [2, 1, 0])
+
+
+def test_prune_matrix_keeps_locked_and_counts_them():
+    w = np.array([[0.4, 0.3, 0.2, 0.1]], dtype=np.float32)
+    new = normalize.prune_matrix(w, max_influences=2, locked=[3])
+    np.testing.assert_allclose(new[0], [0.9, 0.0, 0.0, 0.1], rtol=1e-6)
+    # ロック列で枠が埋まれば、アンロック列は残さない（最大値の強制も枠の範囲内）
+    new = normalize.prune_matrix(w, max_influences=1, locked=[3])
+    np.testing.assert_allclose(new[0], [0.0, 0.0, 0.0, 0.1], rtol=1e-6)
+    assert normalize.influence_counts(new).max() == 1
+
+
+def test_prune_matrix_never_zeroes_locked_columns():
+    w = np.array([[0.4, 0.3, 0.2, 0.1]], dtype=np.float32)
+    new = normalize.prune_matrix(w, max_influences=2, locked=[2, 3])
+    np.testing.assert_allclose(new[0], [0.0, 0.0, 0.2, 0.1], rtol=1e-6)
+    with pytest.raises(RuntimeError):
+        normalize.prune_matrix(w, max_influences=1, locked=[2, 3])
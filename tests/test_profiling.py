@@ -0,0 +1,71 @@
+# test_profiling.py - Pochi-Pochi_SkinWeight
+import json
+import types
+
+import pytest
+
+from PochiPochi_SkinWeight.core import profiling
+
+
+@pytest.fixture
+def prof():
+    profiling.reset()
+    profiling.enable(True)
+    yield profiling
+    profiling.enable(False)
+    profiling.reset()
+
+
+def make_cmds():
+    fake = types.SimpleNamespace(ls=lambda *a, **k: [], listHistory=lambda *a, **k: [])
+    return profiling.counting_cmds(fake)
+
+
+def test_nested_operations_count_cmds_calls(prof):
+    cmds = make_cmds()
+
+    @prof.profiled("inner")
+    def inner():
+        cmds.listHistory("mesh")
+
+    @prof.profiled("outer")
+    def outer():
+        for _ in range(3):
+            cmds.ls(selection=True)
+        inner()
+
+    outer()
+    last = prof.last_operation()
+    assert last["name"] == "outer"
+    assert last["calls"] == {"cmds.ls": 3, "cmds.listHistory": 1} and last["total_calls"] == 4
+    stats = prof.stats()
+    assert stats["inner"]["calls"] == {"cmds.listHistory": 1}
+    assert stats["outer"]["count"] == 1 and sum(stats["outer"]["histogram"]) == 1
+    assert "outer" in prof.format_last()
+
+
+def test_disabled_is_passthrough_and_report_dump(prof, tmp_path):
+    cmds = make_cmds()
+
+    @prof.profiled()
+    def op():
+        cmds.ls()
+        return 42
+
+    prof.enable(False)
+    assert op() == 42 and prof.stats() == {}
+    prof.enable(True)
+    for _ in range(5):
+        op()
+    name = next(iter(prof.stats()))
+    assert name.endswith("op")
+    path = prof.dump_report(str(tmp_path / "report.json"))
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["operations"][name]["count"] == 5
+    assert data["operations"][name]["calls"] == {"cmds.ls": 5}
+    assert "cmds.ls=5" in open(prof.dump_report(str(tmp_path / "report.txt")), encoding="utf-8").read()
+
+
+def test_histogram_buckets():
+    assert profiling.histogram([0.0005, 0.003, 0.003, 20.0]) == [1, 2, 0, 0, 0, 0, 0, 0, 1]
@@ -0,0 +1,46 @@
+# test_selection_ops.py - Pochi-Pochi_SkinWeight
+import numpy as np
+import pytest
+
+from benchmarks.fake_maya import INFLUENCES, make_mesh, make_polygons
+
+
+@pytest.fixture
+def scene(fake_scene):
+    points, weights = make_mesh(100)
+    fake_scene.add_skinned_mesh("body", "skinCluster1", INFLUENCES, weights, points, make_polygons(100, width=10))
+    return fake_scene
+
+
+def test_vertex_ranges_are_compact(import_core):
+    selection_ops = import_core("selection_ops")
+    assert selection_ops.vertex_ranges("m", [7, 3, 4, 5, 9, 10]) == ["m.vtx[3:5]", "m.vtx[7]", "m.vtx[9:10]"]
+    assert selection_ops.vertex_ranges("m", []) == []
+
+
+def test_grow_shrink_ring_on_grid(scene, import_core):
+    selection_ops = import_core("selection_ops")
+    scene.select(["body.vtx[44:45]"])
+    grown = selection_ops.grow_selection(backend=scene.backend)
+    np.testing.assert_array_equal(grown, [34, 35, 43, 44, 45, 46, 54, 55])
+    # 適用は範囲表記の1回の select
+    assert scene.selection == ["body.vtx[34:35]", "body.vtx[43:46]", "body.vtx[54:55]"]
+    assert scene.cmds.calls["select"] == 1
+
+    scene.select(["body.vtx[33:36]", "body.vtx[43:46]", "body.vtx[53:56]"])
+    np.testing.assert_array_equal(selection_ops.shrink_selection(backend=scene.backend), [44, 45])
+    ring = selection_ops.ring_selection(backend=scene.backend)
+    assert not np.isin([44, 45], ring).any() and np.isin([34, 43, 46, 55], ring).all()
+
+
+def test_select_influenced_and_mirror(scene, import_core):
+    selection_ops = import_core("selection_ops")
+    weights = scene.backend.skins["skinCluster1"]["weights"]
+    picked = selection_ops.select_influenced("body", "spine", 0.2, scene.backend)
+    np.testing.assert_array_equal(picked, np.flatnonzero(weights[:, 1] > 0.2))
+
+    # make_meshは後半が前半のX反転
+    scene.select(["body.vtx[3:5]"])
+    np.testing.assert_array_equal(selection_ops.mirror_selection(backend=scene.backend), [53, 54, 55])
+    with pytest.raises(RuntimeError):
+        selection_ops.select_influenced("body", "nope", backend=scene.backend)
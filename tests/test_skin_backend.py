@@ -0,0 +1,22 @@
+# test_skin_backend.py - Pochi-Pochi_SkinWeight
+import numpy as np
+
+from PochiPochi_SkinWeight.core.skin_backend import MemorySkinBackend
+
+
+def test_memory_backend_bulk_read():
+    backend = MemorySkinBackend()
+    weights = np.random.default_rng(0).random((1000, 3))
+    backend.add_skin("skinCluster1", "body", ["A", "B", "C"], weights)
+    infs, matrix = backend.read_weights("skinCluster1", "body")
+    assert infs == ["A", "B", "C"]
+    assert matrix.dtype == np.float32 and matrix.shape == (1000, 3)
+    _, part = backend.read_weights("skinCluster1", "body", vertices=[5, 7])
+    np.testing.assert_allclose(part, weights[[5, 7]], rtol=1e-6)
+
+
+def test_logical_runs_follow_sparse_influence_indices():
+    from PochiPochi_SkinWeight.core.skin_backend import _logical_runs
+    assert _logical_runs([0, 1, 2]) == [(0, 3, 0)]
+    # インフルエンス削除で歯抜け/順不同になった論理番号
+    assert _logical_runs([0, 2, 3, 7, 5]) == [(0, 1, 0), (1, 3, 2), (3, 4, 7), (4, 5, 5)]
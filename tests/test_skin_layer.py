@@ -0,0 +1,162 @@
+# test_skin_layer.py - Pochi-Pochi_SkinWeight
+import json
+
+import numpy as np
+
+from PochiPochi_SkinWeight.core.skin_layer import SkinLayerManager
+
+
+def make_manager(vertex_count=4):
+    return SkinLayerManager(["JNT1", "JNT2", "JNT3"], vertex_count)
+
+
+def test_layer_weights_are_float32_matrix():
+    mgr = make_manager()
+    ly = mgr.add_layer("Base")
+    mgr.set_weight(ly["id"], 1, 2, 0.5)
+    mgr.add_weight(ly["id"], 1, 2, 0.25)
+    w = mgr.get_layer_weights(ly["id"])
+    assert w.dtype == np.float32
+    assert w.shape == (4, 3)
+    assert w[2, 1] == np.float32(0.75)
+
+
+def test_export_import_roundtrip_and_legacy_columns():
+    mgr = make_manager()
+    ly = mgr.add_layer("Base")
+    mgr.set_weight(ly["id"], 0, 3, 1.0)
+    data = json.loads(json.dumps(mgr.export_json()))
+    # 旧形式(influences列リスト)のまま読めること
+    assert data["layers"][0]["influences"]["0"] == [0.0, 0.0, 0.0, 1.0]
+    other = make_manager()
+    other.import_json(data)
+    np.testing.assert_array_equal(other.get_layer_weights(ly["id"]), mgr.get_layer_weights(ly["id"]))
+
+
+def test_undo_redo_restores_weights():
+    mgr = make_manager()
+    ly = mgr.add_layer("Base")
+    mgr.set_weight(ly["id"], 0, 0, 0.4)
+    mgr.undo()
+    assert mgr.get_layer_weights(ly["id"])[0, 0] == 0.0
+    mgr.redo()
+    assert mgr.get_layer_weights(ly["id"])[0, 0] == np.float32(0.4)
+
+
+def test_history_stores_only_edited_block():
+    mgr = SkinLayerManager(["JNT1", "JNT2"], 10000)
+    ly = mgr.add_layer("Base")
+    mgr.set_weight(ly["id"], 1, 42, 0.3)
+    entry = mgr.undo_stack[-1]
+    assert entry["nbytes"] < 1024  # メッシュ全体ではなく編集した1要素分
+    mgr.rename_layer(ly["id"], "Renamed")
+    mgr.undo()
+    assert mgr.get_layer(ly["id"])["name"] == "Base"
+    mgr.undo()
+    assert mgr.get_layer_weights(ly["id"])[42, 1] == 0.0
+    mgr.redo()
+    mgr.redo()
+    assert mgr.get_layer(ly["id"])["name"] == "Renamed"
+    assert mgr.get_layer_weights(ly["id"])[42, 1] == np.float32(0.3)
+
+
+def test_layer_structure_undo():
+    mgr = make_manager()
+    a = mgr.add_layer("A")
+    b = mgr.add_layer("B")
+    mgr.move_layer(b["id"], 0)
+    assert mgr.get_layer_names() == ["B", "A"]
+    mgr.delete_layer(a["id"])
+    assert mgr.get_layer_names() == ["B"]
+    mgr.undo()
+    mgr.undo()
+    assert mgr.get_layer_names() == ["A", "B"]
+    mgr.redo()
+    mgr.redo()
+    assert mgr.get_layer_names() == ["B"]
+
+
+def test_history_memory_budget_evicts_oldest():
+    mgr = SkinLayerManager(["JNT1"], 1000, max_history_bytes=2000)
+    ly = mgr.add_layer("Base")
+    for i in range(100):
+        mgr.set_weight(ly["id"], 0, i, 1.0)
+    assert mgr.history_bytes <= 2000
+    assert 0 < len(mgr.undo_stack) < 100
+    while mgr.can_undo():
+        mgr.undo()
+    # 破棄された古い編集は戻らない
+    assert mgr.get_layer_weights(ly["id"])[0, 0] == 1.0
+
+
+def test_batch_set_and_add_clamp_with_single_history_step():
+    mgr = SkinLayerManager(["JNT1", "JNT2"], 5000)
+    ly = mgr.add_layer("Base")
+    verts = np.arange(0, 5000, 2)
+    steps = len(mgr.undo_stack)
+    mgr.set_weights(ly["id"], verts, [0, 1], 1.5)
+    mgr.add_weights(ly["id"], verts, 1, -np.linspace(0.0, 2.0, len(verts)))
+    assert len(mgr.undo_stack) == steps + 2
+    w = mgr.get_layer_weights(ly["id"])
+    assert w[verts, 0].max() == 1.0
+    assert w[verts, 1].min() == 0.0
+    assert w[1].sum() == 0.0
+    mgr.undo()
+    np.testing.assert_array_equal(mgr.get_layer_weights(ly["id"])[verts, 1], 1.0)
+
+
+def test_influence_index_by_short_name():
+    mgr = SkinLayerManager(["|root|JNT1", "|root|JNT2"], 1)
+    assert mgr.influence_index("JNT2") == 1
+    assert mgr.influence_index("missing") is None
+
+
+def test_sparse_layer_matches_dense_and_costs_nnz():
+    from PochiPochi_SkinWeight.core.weight_storage import DenseWeights, SparseWeights
+    rng = np.random.default_rng(3)
+    dense = DenseWeights(100000, 250)
+    sparse = SparseWeights(100000, 250)
+    assert sparse.nbytes == 0
+    for _ in range(20):
+        verts = rng.integers(0, 100000, 50)
+        infs = rng.integers(0, 250, 3)
+        vals = rng.random((50, 3)) * (rng.random((50, 3)) > 0.3)
+        dense.set(verts, infs, vals)
+        sparse.set(verts, infs, vals)
+    probe = rng.integers(0, 100000, 500)
+    np.testing.assert_array_equal(sparse.get(probe, None), dense.get(probe, None))
+    np.testing.assert_array_equal(sparse.nonzero_rows(), dense.nonzero_rows())
+    assert sparse.nnz == np.count_nonzero(dense.data)
+    assert sparse.nbytes < 50 * 20 * 3 * 12 + 1
+
+
+def test_new_layers_are_sparse_and_set_layer_weights_picks_density():
+    mgr = SkinLayerManager(["A", "B"], 1000)
+    ly = mgr.add_layer("Fix")
+    assert ly["weights"].kind == "sparse"
+    mgr.set_weights(ly["id"], [10, 11], [1], 0.5)
+    mgr.set_weights(ly["id"], [10], [1], 0.0)
+    assert ly["weights"].nnz == 1
+    mgr.undo()
+    assert ly["weights"].nnz == 2
+    mgr.set_layer_weights(ly["id"], np.ones((1000, 2)))
+    assert mgr.get_layer(ly["id"])["weights"].kind == "dense"
+
+
+def test_export_dirty_only_returns_changed_layers():
+    mgr = make_manager()
+    a = mgr.add_layer("A")
+    b = mgr.add_layer("B")
+    first = mgr.export_dirty()
+    assert first["header"] is not None and set(first["layers"]) == {a["id"], b["id"]}
+    assert not mgr.is_dirty()
+    # メタ情報のみの変更はヘッダだけ
+    mgr.rename_layer(a["id"], "A2")
+    snap = mgr.export_dirty()
+    assert snap["header"]["layers"][0]["name"] == "A2" and snap["layers"] == {}
+    # ウェイト変更はそのレイヤだけ
+    mgr.set_weights(b["id"], [1], [0], 0.5)
+    snap = mgr.export_dirty()
+    assert snap["header"] is None and list(snap["layers"]) == [b["id"]]
+    mgr.undo()
+    assert list(mgr.export_dirty()["layers"]) == [b["id"]]
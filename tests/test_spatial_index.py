@@ -0,0 +1,30 @@
+# test_spatial_index.py - Pochi-Pochi_SkinWeight
+import numpy as np
+
+from PochiPochi_SkinWeight.core import spatial_index
+
+
+def test_grid_matches_brute_force_within_tolerance():
+    rng = np.random.default_rng(7)
+    points = rng.random((5000, 3))
+    grid = spatial_index.PointGrid(points, 0.02)
+    targets = points[rng.integers(0, 5000, 300)] + rng.normal(0, 0.003, (300, 3))
+    idx, dist = grid.query(targets)
+    d = np.linalg.norm(points[None, :, :] - targets[:, None, :], axis=2)
+    expect = d.argmin(axis=1)
+    found = idx >= 0
+    np.testing.assert_array_equal(idx[found], expect[found])
+    assert np.all(d.min(axis=1)[~found] > 0.02)
+    far, _ = grid.query([[5.0, 5.0, 5.0]])
+    assert far[0] == -1
+
+
+def test_grid_with_huge_extent_does_not_overflow_cell_keys():
+    # セル数が int64 に収まらない広がり（通し番号ではなくセル座標の組で引く）
+    points = np.array([[0.0, 0.0, 0.0], [1e9, -1e9, 1e9], [-1e9, 1e9, 3.0]])
+    grid = spatial_index.PointGrid(points, 1e-4)
+    assert not grid._linear
+    idx, _ = grid.query(points + 1e-5)
+    np.testing.assert_array_equal(idx, [0, 1, 2])
+    far, _ = grid.query([[0.5, 0.5, 0.5], [1e9, 1e9, 1e9]])
+    np.testing.assert_array_equal(far, [-1, -1])
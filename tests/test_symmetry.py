@@ -0,0 +1,57 @@
+# test_symmetry.py - Pochi-Pochi_SkinWeight
+import numpy as np
+
+from PochiPochi_SkinWeight.core import symmetry
+
+
+def test_symmetry_map_pairs_and_unmatched():
+    points = np.array([[1, 0, 0], [-1, 0, 0], [0, 2, 0], [0.5, 1, 0], [-0.7, 1, 0]], dtype=float)
+    sym = symmetry.compute_symmetry_map(points, "x")
+    np.testing.assert_array_equal(sym["map"], [1, 0, 2, -1, -1])
+    np.testing.assert_array_equal(sym["unmatched"], [3, 4])
+    again = symmetry.loads_symmetry_map(symmetry.dumps_symmetry_map(sym))
+    np.testing.assert_array_equal(again["map"], sym["map"])
+    assert again["hash"] == symmetry.geometry_hash(points, "x")
+    assert symmetry.compute_symmetry_map(points, "y")["hash"] != sym["hash"]
+
+
+def test_symmetry_map_cache_uses_topology_and_watcher(fake_scene, import_core):
+    from benchmarks.fake_maya import INFLUENCES, make_mesh, make_polygons
+    skin_data = import_core("skin_data")
+    scene_cache = import_core("scene_cache")
+    points, weights = make_mesh(100)
+    fake_scene.add_skinned_mesh("body", "skinCluster1", INFLUENCES, weights, points, make_polygons(100, width=10))
+    reads = []
+    backend_points = fake_scene.backend.points
+    fake_scene.backend.points = lambda mesh: reads.append(mesh) or backend_points(mesh)
+
+    # 監視なし: 毎回座標を読んで比較（結果は再利用）
+    sym = skin_data.get_symmetry_map("body", backend=fake_scene.backend)
+    assert skin_data.get_symmetry_map("body", backend=fake_scene.backend) is sym
+    assert len(reads) == 2
+    # 面構成が変わればハッシュも変わる
+    fake_scene.backend.add_mesh("body", points, make_polygons(100, width=20))
+    wide = skin_data.get_symmetry_map("body", backend=fake_scene.backend)
+    assert wide["hash"] != sym["hash"]
+    # 件数の変わらない張り替え（先頭の面の頂点順を逆に）も監視なしなら検出する
+    counts, connects = make_polygons(100, width=20)
+    connects = connects.copy()
+    connects[:counts[0]] = connects[:counts[0]][::-1]
+    fake_scene.backend.add_mesh("body", points, (counts, connects))
+    assert skin_data.get_symmetry_map("body", backend=fake_scene.backend)["hash"] != wide["hash"]
+
+    # 監視あり: 座標を読まずに再利用し、監視側の破棄で読み直す
+    watched = []
+    scene_cache.set_mesh_watcher(watched.append)
+    scene_cache.set_enabled(True)
+    try:
+        del reads[:]
+        skin_data.get_symmetry_map("body", backend=fake_scene.backend)
+        skin_data.get_symmetry_map("body", backend=fake_scene.backend)
+        assert reads == ["body"] and watched == ["body"]
+        skin_data.invalidate_symmetry_cache("body")
+        skin_data.get_symmetry_map("body", backend=fake_scene.backend)
+        assert len(reads) == 2
+    finally:
+        scene_cache.set_enabled(False)
+        scene_cache.set_mesh_watcher(None)
@@ -0,0 +1,70 @@
+# test_weight_codec.py - Pochi-Pochi_SkinWeight
+import json
+
+import numpy as np
+
+from PochiPochi_SkinWeight.core import weight_codec
+from PochiPochi_SkinWeight.core.skin_layer import SkinLayerManager
+
+
+def make_manager():
+    rng = np.random.default_rng(1)
+    mgr = SkinLayerManager(["A", "B", "C", "D"], 500)
+    base = mgr.add_layer("Base")
+    weights = rng.random((500, 4)) * (rng.random((500, 4)) > 0.5)
+    mgr.set_layer_weights(base["id"], weights)
+    fix = mgr.add_layer("Fix")
+    mgr.set_layer_opacity(fix["id"], 0.3)
+    mgr.set_weights(fix["id"], [3, 4, 5], [2], 0.8)
+    return mgr
+
+
+def assert_same_layers(a, b):
+    assert a.get_layer_names() == b.get_layer_names()
+    for la, lb in zip(a.list_layers(), b.list_layers()):
+        assert la["opacity"] == lb["opacity"]
+        np.testing.assert_array_equal(a.get_layer_weights(la["id"]), b.get_layer_weights(lb["id"]))
+
+
+def test_layer_data_roundtrip_compact():
+    mgr = make_manager()
+    text = weight_codec.dumps_layer_data(mgr.export_data())
+    assert weight_codec.is_compact(text)
+    assert len(text) < len(json.dumps(mgr.export_json())) / 2
+    other = SkinLayerManager([], 0)
+    other.import_json(weight_codec.loads_layer_data(text))
+    assert_same_layers(mgr, other)
+
+
+def test_layer_data_legacy_json_migrates():
+    mgr = make_manager()
+    legacy = json.dumps(mgr.export_json())
+    other = SkinLayerManager([], 0)
+    other.import_json(weight_codec.loads_layer_data(legacy))
+    assert_same_layers(mgr, other)
+    # 読み込んだものを保存すると新形式になる
+    assert weight_codec.is_compact(weight_codec.dumps_layer_data(other.export_data()))
+
+
+def test_skin_weights_roundtrip_both_formats_and_float16():
+    weights = np.array([[1.0, 0.0], [0.25, 0.75], [0.0, 1.0]], dtype=np.float32)
+    legacy = json.dumps({"influences": ["A", "B"], "weights": weights.tolist()})
+    for text in (legacy, weight_codec.dumps_skin_weights(["A", "B"], weights)):
+        data = weight_codec.loads_skin_weights(text)
+        assert data["influences"] == ["A", "B"]
+        np.testing.assert_array_equal(data["weights"], weights)
+    half = weight_codec.loads_skin_weights(
+        weight_codec.dumps_skin_weights(["A", "B"], weights / 3, float16=True))
+    np.testing.assert_allclose(half["weights"], weights / 3, atol=1e-3)
+
+
+def test_layer_header_and_per_layer_weights_roundtrip():
+    mgr = make_manager()
+    snap = mgr.export_dirty()
+    header = weight_codec.loads_layer_header(weight_codec.dumps_layer_header(snap["header"]))
+    assert [ly["name"] for ly in header["layers"]] == ["Base", "Fix"]
+    assert header["layers"][1]["opacity"] == 0.3
+    for ly in mgr.layers:
+        restored = weight_codec.loads_layer_weights(weight_codec.dumps_layer_weights(snap["layers"][ly["id"]]))
+        assert restored.kind == ly["weights"].kind
+        np.testing.assert_array_equal(restored.to_dense(), ly["weights"].to_dense())
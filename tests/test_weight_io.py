@@ -0,0 +1,93 @@
+# test_weight_io.py - Pochi-Pochi_SkinWeight
+import numpy as np
+import pytest
+
+from PochiPochi_SkinWeight.core import weight_io
+from PochiPochi_SkinWeight.core.skin_backend import MemorySkinBackend
+from PochiPochi_SkinWeight.core.skin_layer import SkinLayerManager
+from PochiPochi_SkinWeight.core.weight_storage import SparseWeights
+
+
+def random_weights(vertex_count, influence_count, density, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.random((vertex_count, influence_count)) * (rng.random((vertex_count, influence_count)) < density)
+            ).astype(np.float32)
+
+
+@pytest.mark.parametrize("storage", ["dense", "sparse"])
+def test_binary_file_roundtrip_and_vertex_range(tmp_path, storage):
+    weights = random_weights(1000, 6, 0.3)
+    path = str(tmp_path / "w.ppsw")
+    info = weight_io.write_weight_file(path, list("ABCDEF"), weights, storage=storage)
+    assert info["storage"] == storage
+    with weight_io.WeightFile(path) as wf:
+        assert wf.influences == list("ABCDEF") and wf.vertex_count == 1000
+        for key, info in wf.header["arrays"].items():
+            assert info["offset"] % weight_io.DATA_ALIGN == 0
+        np.testing.assert_array_equal(wf.read_rows(), weights)
+        np.testing.assert_array_equal(wf.read_rows(250, 260), weights[250:260])
+        with pytest.raises(RuntimeError):
+            wf.read_rows(990, 1001)
+
+
+def test_sparse_storage_input_and_auto_storage(tmp_path):
+    weights = random_weights(500, 8, 0.05, seed=1)
+    path = str(tmp_path / "s.ppsw")
+    info = weight_io.write_weight_file(path, [f"j{i}" for i in range(8)], SparseWeights.from_dense(weights))
+    assert info["storage"] == "sparse" and info["nnz"] == np.count_nonzero(weights)
+    _, count, block = weight_io.read_weight_file(path)
+    assert count == 500
+    np.testing.assert_array_equal(block, weights)
+
+
+def test_import_remaps_by_name_and_partial_range(tmp_path):
+    backend = MemorySkinBackend()
+    src = random_weights(100, 3, 1.0, seed=2)
+    backend.add_skin("skinA", "a", ["grp|root", "L_arm", "R_arm"], src)
+    backend.add_skin("skinB", "b", ["R_arm", "root", "L_arm"], np.zeros((100, 3)))
+    path = str(tmp_path / "a.ppsw")
+    weight_io.export_weights("a", path, backend)
+    weight_io.import_weights("b", path, backend, vertex_range=(10, 20))
+    out = backend.skins["skinB"]["weights"]
+    np.testing.assert_array_equal(out[10:20], src[10:20][:, [2, 0, 1]])
+    assert not out[:10].any() and not out[20:].any()
+    # 開始/終了を省略した範囲
+    weight_io.import_weights("b", path, backend, vertex_range=(None, 5))
+    np.testing.assert_array_equal(out[:5], src[:5][:, [2, 0, 1]])
+
+    backend.add_skin("skinC", "c", ["root", "L_arm"], np.zeros((100, 2)))
+    with pytest.raises(RuntimeError):
+        weight_io.import_weights("c", path, backend)
+    # 対応先の無いインフルエンスもウェイトが全て0なら無視して読み込む
+    backend.skins["skinA"]["weights"][:, 2] = 0.0
+    weight_io.export_weights("a", path, backend)
+    weight_io.import_weights("c", path, backend)
+    np.testing.assert_array_equal(backend.skins["skinC"]["weights"], src[:, :2])
+
+
+def test_weight_file_close_releases_file_and_rejects_text(tmp_path):
+    path = str(tmp_path / "w.ppsw")
+    weight_io.write_weight_file(path, ["A", "B"], random_weights(10, 2, 1.0))
+    wf = weight_io.WeightFile(path)
+    rows = wf.read_rows()
+    wf.close()
+    assert wf._file is None and wf._map is None and not wf.arrays
+    assert rows.shape == (10, 2)
+    text = tmp_path / "old.ppsw"
+    text.write_text("PPSW1:A,B", encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        weight_io.read_weight_file(str(text))
+
+
+def test_layer_export_import(tmp_path):
+    mgr = SkinLayerManager(["A", "B"], 50)
+    ly = mgr.add_layer("Fix")
+    mgr.set_weights(ly["id"], [3, 4], [1], 0.5)
+    path = str(tmp_path / "layer.ppsw")
+    assert weight_io.export_layer(mgr, ly["id"], path)["storage"] == "sparse"
+    other = mgr.add_layer("Copy")
+    weight_io.import_layer(mgr, other["id"], path)
+    np.testing.assert_array_equal(mgr.get_layer_weights(other["id"]), mgr.get_layer_weights(ly["id"]))
+    third = mgr.add_layer("Head")
+    weight_io.import_layer(mgr, third["id"], path, vertex_range=(None, 4))
+    np.testing.assert_array_equal(mgr.get_layer_weights(third["id"])[:, 1], [0, 0, 0, 0.5] + [0] * 46)
@@ -1 +1,102 @@
 # test_weight_ops.py - Pochi-Pochi_SkinWeight
+import numpy as np
+import pytest
+
+from benchmarks.fake_maya import INFLUENCES, make_mesh, make_polygons
+from benchmarks import run as bench
+
+
+@pytest.fixture
+def scene(fake_scene):
+    points, weights = make_mesh(1000)
+    fake_scene.add_skinned_mesh("body", "skinCluster1", INFLUENCES, weights, points)
+    return fake_scene
+
+
+def test_set_and_add_weight_keep_rows_normalized(scene, import_core):
+    weight_ops = import_core("weight_ops")
+    w = scene.backend.skins["skinCluster1"]["weights"]
+    col = INFLUENCES.index("spine")
+    # 頂点0はspineだけ → 配分先が無いので変更できず、skippedとして報告される
+    w[0] = 0.0
+    w[0, col] = 1.0
+    scene.select(["body.vtx[0:499]"])
+    result = weight_ops.set_weight(scene.selection, "spine", 0.5, scene.backend)
+    assert result == {"changed": 499, "skipped": 1}
+    np.testing.assert_allclose(w[1:500, col], 0.5)
+    assert w[0, col] == 1.0
+    np.testing.assert_allclose(w[:500].sum(axis=1), 1.0, rtol=1e-5)
+    result = weight_ops.add_weight(scene.selection, "spine", -0.1, scene.backend)
+    assert result["skipped"] == 1
+    np.testing.assert_allclose(w[1:500, col], 0.4, rtol=1e-5)
+    # 頂点数によらずcmds呼び出しは一定
+    assert scene.cmds.total_calls() <= 4
+
+
+def test_paste_mirror_weights_writes_symmetric_vertex(scene, import_core):
+    weight_ops = import_core("weight_ops")
+    scene.select(["body.vtx[3]"])
+    copied = weight_ops.copy_weights()
+    weight_ops.paste_mirror_weights(copied, backend=scene.backend)
+    w = scene.backend.skins["skinCluster1"]["weights"]
+    # make_meshは後半が前半のX反転
+    np.testing.assert_allclose(w[500 + 3], w[3], rtol=1e-6)
+
+
+def test_benchmark_cmds_calls_within_baseline(fake_scene):
+    results = {"1k": {}}
+    for name, setup, fn in bench.build_cases(fake_scene, bench.SIZES["1k"]):
+        results["1k"][name] = bench.measure(fake_scene.cmds, setup, fn)
+    problems = [p for p in bench.compare(results, bench.load_baseline()) if "calls" in p]
+    assert not problems
+
+
+def test_prune_weights_limits_influences_over_whole_mesh(scene, import_core):
+    weight_ops = import_core("weight_ops")
+    over = int(np.count_nonzero(np.count_nonzero(scene.backend.skins["skinCluster1"]["weights"], axis=1) > 2))
+    report = weight_ops.prune_weights("body", threshold=0.0, max_influences=2, backend=scene.backend)
+    w = scene.backend.skins["skinCluster1"]["weights"]
+    assert report["max_influences_after"] == 2 < report["max_influences_before"]
+    assert report["changed"] == over
+    assert np.count_nonzero(w, axis=1).max() <= 2
+    np.testing.assert_allclose(w.sum(axis=1), 1.0, rtol=1e-5)
+
+
+def test_smooth_weights_reads_only_selection_ring(fake_scene, import_core):
+    weight_ops = import_core("weight_ops")
+    adjacency = import_core("adjacency")
+    points, weights = make_mesh(100)
+    polygons = make_polygons(100, width=10)
+    fake_scene.add_skinned_mesh("grid", "skinGrid", INFLUENCES, weights, points, polygons)
+    report = weight_ops.smooth_weights("grid", [44, 45], strength=0.5, iterations=2, backend=fake_scene.backend)
+    w = fake_scene.backend.skins["skinGrid"]["weights"]
+    assert report["changed"] == 2
+    np.testing.assert_array_equal(np.delete(w, [44, 45], axis=0), np.delete(weights, [44, 45], axis=0))
+    np.testing.assert_allclose(w.sum(axis=1), 1.0, rtol=1e-5)
+    graph = adjacency.get_mesh_graph("grid", fake_scene.backend)
+    assert adjacency.get_mesh_graph("grid", fake_scene.backend) is graph
+
+
+def test_apply_layer_composite_writes_edited_rows_by_influence_name(scene, import_core):
+    weight_ops = import_core("weight_ops")
+    skin_layer = import_core("skin_layer")
+    layer_composite = import_core("layer_composite")
+    w = scene.backend.skins["skinCluster1"]["weights"]
+    original = w.copy()
+    # レイヤ側はインフルエンスの並びが逆
+    mgr = skin_layer.SkinLayerManager(INFLUENCES[::-1], len(w))
+    base = mgr.add_layer("Base", sparse=False)
+    mgr.set_layer_weights(base["id"], original[:, ::-1])
+    fix = mgr.add_layer("Fix")
+    compositor = layer_composite.LayerCompositor(mgr)
+    jidx = mgr.influence_index("spine")
+    mgr.set_weights(fix["id"], [3], [jidx], 0.5, normalize=True)
+    assert weight_ops.apply_layer_composite("body", compositor, [3], scene.backend) == {"changed": 1}
+    col = INFLUENCES.index("spine")
+    assert w[3, col] == pytest.approx(0.5)
+    np.testing.assert_allclose(w[3].sum(), 1.0, rtol=1e-5)
+    np.testing.assert_array_equal(np.delete(w, 3, axis=0), np.delete(original, 3, axis=0))
+    # 2回目以降は再計算された頂点だけ
+    mgr.set_weights(fix["id"], [7], [jidx], 0.25, normalize=True)
+    assert weight_ops.apply_layer_composite("body", compositor, backend=scene.backend) == {"changed": 1}
+    assert w[7, col] == pytest.approx(0.25)
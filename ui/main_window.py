@@ -1,7 +1,10 @@
 from .qt_compat import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
-    QListWidget, QStackedWidget, QGroupBox, QWidget, wrapinstance, QtCore
+    QListView, QTableView, QHeaderView, QStackedWidget, QGroupBox, QWidget, QAbstractItemView,
+    QCheckBox, wrapinstance, QtCore
 )
+from collections import OrderedDict
+
 from maya import OpenMayaUI as omui
 from maya import cmds
 
@@ -10,16 +13,28 @@ from .panel_copy import CopyPanel
 from .panel_mirror import MirrorPanel
 from .panel_skin_data import SkinDataPanel
 from .panel_layers import PanelLayers
+from .widgets import InfluenceListModel, InfluenceFilterProxy, InfluenceStatsModel
+from .save_scheduler import LayerSaveScheduler
 from . import style
-from ..core.joint_ops import get_skin_influences, get_vertex_influences
+from ..commands.script_jobs import install_cache_invalidation, remove_cache_invalidation
+from ..commands.hooks import add_before_save_callback, remove_callback
+from ..core.joint_ops import get_skin_influences, get_selection_influence_stats
+from ..core.utils import split_vertex_components
+from ..core import profiling
 from ..core.skin_data import (
-    find_related_skin_cluster, find_skin_data_node, make_or_get_skin_data_node)
+    find_related_skin_cluster, find_skin_data_node, make_or_get_skin_data_node,
+    read_layer_data, get_layer_revision)
 from ..core.weight_ops import (
     set_weight, add_weight, copy_weights, paste_weights, paste_mirror_weights,
     mirror_weights_x_pos2neg, mirror_weights_x_neg2pos
 )
-from ..core.skin_layer import SkinLayerManager
-import json
+
+# 選択変更をまとめてから更新するまでの待ち時間(ms)
+REFRESH_DELAY_MS = 30
+# 検索欄の入力をまとめてからフィルタするまでの待ち時間(ms)
+FILTER_DELAY_MS = 60
+# 読み込み済みレイヤデータを保持するskinDataノード数（古いものから破棄）
+LAYER_CACHE_SIZE = 3
 
 def get_maya_main_window():
     ptr = omui.MQtUtil.mainWindow()
@@ -37,12 +52,23 @@ class PochiPochiSkinWeightWindow(QDialog):
         left_vbox = QVBoxLayout(left_widget)
         left_vbox.addWidget(QLabel("モデルのジョイント一覧 (Skin Influences)", left_widget))
         self.influence_search = QLineEdit(left_widget)
-        self.influence_search.setPlaceholderText("ジョイント名で検索（部分一致）")
-        self.influence_search.textChanged.connect(self.apply_influence_filter)
+        self.influence_search.setPlaceholderText("ジョイント名で検索（あいまい一致 / 「/」で正規表現）")
         left_vbox.addWidget(self.influence_search)
-        self.influence_list = QListWidget(left_widget)
-        self.influence_list.itemClicked.connect(self.on_influence_item_clicked)
+        # Model/View: 全インフルエンスはモデルに1回だけ入れ、検索はプロキシで絞り込む
+        self.influence_model = InfluenceListModel(self)
+        self.influence_proxy = InfluenceFilterProxy(self)
+        self.influence_proxy.setSourceModel(self.influence_model)
+        self.influence_list = QListView(left_widget)
+        self.influence_list.setModel(self.influence_proxy)
+        self.influence_list.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.influence_list.setUniformItemSizes(True)
+        self.influence_list.clicked.connect(self.on_influence_item_clicked)
         left_vbox.addWidget(self.influence_list)
+        self._filter_timer = QtCore.QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(FILTER_DELAY_MS)
+        self._filter_timer.timeout.connect(self.apply_influence_filter)
+        self.influence_search.textChanged.connect(self._filter_timer.start)
         main_layout.addWidget(left_widget, 1)
 
         # --- 中央パネル
@@ -63,14 +89,44 @@ class PochiPochiSkinWeightWindow(QDialog):
         center_stack.addWidget(self.empty_panel)
         center_stack.addWidget(self.edit_panel)
         self.center_stack = center_stack
-        main_layout.addWidget(center_stack, 2)
+        # 計測バー（オンにすると直前の処理の時間とMaya呼び出し回数を表示）
+        center_widget = QWidget(self)
+        center_vbox = QVBoxLayout(center_widget)
+        center_vbox.setContentsMargins(0, 0, 0, 0)
+        center_vbox.addWidget(center_stack, 1)
+        profile_bar = QHBoxLayout()
+        self.profile_check = QCheckBox("計測", center_widget)
+        self.profile_check.setChecked(profiling.is_enabled())
+        self.profile_check.toggled.connect(self.on_profile_toggled)
+        self.profile_label = QLabel(profiling.format_last(), center_widget)
+        self.profile_report_btn = QPushButton("レポート保存", center_widget)
+        self.profile_report_btn.clicked.connect(self.on_profile_report_clicked)
+        profile_bar.addWidget(self.profile_check)
+        profile_bar.addWidget(self.profile_label, 1)
+        profile_bar.addWidget(self.profile_report_btn)
+        center_vbox.addLayout(profile_bar)
+        main_layout.addWidget(center_widget, 2)
 
         # --- 右パネル（頂点ウェイトリスト＋レイヤーパネル）
         right_widget = QWidget(self)
         right_vbox = QVBoxLayout(right_widget)
         right_vbox.addWidget(QLabel("頂点のウエイト情報 (Vertex Influences)", right_widget))
-        self.vertex_weight_list = QListWidget(right_widget)
-        self.vertex_weight_list.itemClicked.connect(self.on_vertex_weight_item_clicked)
+        # 選択頂点全体のインフルエンス集計（ソート可能なテーブル）
+        self.vertex_weight_info = QLabel("", right_widget)
+        right_vbox.addWidget(self.vertex_weight_info)
+        self.vertex_weight_model = InfluenceStatsModel(self)
+        self.vertex_weight_proxy = QtCore.QSortFilterProxyModel(self)
+        self.vertex_weight_proxy.setSourceModel(self.vertex_weight_model)
+        self.vertex_weight_proxy.setSortRole(QtCore.Qt.UserRole)
+        self.vertex_weight_list = QTableView(right_widget)
+        self.vertex_weight_list.setModel(self.vertex_weight_proxy)
+        self.vertex_weight_list.setSortingEnabled(True)
+        self.vertex_weight_list.sortByColumn(4, QtCore.Qt.DescendingOrder)
+        self.vertex_weight_list.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.vertex_weight_list.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.vertex_weight_list.verticalHeader().setVisible(False)
+        self.vertex_weight_list.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.vertex_weight_list.clicked.connect(self.on_vertex_weight_item_clicked)
         right_vbox.addWidget(self.vertex_weight_list)
         # 最初はLayerManager未定義でPanelLayers生成
         self.layer_manager = None
@@ -90,22 +146,39 @@ class PochiPochiSkinWeightWindow(QDialog):
         self.mirror_panel.mirrorPos2NegRequested.connect(self.on_mirror_pos2neg_clicked)
         self.mirror_panel.mirrorNeg2PosRequested.connect(self.on_mirror_neg2pos_clicked)
         self.weight_panel.weightChanged.connect(self.refresh_vertex_weight_list)
+        self.weight_panel.layerEdited.connect(self.on_panel_layers_changed)
 
         self.all_influences = []
         self.copied_weights = None
         self._manual_joint_override = False
 
+        # skinDataノードUUID → (layerRevision, SkinLayerManager)。ノードが変わらない限り再パースしない
+        # 直近 LAYER_CACHE_SIZE 個だけ保持し、シーンが変わったら破棄
+        self._layer_cache = OrderedDict()
+        self._layer_node = None
+        # 選択変更の連打はアイドルタイマーで1回の更新にまとめる
+        self._refresh_timer = QtCore.QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(REFRESH_DELAY_MS)
+        self._refresh_timer.timeout.connect(self.refresh_panels)
+        # レイヤ保存はまとめてバックグラウンドでエンコード。シーン保存前には必ず書き込む
+        self.save_scheduler = LayerSaveScheduler(self)
+        self.save_scheduler.saved.connect(self.on_layers_saved)
+        self._before_save_callback = add_before_save_callback(self.save_scheduler.flush)
+
         self.selection_monitor_job = None
+        self.scene_jobs = []
+        profiling.add_listener(self.on_profiled_operation)
+        install_cache_invalidation()
         self.refresh_panels()
         self.start_selection_monitoring()
+        self.start_scene_monitoring()
 
     def refresh_panels(self):
         sel = cmds.ls(selection=True, long=True)
         if not sel:
             self.set_edit_mode(False)
-            self.layer_manager = None
-            self.panel_layers.manager = None
-            self.panel_layers.reload_table()
+            self.set_layer_manager(None)
             return
         mesh = sel[0].split('.')[0]
         skin = find_related_skin_cluster(mesh)
@@ -114,37 +187,57 @@ class PochiPochiSkinWeightWindow(QDialog):
         self.set_edit_mode(self.is_skin_data_present)
         self.refresh_influence_list(mesh)
         self.refresh_vertex_weight_list()
-        # レイヤデータ：skinDataノードから都度ロード
+        # レイヤデータ：skinDataノードが変わっていなければ読み込み済みのものを再利用
         if skin_data:
             try:
-                json_str = cmds.getAttr(f"{skin_data}.layerData")
-                data = json.loads(json_str)
-                self.layer_manager = SkinLayerManager(
-                    data.get("influences", []), data.get("vertex_count", 0)
-                )
-                self.layer_manager.import_json(data)
-                self.panel_layers.manager = self.layer_manager
-                self.panel_layers.reload_table()
+                self.set_layer_manager(self._load_layer_manager(skin_data), skin_data)
+                self.weight_panel.sync_layer_locks(skin)
             except Exception as e:
                 print(f"レイヤデータロード失敗: {e}")
-                self.layer_manager = None
-                self.panel_layers.manager = None
-                self.panel_layers.reload_table()
+                self.set_layer_manager(None)
         else:
-            self.layer_manager = None
-            self.panel_layers.manager = None
-            self.panel_layers.reload_table()
+            self.set_layer_manager(None)
+
+    def _layer_cache_key(self, node):
+        # シーンを開き直して同名ノードができても別物として扱う
+        uuid = cmds.ls(node, uuid=True)
+        return uuid[0] if uuid else node
+
+    def _load_layer_manager(self, node):
+        key = self._layer_cache_key(node)
+        rev = get_layer_revision(node)
+        cached = self._layer_cache.get(key)
+        if cached and cached[0] == rev:
+            self._layer_cache.move_to_end(key)
+            return cached[1]
+        manager = read_layer_data(node)
+        self._cache_layer_manager(key, rev, manager)
+        return manager
+
+    def _cache_layer_manager(self, key, rev, manager):
+        self._layer_cache[key] = (rev, manager)
+        self._layer_cache.move_to_end(key)
+        while len(self._layer_cache) > LAYER_CACHE_SIZE:
+            self._layer_cache.popitem(last=False)
+
+    def set_layer_manager(self, manager, node=None):
+        self._layer_node = node if manager else None
+        if manager is self.layer_manager and manager is not None:
+            return
+        self.layer_manager = manager
+        self.panel_layers.manager = manager
+        self.panel_layers.reload_table()
+        self.weight_panel.set_layer_target(manager, self.panel_layers.get_selected_layer_id)
 
     def save_layers_to_node(self):
-        sel = cmds.ls(selection=True, long=True)
-        if not sel or not self.layer_manager:
+        node = self._layer_node
+        if not node or not self.layer_manager or not cmds.objExists(node):
             return
-        mesh = sel[0].split('.')[0]
-        skin = find_related_skin_cluster(mesh)
-        skin_data = find_skin_data_node(skin)
-        if skin_data:
-            data = self.layer_manager.export_json()
-            cmds.setAttr(f"{skin_data}.layerData", json.dumps(data), type='string')
+        self.save_scheduler.schedule(node, self.layer_manager)
+
+    def on_layers_saved(self, node, manager, rev):
+        if cmds.objExists(node):
+            self._cache_layer_manager(self._layer_cache_key(node), rev, manager)
 
     def set_edit_mode(self, enable):
         if enable:
@@ -170,66 +263,65 @@ class PochiPochiSkinWeightWindow(QDialog):
         if not mesh:
             sel = cmds.ls(selection=True, long=True)
             if not sel:
-                self.influence_list.clear()
+                self.influence_model.set_influences([])
+                self.all_influences = []
                 return
             mesh = sel[0].split('.')[0]
-        self.influence_list.clear()
+        # インフルエンス構成が同じならモデルはそのまま（set_influences側で判定）
         influences = get_skin_influences(mesh)
+        self.influence_model.set_influences(influences)
         self.all_influences = influences
-        for j in influences:
-            self.influence_list.addItem(j)
-        joint = self.weight_panel.get_joint_name()
-        for i in range(self.influence_list.count()):
-            item = self.influence_list.item(i)
-            if item.text() == joint:
-                self.influence_list.setCurrentItem(item)
-                break
+        self.highlight_current_influence()
 
-    def apply_influence_filter(self):
-        word = self.influence_search.text().strip().lower()
-        self.influence_list.clear()
-        if not self.all_influences:
+    def highlight_current_influence(self):
+        row = self.influence_model.row_of(self.weight_panel.get_joint_name())
+        if row is None:
+            self.influence_list.clearSelection()
             return
-        for inf in self.all_influences:
-            if not word or word in inf.lower():
-                self.influence_list.addItem(inf)
+        index = self.influence_proxy.mapFromSource(self.influence_model.index(row, 0))
+        if index.isValid():
+            self.influence_list.setCurrentIndex(index)
+            self.influence_list.scrollTo(index)
+
+    def apply_influence_filter(self):
+        if not self.influence_proxy.set_search_text(self.influence_search.text()):
+            return  # 入力途中の不正な正規表現は無視
+        self.highlight_current_influence()
 
-    def on_influence_item_clicked(self, item):
-        joint_name = item.text()
+    def on_influence_item_clicked(self, index):
+        joint_name = index.data()
         self._manual_joint_override = True
         self.weight_panel.set_joint_name(joint_name)
         self.refresh_vertex_weight_list()
 
     def refresh_vertex_weight_list(self):
-        sel = cmds.ls(selection=True, flatten=True)
-        verts = [s for s in sel if ".vtx[" in s]
-        self.vertex_weight_list.clear()
-        if not verts:
-            self.vertex_weight_list.addItem("頂点未選択")
-            if not self._manual_joint_override:
-                self.weight_panel.set_joint_name("")
+        # flattenせず範囲表記のまま番号配列に変換（大量選択でも文字列を展開しない）
+        mesh, verts = split_vertex_components(cmds.ls(selection=True))
+        if not verts.size:
+            self._show_vertex_stats(None, "頂点未選択")
             return
-        vtx = verts[0]
-        infos = get_vertex_influences(vtx)
-        if not infos:
-            self.vertex_weight_list.addItem("skinned頂点でないかウェイトなし")
-            if not self._manual_joint_override:
-                self.weight_panel.set_joint_name("")
+        stats = get_selection_influence_stats(mesh, verts)
+        if not stats or not stats["influences"]:
+            self._show_vertex_stats(None, "skinned頂点でないかウェイトなし")
             return
-        for joint, value in infos:
-            self.vertex_weight_list.addItem(f"{joint} : {value:.4f}")
+        self._show_vertex_stats(stats, f"{len(verts)} 頂点 / {len(stats['influences'])} インフルエンス")
         if not self._manual_joint_override:
-            first_joint = infos[0][0]
-            self.weight_panel.set_joint_name(first_joint)
+            top = self.vertex_weight_proxy.index(0, 0)
+            self.weight_panel.set_joint_name(top.data(QtCore.Qt.UserRole) if top.isValid() else "")
 
-    def on_vertex_weight_item_clicked(self, item):
-        text = item.text()
-        if ":" not in text:
+    def _show_vertex_stats(self, stats, message):
+        self.vertex_weight_model.set_stats(stats)
+        self.vertex_weight_info.setText(message)
+        if stats is None and not self._manual_joint_override:
+            self.weight_panel.set_joint_name("")
+
+    def on_vertex_weight_item_clicked(self, index):
+        joint_name = self.vertex_weight_model.joint_at(self.vertex_weight_proxy.mapToSource(index).row())
+        if not joint_name:
             return
-        joint_name = text.split(":", 1)[0].strip()
         self._manual_joint_override = False
         self.weight_panel.set_joint_name(joint_name)
-        self.refresh_influence_list(mesh=None)
+        self.highlight_current_influence()
 
     def on_copy_clicked(self):
         try:
@@ -256,20 +348,28 @@ class PochiPochiSkinWeightWindow(QDialog):
 
     def on_mirror_pos2neg_clicked(self):
         try:
-            mirror_weights_x_pos2neg()
-            self.mirror_panel.set_status("+X→-X 完了")
+            report = mirror_weights_x_pos2neg()
+            self.mirror_panel.set_status(self._mirror_report_text("+X→-X", report))
             self.refresh_vertex_weight_list()
         except Exception as e:
             self.mirror_panel.set_status(str(e))
 
     def on_mirror_neg2pos_clicked(self):
         try:
-            mirror_weights_x_neg2pos()
-            self.mirror_panel.set_status("-X→+X 完了")
+            report = mirror_weights_x_neg2pos()
+            self.mirror_panel.set_status(self._mirror_report_text("-X→+X", report))
             self.refresh_vertex_weight_list()
         except Exception as e:
             self.mirror_panel.set_status(str(e))
 
+    def _mirror_report_text(self, label, report):
+        text = f"{label} 完了 ({report['mirrored']}頂点)"
+        if report["unmatched"]:
+            text += f" 対称なし:{report['unmatched']}"
+        if report["missing_influences"]:
+            text += f" 左右不明ジョイント:{len(report['missing_influences'])}"
+        return text
+
     def start_selection_monitoring(self):
         if getattr(self, "selection_monitor_job", None):
             try:
@@ -281,14 +381,62 @@ class PochiPochiSkinWeightWindow(QDialog):
             killWithScene=True, protected=True
         )
 
+    def start_scene_monitoring(self):
+        self.stop_scene_monitoring()
+        for event in ("SceneOpened", "NewSceneOpened"):
+            self.scene_jobs.append(cmds.scriptJob(event=[event, self.on_scene_changed], protected=True))
+
+    def stop_scene_monitoring(self):
+        for job in self.scene_jobs:
+            try:
+                cmds.scriptJob(kill=job, force=True)
+            except Exception:
+                pass
+        self.scene_jobs = []
+
+    def on_scene_changed(self, *args):
+        # 前のシーンのレイヤデータは使わない
+        self._layer_cache.clear()
+        self.set_layer_manager(None)
+        self.refresh_panels()
+
     def on_selection_changed(self, *args):
         self._manual_joint_override = False
-        self.refresh_panels()
+        self._refresh_timer.start()
+
+    # ==== 計測 ====
+    def on_profile_toggled(self, enabled):
+        profiling.enable(enabled)
+        if not enabled:
+            self.profile_label.setText("")
+
+    def on_profiled_operation(self, record):
+        self.profile_label.setText(profiling.format_last(record))
+
+    def on_profile_report_clicked(self):
+        paths = cmds.fileDialog2(fileMode=0, caption="計測レポートの保存",
+                                 fileFilter="JSON (*.json);;Text (*.txt)")
+        if not paths:
+            return
+        try:
+            profiling.dump_report(paths[0])
+            self.profile_label.setText(f"レポート保存: {paths[0]}")
+        except Exception as e:
+            self.profile_label.setText(f"レポート保存失敗: {e}")
 
     def closeEvent(self, event):
+        self.save_scheduler.flush()
+        remove_callback(self._before_save_callback)
+        self._before_save_callback = None
+        self._refresh_timer.stop()
+        self._filter_timer.stop()
         if getattr(self, "selection_monitor_job", None):
             try:
                 cmds.scriptJob(kill=self.selection_monitor_job, force=True)
             except Exception:
                 pass
+        self.stop_scene_monitoring()
+        self._layer_cache.clear()
+        remove_cache_invalidation()
+        profiling.remove_listener(self.on_profiled_operation)
         super().closeEvent(event)
\ No newline at end of file
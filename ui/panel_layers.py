@@ -45,12 +45,14 @@ class PanelLayers(QGroupBox):
         self.reload_table()
 
     def reload_table(self):
+        selected_id = self._selected_id_in_table()
         self.table.setRowCount(0)
         if self.manager is None:
             return
         for row, layer in enumerate(self.manager.list_layers()):
             self.table.insertRow(row)
             item = QTableWidgetItem(layer["name"])
+            item.setData(QtCore.Qt.UserRole, layer["id"])
             self.table.setItem(row, 0, item)
             cbx = QCheckBox()
             cbx.setChecked(layer.get("enabled", True))
@@ -62,6 +64,16 @@ class PanelLayers(QGroupBox):
             slider.setValue(int(layer.get("opacity", 1.0) * 100))
             slider.valueChanged.connect(lambda val, layer_id=layer["id"]: self.set_opacity(layer_id, val))
             self.table.setCellWidget(row, 2, slider)
+            # 再構築前に選択していたレイヤを再選択（編集先レイヤを保持）
+            if layer["id"] == selected_id:
+                self.table.selectRow(row)
+
+    def _selected_id_in_table(self):
+        sel = self.table.selectionModel().selectedRows() if self.table.selectionModel() else []
+        if not sel:
+            return None
+        item = self.table.item(sel[0].row(), 0)
+        return item.data(QtCore.Qt.UserRole) if item else None
 
     def get_selected_layer_id(self):
         sel = self.table.selectionModel().selectedRows()
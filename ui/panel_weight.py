@@ -7,14 +7,23 @@ from . import style
 from functools import partial
 from maya import cmds
 from ..core.joint_ops import get_skin_influences, get_vertex_influences
-from ..core.weight_ops import set_weight, find_related_skin_cluster
+from ..core.weight_ops import set_weight, add_weight, smooth_weights, apply_layer_composite
+from ..core.layer_composite import LayerCompositor
+from ..core.adjacency import get_mesh_graph
+from ..core.utils import split_vertex_components
+from ..core.skin_backend import get_backend
 
 class WeightPanel(QGroupBox):
-    weightChanged = QtCore.Signal(float)   # set/preset/relativeで発行
+    weightChanged = QtCore.Signal(float)   # set/preset/relative/スムースで発行
+    layerEdited = QtCore.Signal()          # レイヤ(SkinLayerManager)を編集したとき発行
 
     def __init__(self, parent=None):
         super().__init__("ウェイト設定", parent)
         self.setStyleSheet(style.group_box)
+        # レイヤ編集先（Noneならこれまで通りskinClusterを直接編集）
+        self.layer_manager = None
+        self.layer_id_getter = None
+        self.layer_compositor = None
         vbox = QVBoxLayout(self)
 
         # ジョイント名欄　※編集可能
@@ -32,8 +41,25 @@ class WeightPanel(QGroupBox):
             btn.setStyleSheet(style.preset_button_style(val))
             btn.clicked.connect(partial(self.on_set_weight, val))
             preset_hbox.addWidget(btn)
+        btn_smooth = QPushButton("平滑")
+        btn_smooth.setStyleSheet(style.smooth_button)
+        btn_smooth.setToolTip("選択頂点（オブジェクト選択ならメッシュ全体）のウェイトを隣接頂点の平均へ近づける")
+        btn_smooth.clicked.connect(lambda _=None: self.on_smooth_clicked())
+        preset_hbox.addWidget(btn_smooth)
         vbox.addLayout(preset_hbox)
 
+        # ---- スムース設定 ----
+        smooth_hbox = QHBoxLayout()
+        smooth_hbox.addWidget(QLabel("スムース 強さ:"))
+        self.smooth_strength_input = QLineEdit(self)
+        self.smooth_strength_input.setText("0.5")
+        smooth_hbox.addWidget(self.smooth_strength_input)
+        smooth_hbox.addWidget(QLabel("回数:"))
+        self.smooth_iterations_input = QLineEdit(self)
+        self.smooth_iterations_input.setText("1")
+        smooth_hbox.addWidget(self.smooth_iterations_input)
+        vbox.addLayout(smooth_hbox)
+
         # ---- 相対増減 ----
         delta_hbox = QHBoxLayout()
         btn_sub = QPushButton("－")
@@ -60,17 +86,73 @@ class WeightPanel(QGroupBox):
     def get_joint_name(self):
         return self.joint_input.text().strip()
 
+    def set_layer_target(self, manager, layer_id_getter=None):
+        """プリセット/相対ボタンの編集先レイヤを設定（layer_id_getterは選択中レイヤidを返す関数）"""
+        if self.layer_compositor is not None:
+            self.layer_compositor.detach()
+        self.layer_manager = manager
+        self.layer_id_getter = layer_id_getter
+        self.layer_compositor = LayerCompositor(manager) if manager is not None else None
+
+    def _edit_layer(self, joint, value, relative):
+        """選択中レイヤがあればバッチAPIで一括編集し、合成結果をskinClusterへ書き戻してTrueを返す"""
+        if self.layer_manager is None or self.layer_id_getter is None:
+            return False
+        layer_id = self.layer_id_getter()
+        if not layer_id:
+            return False
+        jidx = self.layer_manager.influence_index(joint)
+        mesh, idx = split_vertex_components(cmds.ls(selection=True))
+        if jidx is None or not idx.size:
+            return False
+        try:
+            if relative:
+                self.layer_manager.add_weights(layer_id, idx, [jidx], value, normalize=True)
+            else:
+                self.layer_manager.set_weights(layer_id, idx, [jidx], value, normalize=True)
+            apply_layer_composite(mesh, self.layer_compositor, idx)
+        except RuntimeError as e:
+            cmds.warning(str(e))
+            return True
+        self.layerEdited.emit()
+        return True
+
+    def sync_layer_locks(self, skin):
+        """
+        ジョイントのロック(lockInfluenceWeights)をレイヤ編集の正規化にも反映
+        選択の更新ごとに1回呼ぶ（編集ごとには問い合わせない）
+        """
+        if self.layer_manager is None or not skin:
+            return
+        backend = get_backend()
+        locked = backend.locked_influences(skin)
+        names = backend.influences(skin)
+        self.layer_manager.locked_influences = {
+            i for i in (self.layer_manager.influence_index(n) for n, lk in zip(names, locked) if lk)
+            if i is not None}
+
     def on_set_weight(self, value):
         joint = self.get_joint_name()
-        verts = cmds.ls(selection=True, flatten=True)
+        if joint and self._edit_layer(joint, value, relative=False):
+            self.weightChanged.emit(value)
+            return
+        verts = [s for s in cmds.ls(selection=True) if ".vtx[" in s]
         if not verts or not joint:
             return
-        mesh = verts[0].split('.')[0]
-        skin = find_related_skin_cluster(mesh)
-        for v in verts:
-            cmds.skinPercent(skin, v, transformValue=[(joint, value)])
+        try:
+            result = set_weight(verts, joint, value)
+        except RuntimeError as e:
+            cmds.warning(str(e))
+            return
+        self._warn_skipped(result)
         self.weightChanged.emit(value)
 
+    def _warn_skipped(self, result):
+        """他に配分先のインフルエンスが無く変更できなかった頂点があれば警告"""
+        if result and result.get("skipped"):
+            cmds.warning(f"{result['skipped']}頂点は他に配分できるインフルエンスが無いため変更されませんでした"
+                         "（ロックを外すか他のジョイントにウェイトを与えてください）")
+
     def get_relative_delta(self):
         try:
             val = float(self.relative_input.text())
@@ -85,17 +167,62 @@ class WeightPanel(QGroupBox):
         if negative:
             delta = -delta
         joint = self.get_joint_name()
-        verts = cmds.ls(selection=True, flatten=True)
+        if joint and self._edit_layer(joint, delta, relative=True):
+            self.weightChanged.emit(delta)
+            return
+        verts = [s for s in cmds.ls(selection=True) if ".vtx[" in s]
         if not verts or not joint:
             return
-        mesh = verts[0].split('.')[0]
-        skin_cluster = find_related_skin_cluster(mesh)
-        for v in verts:
-            curr = cmds.skinPercent(skin_cluster, v, query=True, transform=joint)
-            new_val = min(max(curr + delta, 0.0), 1.0)
-            cmds.skinPercent(skin_cluster, v, transformValue=[(joint, new_val)])
+        try:
+            result = add_weight(verts, joint, delta)
+        except RuntimeError as e:
+            cmds.warning(str(e))
+            return
+        self._warn_skipped(result)
         self.weightChanged.emit(delta)
 
+    def get_smooth_params(self):
+        """(強さ 0〜1, 回数 1以上)。不正な入力は既定値"""
+        try:
+            strength = min(max(float(self.smooth_strength_input.text()), 0.0), 1.0)
+        except Exception:
+            strength = 0.5
+        try:
+            iterations = max(int(self.smooth_iterations_input.text()), 1)
+        except Exception:
+            iterations = 1
+        return strength, iterations
+
+    def _smooth_layer(self, mesh, vertices, strength, iterations):
+        """選択中レイヤがあればレイヤをスムースし、合成結果をskinClusterへ書き戻してTrueを返す"""
+        if self.layer_manager is None or self.layer_id_getter is None:
+            return False
+        layer_id = self.layer_id_getter()
+        if not layer_id:
+            return False
+        self.layer_manager.smooth_weights(layer_id, get_mesh_graph(mesh), vertices, strength, iterations)
+        apply_layer_composite(mesh, self.layer_compositor, vertices)
+        self.layerEdited.emit()
+        return True
+
+    def on_smooth_clicked(self):
+        strength, iterations = self.get_smooth_params()
+        sel = cmds.ls(selection=True) or []
+        mesh, idx = split_vertex_components(sel)
+        vertices = idx if idx.size else None
+        if mesh is None:
+            # 頂点以外（オブジェクト）の選択ならメッシュ全体
+            mesh = sel[0] if sel else None
+        if not mesh:
+            return
+        try:
+            if not self._smooth_layer(mesh, vertices, strength, iterations):
+                smooth_weights(mesh, vertices, strength, iterations)
+        except RuntimeError as e:
+            cmds.warning(str(e))
+            return
+        self.weightChanged.emit(strength)
+
     def bold_big_font(self):
         f = self.font()
         f.setPointSize(18)
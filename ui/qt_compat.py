@@ -9,7 +9,7 @@ try:
         QApplication, QMainWindow, QWidget, QDialog, QVBoxLayout, QHBoxLayout,
         QLabel, QPushButton, QLineEdit, QListWidget, QListWidgetItem,
         QGroupBox, QStackedWidget, QTableWidget, QTableWidgetItem, QCheckBox, QSlider,
-        QInputDialog, QAbstractItemView
+        QInputDialog, QAbstractItemView, QListView, QTableView, QHeaderView
     )
     from PySide6 import QtCore
     import shiboken6
@@ -20,7 +20,7 @@ except ImportError:
             QApplication, QMainWindow, QWidget, QDialog, QVBoxLayout, QHBoxLayout,
             QLabel, QPushButton, QLineEdit, QListWidget, QListWidgetItem,
             QGroupBox, QStackedWidget, QTableWidget, QTableWidgetItem, QCheckBox, QSlider,
-            QInputDialog, QAbstractItemView
+            QInputDialog, QAbstractItemView, QListView, QTableView, QHeaderView
         )
         from PySide2 import QtCore
         import shiboken2
@@ -31,7 +31,7 @@ except ImportError:
                 QApplication, QMainWindow, QWidget, QDialog, QVBoxLayout, QHBoxLayout,
                 QLabel, QPushButton, QLineEdit, QListWidget, QListWidgetItem,
                 QGroupBox, QStackedWidget, QTableWidget, QTableWidgetItem, QCheckBox, QSlider,
-                QInputDialog, QAbstractItemView
+                QInputDialog, QAbstractItemView, QListView, QTableView, QHeaderView
             )
             from PyQt6 import QtCore
             import sip
@@ -41,7 +41,7 @@ except ImportError:
                 QApplication, QMainWindow, QWidget, QDialog, QVBoxLayout, QHBoxLayout,
                 QLabel, QPushButton, QLineEdit, QListWidget, QListWidgetItem,
                 QGroupBox, QStackedWidget, QTableWidget, QTableWidgetItem, QCheckBox, QSlider,
-                QInputDialog, QAbstractItemView
+                QInputDialog, QAbstractItemView, QListView, QTableView, QHeaderView
             )
             from PyQt5 import QtCore
             import sip
@@ -65,5 +65,6 @@ QtMatchExactly = QtCore.Qt.MatchExactly
 __all__ = [
     "QApplication", "QMainWindow", "QWidget", "QDialog", "QVBoxLayout", "QHBoxLayout",
     "QLabel", "QPushButton", "QLineEdit", "QListWidget", "QListWidgetItem",
-    "QGroupBox", "wrapinstance", "QtCore", "QtMatchExactly"
+    "QGroupBox", "wrapinstance", "QtCore", "QtMatchExactly",
+    "QListView", "QTableView", "QHeaderView"
 ]
\ No newline at end of file
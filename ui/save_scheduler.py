@@ -0,0 +1,114 @@
+# PochiPochi_SkinWeight/ui/save_scheduler.py
+# レイヤ保存の遅延・バックグラウンド化
+#   変更の連打はタイマーで1回にまとめ、文字列化はワーカースレッド、setAttrだけメインスレッドで行う
+
+import threading
+
+from maya import cmds
+
+from .qt_compat import QtCore
+from ..core.skin_data import encode_layer_data, write_encoded_layers
+
+# 最後の変更から保存を始めるまでの待ち時間(ms)
+SAVE_DELAY_MS = 400
+
+
+class LayerSaveScheduler(QtCore.QObject):
+    """
+    schedule(node, manager) された保存をまとめて実行する
+    ノードごとに最新の状態だけを保持し、エンコードは同時に1件まで
+    """
+    # 書き込み完了: (skinDataノード, SkinLayerManager, 新しいlayerRevision)
+    saved = QtCore.Signal(str, object, int)
+    # ワーカースレッド → メインスレッドへの受け渡し（キュー接続になる）
+    _encoded = QtCore.Signal(object)
+
+    def __init__(self, parent=None, delay_ms=SAVE_DELAY_MS):
+        super().__init__(parent)
+        self._pending = {}  # node → manager
+        self._job = None    # エンコード中のジョブ
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._start_encode)
+        self._encoded.connect(self._on_encoded)
+
+    def schedule(self, node, manager):
+        """保存予約（呼ぶたびに待ち時間をリセット）"""
+        self._pending[node] = manager
+        self._timer.start()
+
+    def has_pending(self):
+        return bool(self._pending) or self._job is not None
+
+    def _start_encode(self):
+        # エンコード中なら終わってから次を始める
+        if self._job is not None or not self._pending:
+            return
+        node = next(iter(self._pending))
+        manager = self._pending.pop(node)
+        if not manager.is_dirty():
+            self._start_encode()
+            return
+        # 変更分のスナップショットはメインスレッドで取る（以降の編集と競合しない）
+        job = self._make_job(node, manager)
+        job["thread"] = threading.Thread(target=self._encode, args=(job,), daemon=True)
+        self._job = job
+        job["thread"].start()
+
+    def _encode(self, job):
+        try:
+            job["encoded"] = encode_layer_data(job.pop("snapshot"))
+        except Exception as e:
+            job["error"] = e
+        self._encoded.emit(job)
+
+    def _on_encoded(self, job):
+        if job is not self._job:
+            return  # flush() で書き込み済み
+        self._job = None
+        self._write(job)
+        if self._pending:
+            self._timer.start()
+
+    @staticmethod
+    def _make_job(node, manager):
+        snapshot = manager.export_dirty()
+        return {"node": node, "manager": manager, "snapshot": snapshot, "encoded": None, "error": None,
+                "dirty": (list(snapshot["layers"]), snapshot["header"] is not None)}
+
+    def _write(self, job):
+        node = job["node"]
+        error = job["error"]
+        if error is None and cmds.objExists(node):
+            try:
+                rev = write_encoded_layers(node, job["encoded"])
+            except Exception as e:
+                error = e
+            else:
+                self.saved.emit(node, job["manager"], rev)
+                return
+        if error is not None:
+            print(f"レイヤデータ保存失敗: {error}")
+            # 書けなかった分は次の保存で再挑戦
+            layer_ids, header = job["dirty"]
+            job["manager"].mark_layers_dirty(layer_ids, header=header)
+
+    def flush(self):
+        """予約中・エンコード中の保存をすべてその場で書き込む（ウィンドウを閉じる時/シーン保存前）"""
+        self._timer.stop()
+        job, self._job = self._job, None
+        if job is not None:
+            job["thread"].join()
+            self._write(job)
+        while self._pending:
+            node = next(iter(self._pending))
+            manager = self._pending.pop(node)
+            if not manager.is_dirty():
+                continue
+            job = self._make_job(node, manager)
+            try:
+                job["encoded"] = encode_layer_data(job.pop("snapshot"))
+            except Exception as e:
+                job["error"] = e
+            self._write(job)
@@ -22,6 +22,21 @@ def preset_button_style(val):
         " }"
     )
 
+smooth_button = """
+QPushButton {
+    background-color: #5a8f6a;
+    color: white;
+    font-weight: bold;
+    min-width: 36px; max-width: 50px;
+    min-height: 36px;
+    border-radius: 12px;
+    font-size: 13px;
+}
+QPushButton:pressed {
+    background-color: #3d6549;
+}
+"""
+
 relative_button = """
 QPushButton {
     background-color: #31345b;
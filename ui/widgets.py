@@ -1 +1,127 @@
 # widgets.py - Pochi-Pochi_SkinWeight
+
+import re
+
+from .qt_compat import QtCore
+
+
+class InfluenceListModel(QtCore.QAbstractListModel):
+    """
+    インフルエンス名リストのモデル
+    名前→行番号を辞書で持つので現在ジョイントの検索はO(1)。同じリストなら作り直さない
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._names = []
+        self._rows = {}
+
+    def set_influences(self, names):
+        """変化があったときだけモデルをリセット（変化したらTrue）"""
+        names = list(names or [])
+        if names == self._names:
+            return False
+        self.beginResetModel()
+        self._names = names
+        self._rows = {}
+        for i, name in enumerate(names):
+            self._rows[name] = i
+            self._rows.setdefault(name.split("|")[-1], i)
+        self.endResetModel()
+        return True
+
+    def influences(self):
+        return list(self._names)
+
+    def row_of(self, name):
+        if not name:
+            return None
+        row = self._rows.get(name)
+        return row if row is not None else self._rows.get(name.split("|")[-1])
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._names)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.ToolTipRole, QtCore.Qt.UserRole):
+            return self._names[index.row()]
+        return None
+
+
+class InfluenceFilterProxy(QtCore.QSortFilterProxyModel):
+    """
+    インフルエンス検索用プロキシ（照合はQt側の正規表現でC++内で実行）
+    "/"で始まれば正規表現、それ以外は文字が順に含まれるあいまい検索（大文字小文字無視）
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+
+    @staticmethod
+    def pattern_for(text):
+        text = text.strip()
+        if text.startswith("/"):
+            return text[1:]
+        return ".*".join(re.escape(c) for c in text)
+
+    def set_search_text(self, text):
+        pattern = self.pattern_for(text)
+        if hasattr(self, "setFilterRegularExpression"):
+            regex = QtCore.QRegularExpression(pattern, QtCore.QRegularExpression.CaseInsensitiveOption)
+            if not regex.isValid():
+                return False
+            self.setFilterRegularExpression(regex)
+        else:
+            self.setFilterRegExp(QtCore.QRegExp(pattern, QtCore.Qt.CaseInsensitive))
+        return True
+
+
+class InfluenceStatsModel(QtCore.QAbstractTableModel):
+    """
+    選択頂点のインフルエンス集計表（joint_ops.influence_stats の結果を表示）
+    UserRoleに生の値を返すのでプロキシで数値ソートできる
+    """
+    COLUMNS = ["Joint", "Verts", "Min", "Max", "Mean"]
+    _KEYS = ["influences", "count", "min", "max", "mean"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._stats = None
+
+    def set_stats(self, stats):
+        self.beginResetModel()
+        self._stats = stats
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid() or not self._stats:
+            return 0
+        return len(self._stats["influences"])
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or not self._stats:
+            return None
+        value = self._stats[self._KEYS[index.column()]][index.row()]
+        if role == QtCore.Qt.UserRole:
+            return value if index.column() == 0 else float(value)
+        if role == QtCore.Qt.DisplayRole:
+            if index.column() == 0:
+                return value
+            if index.column() == 1:
+                return str(int(value))
+            return f"{float(value):.4f}"
+        if role == QtCore.Qt.TextAlignmentRole and index.column() > 0:
+            return int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        return None
+
+    def joint_at(self, row):
+        return self._stats["influences"][row] if self._stats else None